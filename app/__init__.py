@@ -8,7 +8,8 @@ warnings.simplefilter('ignore', ExtDeprecationWarning)
 from pytz import utc
 
 from app.helpers.scheduled_jobs import send_mail_to_expired_orders, empty_trash, send_after_event_mail, \
-    send_event_fee_notification, send_event_fee_notification_followup
+    send_event_fee_notification, send_event_fee_notification_followup, refresh_forex_rates, \
+    refresh_sales_rollup, prune_qr_codes
 
 from celery import Celery
 from celery.signals import after_task_publish
@@ -56,6 +57,7 @@ from app.helpers.flask_ext.error_handlers import init_error_handlers
 from app.helpers.flask_ext.jinja.filters import init_filters
 from app.helpers.flask_ext.jinja.helpers import init_helpers
 from app.helpers.flask_ext.jinja.variables import init_variables
+from app.helpers.instrumentation import init_instrumentation
 
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -125,6 +127,8 @@ def create_app():
     CORS(app, resources={r"/api/*": {"origins": "*"}})
     AuthManager.init_login(app)
 
+    init_instrumentation(app)
+
     if app.config['TESTING'] and app.config['PROFILE']:
         # Profiling
         app.wsgi_app = ProfilerMiddleware(app.wsgi_app, restrictions=[30])
@@ -199,6 +203,11 @@ scheduler.add_job(empty_trash, 'cron', hour=5, minute=30)
 scheduler.add_job(send_after_event_mail, 'cron', hour=5, minute=30)
 scheduler.add_job(send_event_fee_notification, 'cron', day=1)
 scheduler.add_job(send_event_fee_notification_followup, 'cron', day=15)
+scheduler.add_job(refresh_forex_rates, 'interval', hours=6)
+scheduler.add_job(prune_qr_codes, 'cron', hour=4, minute=30)
+if not current_app.config['TESTING']:
+    # tests refresh the rollup when they need it
+    scheduler.add_job(refresh_sales_rollup, 'interval', minutes=1)
 scheduler.start()
 
 
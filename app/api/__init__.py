@@ -19,6 +19,7 @@ from app.api.imports import api as imports_api
 from app.api.login import api as login_api
 from app.api.microlocations import api as microlocation_api
 from app.api.notifications import api as notifications_api
+from app.api.schedule import api as schedule_api
 from app.api.sessions import api as session_api
 from app.api.speakers import api as speaker_api
 from app.api.sponsors import api as sponsor_api
@@ -47,6 +48,7 @@ api.add_namespace(error_models)
 api.add_namespace(error_models)
 api.add_namespace(attendees_api)
 api.add_namespace(tickets_apt)
+api.add_namespace(schedule_api)
 
 
 @api.documentation
@@ -8,6 +8,7 @@ from app.api.speakers import SPEAKER
 from app.api.sponsors import SPONSOR
 from app.api.tracks import TRACK
 from app.helpers.data import save_to_db, record_activity
+from app.helpers.update_version import get_all_columns
 from app.models.call_for_papers import CallForPaper as EventCFS
 from app.models.event import Event as EventModel
 from app.models.event_copyright import EventCopyright
@@ -212,6 +213,9 @@ EVENT_PARAMS = {
     'contains': {
         'description': 'Contains the string in name and description'
     },
+    'search': {
+        'description': 'Full text search in name, location and description. Results are ordered by relevance'
+    },
     'state': {},
     'privacy': {},
     'type': {},
@@ -265,6 +269,7 @@ class EventResource():
     event_parser = reqparse.RequestParser()
     event_parser.add_argument('location', type=unicode, dest='__event_search_location')
     event_parser.add_argument('contains', type=unicode, dest='__event_contains')
+    event_parser.add_argument('search', type=unicode, dest='__event_search')
     event_parser.add_argument('state', type=str)
     event_parser.add_argument('privacy', type=str)
     event_parser.add_argument('type', type=str)
@@ -287,6 +292,8 @@ class SingleEventResource():
 @api.param('event_id')
 @api.response(404, 'Event not found')
 class Event(Resource, SingleEventResource):
+    etag_versions = get_all_columns()
+
     @replace_event_id
     @api.doc('get_event', params=SINGLE_EVENT_PARAMS)
     @api.header(*ETAG_HEADER_DEFN)
@@ -324,6 +331,8 @@ class Event(Resource, SingleEventResource):
 @api.param('event_id')
 @api.response(404, 'Event not found')
 class EventWebapp(Resource, SingleEventResource):
+    etag_versions = get_all_columns()
+
     @api.doc('get_event_for_webapp')
     @api.header(*ETAG_HEADER_DEFN)
     @replace_event_id
@@ -374,6 +383,8 @@ class EventListPaginated(Resource, PaginatedResourceBase, EventResource):
 @api.route('/<string:event_id>/links')
 @api.param('event_id')
 class SocialLinkList(Resource):
+    etag_versions = ('event_ver',)
+
     @api.doc('list_social_links')
     @api.header(*ETAG_HEADER_DEFN)
     @api.marshal_list_with(SOCIAL_LINK)
@@ -399,6 +410,8 @@ class SocialLinkList(Resource):
 
 @api.route('/<string:event_id>/links/<int:link_id>')
 class SocialLink(Resource):
+    etag_versions = ('event_ver',)
+
     @requires_auth
     @replace_event_id
     @can_access
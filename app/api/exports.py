@@ -65,8 +65,8 @@ class ExportDownload(Resource):
         return response
 
 
-def event_export_task_base(event_id, settings):
-    path = export_event_json(event_id, settings)
+def event_export_task_base(event_id, settings, task_handle=None):
+    path = export_event_json(event_id, settings, task_handle)
     if path.startswith('/'):
         path = path[1:]
     return path
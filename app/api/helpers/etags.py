@@ -0,0 +1,61 @@
+"""
+ETag generation for API GET resources.
+
+Resources which depend only on the data of an event declare the `Version`
+columns they depend on. Their ETag is built from those counters, so a
+conditional GET is answered by a single version lookup before any model
+loading or marshalling. Other resources fall back to hashing the response.
+"""
+import json
+from hashlib import md5
+
+from flask import request, current_app as app
+from flask.ext.login import current_user
+
+from app.helpers.helpers import represents_int
+from app.models import db
+from app.models.event import Event
+from app.models.version import Version
+
+
+def content_etag(data):
+    """
+    Fallback ETag. md5 of the json dump of the response data
+    """
+    return md5(json.dumps(data)).hexdigest()
+
+
+def get_event_versions(event_id, columns):
+    """
+    Returns the values of `columns` in the latest version row of an event.
+    `event_id` can be the event id or its identifier.
+    None if event doesn't exist or is trashed.
+    """
+    query = db.session.query(*[getattr(Version, column) for column in columns]) \
+        .join(Event, Event.id == Version.event_id) \
+        .filter(Event.deleted_at.is_(None))
+    if represents_int(event_id):
+        query = query.filter(Event.id == int(event_id))
+    else:
+        query = query.filter(Event.identifier == event_id)
+    return query.order_by(Version.id.desc()).first()
+
+
+def version_etag(event_id, columns):
+    """
+    ETag for a resource of an event depending on version `columns`.
+    The request path, query string and credentials are included as the same
+    versions can be marshalled differently for them.
+    None if event versions are not available.
+    """
+    versions = get_event_versions(event_id, columns)
+    if versions is None:
+        return None
+    key = '|'.join([
+        app.config.get('VERSION', ''),
+        request.full_path,
+        request.headers.get('Authorization', ''),
+        unicode(current_user.get_id()),
+        ','.join(str(version or 0) for version in versions)
+    ])
+    return md5(key.encode('utf-8')).hexdigest()
@@ -1,21 +1,27 @@
 import json
 import os
 import shutil
+import tempfile
+import zipfile
 from collections import OrderedDict
 from datetime import datetime
+from multiprocessing.pool import ThreadPool
 
 import requests
 from flask import current_app as app
 from flask import request, g, url_for
 from flask_restplus import marshal
+from requests.adapters import HTTPAdapter
 
 from app.helpers.data import save_to_db
 from app.helpers.data_getter import DataGetter
-from app.helpers.helpers import send_email_after_export, send_notif_after_export
+from app.helpers.helpers import send_email_after_export, send_notif_after_export, update_state
 from app.models.event import Event as EventModel
 from app.models.export_jobs import ExportJob
 from import_helpers import is_downloadable, get_filename_from_cd
+from .helpers import get_object_or_404, get_object_query
 from .non_apis import CustomFormDAO, CUSTOM_FORM
+from .pagination import get_keyset_page
 from ..events import DAO as EventDAO, EVENT as EVENT_MODEL
 from ..microlocations import DAO as MicrolocationDAO, MICROLOCATION
 from ..sessions import DAO as SessionDAO, SESSION, \
@@ -89,6 +95,13 @@ DOWNLOAD_FIEDLS = {
 # strings to remove in a filename
 FILENAME_EXCLUDE = '<>:"/\|?*;'
 
+# records marshalled and written at a time
+EXPORT_CHUNK = 50
+# concurrent media downloads, also the size of the connection pool
+MEDIA_WORKERS = 8
+MEDIA_TIMEOUT = 60
+MEDIA_CHUNK_SIZE = 64 * 1024
+
 
 # FUNCTIONS
 
@@ -123,46 +136,95 @@ def _order_json(data, srv):
     return new_data
 
 
-def _download_media(data, srv, dir_path, settings):
+def _get_media_path(data, srv, field):
+    """
+    Returns the path of a media field of a record inside the export, without
+    the extension given by the server
+    """
+    path = DOWNLOAD_FIEDLS[srv][field][1]
+    if srv in ('speakers', 'sponsors'):
+        path %= make_filename(data['name']), data['id']
+    elif srv != 'event':
+        path = path % (data['id'])
+    if data[field].find('.') > -1:  # add extension
+        ext = data[field].rsplit('.', 1)[1]
+        if ext.find('/') == -1:
+            path += '.' + ext
+    return path
+
+
+def _fetch_media(http, url, tmp_dir):
+    """
+    Downloads a media url into a temporary file. Returns the file path and
+    the extension from content-disposition, None if it couldn't be fetched.
+    Runs in the media thread pool.
+    """
+    try:
+        if not is_downloadable(url, session=http, timeout=MEDIA_TIMEOUT):
+            return None
+        r = http.get(url, allow_redirects=True, stream=True, timeout=MEDIA_TIMEOUT)
+        r.raise_for_status()
+        ext = get_filename_from_cd(r.headers.get('content-disposition'))[1]
+        fd, file_path = tempfile.mkstemp(dir=tmp_dir)
+        with os.fdopen(fd, 'wb') as fp:
+            for chunk in r.iter_content(MEDIA_CHUNK_SIZE):
+                fp.write(chunk)
+        return file_path, ext
+    except Exception:
+        return None
+
+
+def _download_media(records, srv, settings, exporter):
     """
-    Downloads the media and saves it
+    Downloads the media of a chunk of records concurrently, adds them to the
+    zip and points the records to them
     """
     if srv not in DOWNLOAD_FIEDLS:
         return
-    for i in DOWNLOAD_FIEDLS[srv]:
-        if not data[i]:
-            continue
-        if not settings[DOWNLOAD_FIEDLS[srv][i][0]]:
-            continue
-        path = DOWNLOAD_FIEDLS[srv][i][1]
-        if srv == 'speakers':
-            path %= make_filename(data['name']), data['id']
-        elif srv == 'sponsors':
-            path %= make_filename(data['name']), data['id']
-        elif srv != 'event':
-            path = path % (data['id'])
-        if data[i].find('.') > -1:  # add extension
-            ext = data[i].rsplit('.', 1)[1]
-            if ext.find('/') == -1:
-                path += '.' + ext
-        full_path = dir_path + path
-        # make dir
-        cdir = full_path.rsplit('/', 1)[0]
-        if not os.path.isdir(cdir):
-            os.makedirs(cdir)
-        # download and set
-        url = data[i]
-        if not is_downloadable(url):
+    jobs = []
+    for data in records:
+        for i in DOWNLOAD_FIEDLS[srv]:
+            if not data[i]:
+                continue
+            if not settings[DOWNLOAD_FIEDLS[srv][i][0]]:
+                continue
+            job = exporter.pool.apply_async(_fetch_media, (exporter.http, data[i], exporter.tmp_dir))
+            jobs.append((data, i, _get_media_path(data, srv, i), job))
+    for data, i, path, job in jobs:
+        fetched = job.get()
+        if not fetched:
             continue
-        try:
-            r = requests.get(url, allow_redirects=True)
-            ext = get_filename_from_cd(r.headers.get('content-disposition'))[1]
-            full_path += ext
-            path += ext
-            open(full_path, 'wb').write(r.content)
-            data[i] = path
-        except Exception:
-            pass
+        file_path, ext = fetched
+        path += ext
+        exporter.zip.write(file_path, path.lstrip('/'))
+        os.remove(file_path)
+        data[i] = path
+
+
+def _dump_json(data, indent=0):
+    data_str = json.dumps(data, indent=4, ensure_ascii=False)
+    if indent:
+        data_str = '\n'.join(' ' * indent + line for line in data_str.split('\n'))
+    if isinstance(data_str, unicode):
+        data_str = data_str.encode('utf-8')
+    return data_str
+
+
+def _iter_records(dao, event_id):
+    """
+    Yields the records of a service of an event in chunks of EXPORT_CHUNK,
+    so that only one chunk is loaded at a time
+    """
+    # Check if an event with `event_id` exists
+    get_object_or_404(EventModel, event_id)
+    query = get_object_query(dao.model, event_id=event_id)
+    after = 0
+    has_more = True
+    while has_more:
+        results, has_more = get_keyset_page(query, dao.model, after, EXPORT_CHUNK)
+        if results:
+            after = results[-1].id
+            yield results
 
 
 def _generate_meta():
@@ -173,48 +235,93 @@ def _generate_meta():
     return d
 
 
-def export_event_json(event_id, settings):
+class EventExporter(object):
+    """
+    Writes the export of an event straight into a zip file.
+
+    Records are marshalled and written to the zip chunk by chunk and the
+    media of each chunk are downloaded by a bounded thread pool sharing one
+    connection pool, so memory and time depend on MEDIA_WORKERS and
+    EXPORT_CHUNK rather than on the size of the event.
+    """
+
+    def __init__(self, event_id, settings, zip_path, task_handle=None):
+        self.event_id = event_id
+        self.settings = settings
+        self.zip_path = zip_path
+        self.task_handle = task_handle
+        self.zip = None
+        self.pool = None
+        self.http = None
+        self.tmp_dir = None
+
+    def run(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.pool = ThreadPool(MEDIA_WORKERS)
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=MEDIA_WORKERS, pool_maxsize=MEDIA_WORKERS)
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
+        self.zip = zipfile.ZipFile(self.zip_path, 'w', zipfile.ZIP_DEFLATED)
+        try:
+            for count, e in enumerate(EXPORTS):
+                if self.task_handle:
+                    update_state(self.task_handle, 'Exporting %s (%d/%d)' % (e[0], count + 1, len(EXPORTS)))
+                if e[0] == 'event':
+                    self._export_event(e)
+                else:
+                    self._export_service(e)
+            # add meta
+            self.zip.writestr('meta', json.dumps(
+                _generate_meta(), sort_keys=True,
+                indent=4, ensure_ascii=False
+            ).encode('utf-8'))
+        finally:
+            self.zip.close()
+            self.pool.terminate()
+            self.http.close()
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _export_event(self, e):
+        data = _order_json(marshal(e[1].get(self.event_id), e[2]), e)
+        _download_media([data], e[0], self.settings, self)
+        self.zip.writestr(e[0], _dump_json(data))
+
+    def _export_service(self, e):
+        """
+        Python 2 zipfile can't write an entry incrementally, so the json
+        list is streamed into a temporary file which is then added to the zip
+        """
+        fd, file_path = tempfile.mkstemp(dir=self.tmp_dir)
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write('[')
+            written = 0
+            for records in _iter_records(e[1], self.event_id):
+                records = [_order_json(data, e) for data in marshal(records, e[2])]
+                _download_media(records, e[0], self.settings, self)
+                for data in records:
+                    fp.write(',\n' if written else '\n')
+                    fp.write(_dump_json(data, indent=4))
+                    written += 1
+            fp.write('\n]' if written else ']')
+        self.zip.write(file_path, e[0])
+        os.remove(file_path)
+
+
+def export_event_json(event_id, settings, task_handle=None):
     """
     Exports the event as a zip on the server and return its path
     """
-    # make directory
     exports_dir = app.config['BASE_DIR'] + '/static/uploads/exports/'
     if not os.path.isdir(exports_dir):
         os.mkdir(exports_dir)
-    dir_path = exports_dir + 'event%d' % event_id
-    if os.path.isdir(dir_path):
-        shutil.rmtree(dir_path, ignore_errors=True)
-    os.mkdir(dir_path)
-    # save to directory
-    for e in EXPORTS:
-        if e[0] == 'event':
-            data = _order_json(marshal(e[1].get(event_id), e[2]), e)
-            _download_media(data, 'event', dir_path, settings)
-        else:
-            data = marshal(e[1].list(event_id), e[2])
-            for count in range(len(data)):
-                data[count] = _order_json(data[count], e)
-                _download_media(data[count], e[0], dir_path, settings)
-        data_str = json.dumps(data, indent=4, ensure_ascii=False).encode('utf-8')
-        fp = open(dir_path + '/' + e[0], 'w')
-        fp.write(data_str)
-        fp.close()
-    # add meta
-    data_str = json.dumps(
-        _generate_meta(), sort_keys=True,
-        indent=4, ensure_ascii=False
-    ).encode('utf-8')
-    fp = open(dir_path + '/meta', 'w')
-    fp.write(data_str)
-    fp.close()
-    # make zip
-    shutil.make_archive(dir_path, 'zip', dir_path)
-    dir_path = dir_path + ".zip"
+    zip_path = exports_dir + 'event%d.zip' % event_id
+    EventExporter(event_id, settings, zip_path, task_handle).run()
 
     storage_path = UPLOAD_PATHS['exports']['zip'].format(
         event_id = event_id
     )
-    uploaded_file = UploadedFile(dir_path, dir_path.rsplit('/', 1)[1])
+    uploaded_file = UploadedFile(zip_path, zip_path.rsplit('/', 1)[1])
     storage_url = upload(uploaded_file, storage_path)
 
     if get_settings()['storage_place'] != "s3" and get_settings()['storage_place'] != 'gs':
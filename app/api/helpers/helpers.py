@@ -17,6 +17,8 @@ from app.models.event import Event as EventModel
 from app.models.user import User as UserModel
 from custom_fields import CustomField
 from query_filters import extract_special_queries, apply_special_queries
+from pagination import make_count_cache_key, get_query_count, \
+    get_offset_page, get_keyset_page
 from .errors import NotFoundError, InvalidServiceError, ValidationError, \
     NotAuthorizedError, ServerError, PermissionDeniedError
 
@@ -30,12 +32,13 @@ def _make_url_query(args):
     """
     Helper function to return a query url string from a dict
     """
-    return '?' + '&'.join('%s=%s' % (key, args[key]) for key in args)
+    return '?' + '&'.join('%s=%s' % (key, args[key]) for key in args
+                          if args[key] is not None)
 
 
-def get_object_list(klass, **kwargs):
-    """Returns a list of objects of a model class. Uses other passed arguments
-    with `filter_by` to filter objects.
+def get_object_query(klass, **kwargs):
+    """Returns the query for objects of a model class. Uses other passed
+    arguments with `filter_by` to filter objects.
     `klass` can be a model such as a Track, Event, Session, etc.
     """
     queryset = _get_queryset(klass)
@@ -50,9 +53,15 @@ def get_object_list(klass, **kwargs):
         else:
             queryset = queryset.filter(getattr(klass, i) == kwargs[i])
     # special filters
-    obj_list = apply_special_queries(queryset, specials)
-    # return as list
-    return list(obj_list)
+    return apply_special_queries(queryset, specials)
+
+
+def get_object_list(klass, **kwargs):
+    """Returns a list of objects of a model class. Uses other passed arguments
+    with `filter_by` to filter objects.
+    `klass` can be a model such as a Track, Event, Session, etc.
+    """
+    return list(get_object_query(klass, **kwargs))
 
 
 def get_list_or_404(klass, **kwargs):
@@ -96,13 +105,16 @@ def get_object_in_event(klass, id_, event_id):
     return obj
 
 
-def get_paginated_list(klass, url=None, args={}, **kwargs):
+def get_paginated_list(klass, url=None, args={}, count_timeout=None, **kwargs):
     """
     Returns a paginated response object
 
     klass - model class to query from
     url - url of the request
-    args - args passed to the request as query parameters
+    args - args passed to the request as query parameters. If `after`
+        is set, keyset pagination is used instead of `start` offsets
+    count_timeout - seconds to cache the total count for. Not cached
+        if None
     kwargs - filters for query on the `klass` model. if
         kwargs has event_id, check if it exists for 404
     """
@@ -114,9 +126,14 @@ def get_paginated_list(klass, url=None, args={}, **kwargs):
     # get page bounds
     start = args['start']
     limit = args['limit']
+    after = args.get('after')
     # check if page exists
-    results = get_object_list(klass, **kwargs)
-    count = len(results)
+    query = get_object_query(klass, **kwargs)
+    cache_key = make_count_cache_key(klass, kwargs)
+    count = get_query_count(query, cache_key, count_timeout)
+    if count < start and count_timeout:
+        # cached count can be stale, confirm it before raising 404
+        count = get_query_count(query, cache_key, count_timeout, refresh=True)
     if (count < start):
         raise NotFoundError(
             message='Start position \'{}\' out of bound'.format(start))
@@ -125,6 +142,18 @@ def get_paginated_list(klass, url=None, args={}, **kwargs):
     obj['start'] = start
     obj['limit'] = limit
     obj['count'] = count
+    # keyset pagination only moves forward
+    if after is not None:
+        results, has_more = get_keyset_page(query, klass, after, limit)
+        obj['previous'] = ''
+        args_copy = args.copy()
+        if not has_more:
+            obj['next'] = ''
+        else:
+            args_copy['after'] = results[-1].id
+            obj['next'] = url + _make_url_query(args_copy)
+        obj['results'] = results
+        return obj
     # make URLs
     # make previous url
     args_copy = args.copy()
@@ -141,8 +170,8 @@ def get_paginated_list(klass, url=None, args={}, **kwargs):
     else:
         args_copy['start'] = start + limit
         obj['next'] = url + _make_url_query(args_copy)
-    # finally extract result according to bounds
-    obj['results'] = results[(start - 1):(start - 1 + limit)]
+    # finally fetch results according to bounds
+    obj['results'] = get_offset_page(query, klass, start, limit)
 
     return obj
 
@@ -1,23 +1,36 @@
+import hashlib
 import json
 import os
 import re
 import shutil
+import tempfile
+import threading
 import traceback
 import zipfile
+from collections import OrderedDict
+from functools import partial
+from multiprocessing.pool import ThreadPool
 
 import requests
 from flask import current_app as app
 from flask import request, g
+from requests.adapters import HTTPAdapter
+from sqlalchemy import bindparam, func, inspect, select
 from werkzeug import secure_filename
 
 from app.helpers.data import save_to_db
 from app.helpers.helpers import update_state, send_email_after_import
-from app.helpers.storage import UploadedFile, upload, UploadedMemory, \
+from app.helpers.storage import upload, copy, get_stream, UploadedFile, UploadedMemory, \
     UPLOAD_PATHS
 from app.helpers.update_version import VersionUpdater
+from app.models import db
 from app.models.import_jobs import ImportJob
+from app.models.speaker import Speaker
+from app.settings import get_settings, use_settings
 from errors import BaseError, ServerError, NotFoundError
+from app.api.helpers.custom_fields import DateTime
 from app.api.helpers.non_apis import CustomFormDAO
+from app.api.helpers.utils import ServiceDAO
 from app.api.events import DAO as EventDAO, LinkDAO as SocialLinkDAO
 from app.api.microlocations import DAO as MicrolocationDAO
 from app.api.sessions import DAO as SessionDAO, TypeDAO as SessionTypeDAO
@@ -51,9 +64,36 @@ RELATED_FIELDS = {
     ]
 }
 
-UPLOAD_QUEUE = []
+# rows inserted per executemany
+IMPORT_BATCH = 500
+# concurrent media uploads, also the size of the connection pool
+UPLOAD_WORKERS = 8
+UPLOAD_TIMEOUT = 60
+# bytes read at once to hash media
+HASH_CHUNK = 64 * 1024
 
-CUR_ID = None
+
+class ImportState(object):
+    """
+    State of one import task. Kept per task so that imports running
+    concurrently in a worker don't share their queues.
+    """
+
+    def __init__(self, task_handle):
+        self.task_handle = task_handle
+        self.upload_queue = []
+        self.cur_id = None
+
+
+class _UploadSlot(object):
+    """
+    Url of a media content being uploaded by one worker and awaited by
+    the workers having the same content
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.url = None
 
 
 def _allowed_file(filename, ext):
@@ -135,12 +175,10 @@ def _delete_fields(srv, data):
     return data
 
 
-def _upload_media_queue(srv, obj):
+def _upload_media_queue(state, srv, obj):
     """
     Add media uploads to queue
     """
-    global UPLOAD_QUEUE
-
     if srv[0] not in UPLOAD_PATHS:
         return
     for i in UPLOAD_PATHS[srv[0]]:
@@ -150,76 +188,167 @@ def _upload_media_queue(srv, obj):
         # if not path.startswith('/'):  # relative
         #     continue
         # file OK
-        UPLOAD_QUEUE.append({
+        state.upload_queue.append({
             'srv': srv,
             'id': obj.id,
-            'field': i
+            'field': i,
+            'path': path
         })
     return
 
 
-def _upload_media(task_handle, event_id, base_path):
+def _fetch_media(http, source, filename):
     """
-    Actually uploads the resources
+    Returns the media at `source` as an uploaded file, streamed from the
+    disk for local files. None if it can't be fetched. Runs in the upload
+    thread pool.
     """
-    global UPLOAD_QUEUE
-    total = len(UPLOAD_QUEUE)
-    ct = 0
+    kind, path = source
+    try:
+        if kind == 'file':
+            return UploadedFile(path, filename)
+        if is_downloadable(path, session=http, timeout=UPLOAD_TIMEOUT):
+            r = http.get(path, allow_redirects=True, timeout=UPLOAD_TIMEOUT)
+            return UploadedMemory(r.content, filename)
+    except Exception:
+        pass
+    return None
 
-    for i in UPLOAD_QUEUE:
-        # update progress
-        ct += 1
-        update_state(task_handle, 'Uploading media (%d/%d)' % (ct, total))
-        # get upload infos
-        name, dao = i['srv']
-        id_ = i['id']
-        if name == 'event':
-            item = dao.get(event_id)
-        else:
-            item = dao.get(event_id, id_)
-        # get cur file
-        field = i['field']
-        path = getattr(item, field)
+
+def _get_digest(file):
+    stream, _ = get_stream(file)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(HASH_CHUNK), ''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def _upload_source(app_, settings, http, slots, lock, job):
+    """
+    Fetches one media source and stores it at the keys of the records
+    using it. Content already uploaded, from this or another source, is
+    copied in the storage instead of being uploaded again. Runs in the
+    upload thread pool.
+    Returns the keys and their new urls, False if the source couldn't be
+    fetched.
+    """
+    source, keys, filename = job
+    file = _fetch_media(http, source, filename)
+    if file is None:
+        return [(key, False) for key in keys]
+    try:
+        digest = _get_digest(file)
+        with lock:
+            slot = slots.get(digest)
+            owner = slot is None
+            if owner:
+                slot = slots[digest] = _UploadSlot()
+        if not owner:
+            slot.done.wait()
+        with app_.app_context():
+            # settings of the task, so that workers don't query them
+            use_settings(settings)
+            urls = []
+            if owner:
+                try:
+                    slot.url = upload(file, keys[0])
+                except Exception:
+                    print traceback.format_exc()
+                finally:
+                    slot.done.set()
+                urls.append((keys[0], slot.url))
+            for key in keys[len(urls):]:
+                urls.append((key, _copy_upload(slot.url, key)))
+        return urls
+    finally:
+        if isinstance(file, UploadedFile):
+            file.file.close()
+
+
+def _copy_upload(url, key):
+    if not url:
+        return url
+    try:
+        return copy(url, key)
+    except Exception:
+        print traceback.format_exc()
+        return None
+
+
+def _upload_media(state, event_id, base_path):
+    """
+    Actually uploads the resources.
+    Each distinct source url or file is fetched once and each distinct
+    content uploaded once, by a pool of UPLOAD_WORKERS. Every record gets
+    its own copy, so that replacing its media later doesn't delete the
+    media of another one. The new urls are then written with one batched
+    update per model field.
+    """
+    queue = state.upload_queue
+    sources = OrderedDict()
+    for i in queue:
+        name, field, path = i['srv'][0], i['field'], i['path']
         if path.startswith('/'):
             # relative files
-            path = base_path + path
-            if os.path.isfile(path):
-                filename = path.rsplit('/', 1)[1]
-                file = UploadedFile(path, filename)
-            else:
-                file = ''  # remove current file setting
+            i['source'] = ('file', base_path + path)
+            filename = path.rsplit('/', 1)[1]
         else:
             # absolute links
-            try:
-                filename = UPLOAD_PATHS[name][field].rsplit('/', 1)[1]
-                if is_downloadable(path):
-                    r = requests.get(path, allow_redirects=True)
-                    file = UploadedMemory(r.content, filename)
-                else:
-                    file = None
-            except:
-                file = None
-        # don't update current file setting
-        if file is None:
+            i['source'] = ('url', path)
+            filename = UPLOAD_PATHS[name][field].rsplit('/', 1)[1]
+        key = UPLOAD_PATHS[name][field]
+        if name == 'event':
+            key = key.format(event_id=event_id)
+        else:
+            key = key.format(event_id=event_id, id=i['id'])
+        i['key'] = key
+        if i['source'] in sources:
+            if sources[i['source']]:
+                sources[i['source']][1].append(key)
             continue
-        # upload
-        try:
-            if file == '':
-                raise Exception()
-            key = UPLOAD_PATHS[name][field]
-            if name == 'event':
-                key = key.format(event_id=event_id)
-            else:
-                key = key.format(event_id=event_id, id=id_)
-            print key
-            new_url = upload(file, key)
-        except Exception:
-            print traceback.format_exc()
-            new_url = None
-        setattr(item, field, new_url)
-        save_to_db(item, msg='Url updated')
+        if i['source'][0] == 'file' and not os.path.isfile(i['source'][1]):
+            sources[i['source']] = None  # remove current file setting
+            continue
+        sources[i['source']] = (i['source'], [key], filename)
+
+    jobs = [job for job in sources.values() if job]
+    http = requests.Session()
+    adapter = HTTPAdapter(pool_connections=UPLOAD_WORKERS, pool_maxsize=UPLOAD_WORKERS)
+    http.mount('http://', adapter)
+    http.mount('https://', adapter)
+    pool = ThreadPool(UPLOAD_WORKERS)
+    worker = partial(_upload_source, app._get_current_object(), get_settings(), http, {}, threading.Lock())
+    urls = {}
+    try:
+        for ct, key_urls in enumerate(pool.imap_unordered(worker, jobs), 1):
+            update_state(state.task_handle, 'Uploading media (%d/%d)' % (ct, len(jobs)))
+            urls.update(key_urls)
+    finally:
+        pool.terminate()
+        http.close()
+
+    # write back, False means keep the current url
+    updates = {}
+    for i in queue:
+        if sources[i['source']] is None:
+            url = None
+        else:
+            url = urls.get(i['key'], False)
+        if url is False:
+            continue
+        name, dao = i['srv']
+        model = EventDAO.model if name == 'event' else dao.model
+        updates.setdefault((model, i['field']), []).append({'_id': i['id'], '_url': url})
+    for (model, field), rows in updates.items():
+        table = model.__table__
+        db.session.execute(
+            table.update().where(table.c.id == bindparam('_id')).values({field: bindparam('_url')}),
+            rows
+        )
+    db.session.commit()
     # clear queue
-    UPLOAD_QUEUE = []
+    state.upload_queue = []
     return
 
 
@@ -259,54 +388,176 @@ def _fix_related_fields(srv, data, service_ids):
     return data
 
 
-def create_service_from_json(task_handle, data, srv, event_id, service_ids=None):
+def _allocate_ids(model, count):
+    """
+    Reserves `count` primary keys of `model` so that rows can be inserted
+    in bulk with known ids. Uses the id sequence on PostgreSQL, elsewhere
+    the ids following the largest one, which relies on the import
+    transaction locking the table.
+    """
+    if not count:
+        return []
+    if db.engine.dialect.name == 'postgresql':
+        sequence = db.session.execute(
+            select([func.pg_get_serial_sequence(model.__table__.name, 'id')])).scalar()
+        rows = db.session.execute(
+            select([func.nextval(sequence)]).select_from(func.generate_series(1, count)))
+        return sorted(row[0] for row in rows)
+    start = (db.session.query(func.max(model.id)).scalar() or 0) + 1
+    return range(start, start + count)
+
+
+def _parse_datetimes(data, api_model):
+    """
+    Converts the datetime strings of a validated payload
+    """
+    for key, field in api_model.items():
+        if isinstance(field, DateTime) and isinstance(data.get(key), basestring):
+            data[key] = field.from_str(data[key])
+    return data
+
+
+def _get_mapping(obj):
+    """
+    Column values of a model instance, as used by bulk_insert_mappings
+    """
+    return dict(
+        (attr.key, obj.__dict__[attr.key]) for attr in inspect(obj).mapper.column_attrs
+        if attr.key in obj.__dict__
+    )
+
+
+def _bulk_insert(model, rows):
+    """
+    Inserts a batch of (object, related ids, speaker ids) rows. Versioned
+    models go through the unit of work so that SQLAlchemy-Continuum writes
+    their version and transaction rows, the rest with executemany.
+    """
+    if not rows:
+        return
+    if hasattr(model, '__versioned__'):
+        speaker_ids = set(_ for row in rows for _ in row[2])
+        speakers = dict(
+            (speaker.id, speaker) for speaker in
+            Speaker.query.filter(Speaker.id.in_(speaker_ids))) if speaker_ids else {}
+        for obj, related, ids in rows:
+            for key, value in related.items():
+                setattr(obj, key, value)
+            obj.speakers = [speakers[_] for _ in ids]
+        db.session.add_all([row[0] for row in rows])
+        db.session.flush()
+        return
+    mappings = []
+    for obj, related, ids in rows:
+        mapping = _get_mapping(obj)
+        mapping.update(related)
+        mappings.append(mapping)
+    db.session.bulk_insert_mappings(model, mappings)
+
+
+def _update_custom_forms(state, data, dao, event_id):
+    """
+    Writes the imported forms to the custom form created along with the
+    event, the one which is read back, instead of adding a second one.
+    """
+    ids = {}
+    for obj in sorted(data, key=lambda k: k['id']):
+        old_id, obj = _trim_id(obj)
+        state.cur_id = old_id
+        obj = ServiceDAO.validate(dao, obj)
+        form = dao.model.query.filter_by(event_id=event_id).first()
+        if form is None:
+            form = dao.model(event_id=event_id)
+            db.session.add(form)
+        for key, value in obj.items():
+            setattr(form, key, value)
+        db.session.flush()
+        ids[old_id] = form.id
+    return ids
+
+
+def create_service_from_json(state, data, srv, event_id, service_ids=None):
     """
     Given :data as json, create the service on server
     :service_ids are the mapping of ids of already created services.
         Used for mapping old ids to new
+
+    Rows are validated in memory and inserted IMPORT_BATCH at a time, with
+    executemany unless the model is versioned. Nothing is committed, so that the caller can commit or
+    rollback the whole import.
     """
     if service_ids is None:
         service_ids = {}
-    global CUR_ID
+    if srv[0] == 'forms':
+        return _update_custom_forms(state, data, srv[1], event_id)
     # sort by id
     data.sort(key=lambda k: k['id'])
+    dao = srv[1]
+    model = dao.model
+    api_model = dao.get_post_model(event_id)
+    related_ids = [field[1] for field in RELATED_FIELDS.get(srv[0], [])]
+    new_ids = _allocate_ids(model, len(data))
     ids = {}
-    ct = 0
+    rows = []
     total = len(data)
     # start creating
-    for obj in data:
-        # update status
-        ct += 1
-        update_state(task_handle, 'Importing %s (%d/%d)' % (srv[0], ct, total))
+    for ct, (obj, new_id) in enumerate(zip(data, new_ids), 1):
         # trim id field
         old_id, obj = _trim_id(obj)
-        CUR_ID = old_id
+        state.cur_id = old_id
         # delete not needed fields
         obj = _delete_fields(srv, obj)
         # related
         obj = _fix_related_fields(srv, obj, service_ids)
+        # validate, as the DAO would
+        obj = _parse_datetimes(ServiceDAO.validate(dao, obj, api_model), api_model)
+        related = dict((key, obj.pop(key)) for key in related_ids if key in obj)
+        speaker_ids = related.pop('speaker_ids', None) or []
         # create object
-        new_obj = srv[1].create(event_id, obj, 'dont')[0]
-        ids[old_id] = new_obj.id
+        obj['event_id'] = event_id
+        new_obj = model(**obj)
+        new_obj.id = new_id
+        rows.append((new_obj, related, speaker_ids))
+        ids[old_id] = new_id
         # add uploads to queue
-        _upload_media_queue(srv, new_obj)
+        _upload_media_queue(state, srv, new_obj)
+        if len(rows) == IMPORT_BATCH:
+            _bulk_insert(model, rows)
+            rows = []
+            update_state(state.task_handle, 'Importing %s (%d/%d)' % (srv[0], ct, total))
+    _bulk_insert(model, rows)
+    update_state(state.task_handle, 'Importing %s (%d/%d)' % (srv[0], total, total))
 
     return ids
 
 
+def _abort_import(new_event):
+    """
+    Rolls back the services imported so far and removes the event
+    """
+    db.session.rollback()
+    EventDAO.delete(new_event.id)
+
+
 def import_event_json(task_handle, zip_path):
     """
     Imports and creates event from json zip
     """
-    global CUR_ID, UPLOAD_QUEUE
-    UPLOAD_QUEUE = []
+    state = ImportState(task_handle)
     update_state(task_handle, 'Started')
 
     with app.app_context():
-        path = app.config['BASE_DIR'] + '/static/uploads/import_event'
-    # delete existing files
-    if os.path.isdir(path):
+        uploads_dir = app.config['BASE_DIR'] + '/static/uploads/'
+    # a directory per task, as imports can run concurrently
+    path = tempfile.mkdtemp(prefix='import_event', dir=uploads_dir)
+    try:
+        return _import_event_files(state, path, zip_path)
+    finally:
         shutil.rmtree(path, ignore_errors=True)
+
+
+def _import_event_files(state, path, zip_path):
+    task_handle = state.task_handle
     # extract files from zip
     with zipfile.ZipFile(zip_path, "r") as z:
         z.extractall(path)
@@ -323,38 +574,37 @@ def import_event_json(task_handle, zip_path):
             path + '/social_links',
             json.dumps(data.get('social_links', []))
         )  # save social_links
-        _upload_media_queue(srv, new_event)
+        _upload_media_queue(state, srv, new_event)
     except BaseError as e:
         raise make_error('event', er=e)
     except Exception as e:
         raise make_error('event', er=e)
-    # create other services
+    # create other services, in a single transaction
     try:
         service_ids = {}
         for item in IMPORT_SERIES:
-            item[1].is_importing = True
             data = open(path + '/%s' % item[0], 'r').read()
             dic = json.loads(data)
             changed_ids = create_service_from_json(
-                task_handle, dic, item, new_event.id, service_ids)
+                state, dic, item, new_event.id, service_ids)
             service_ids[item[0]] = changed_ids.copy()
-            CUR_ID = None
-            item[1].is_importing = False
+            state.cur_id = None
+        db.session.commit()
     except BaseError as e:
-        EventDAO.delete(new_event.id)
-        raise make_error(item[0], er=e, id_=CUR_ID)
+        _abort_import(new_event)
+        raise make_error(item[0], er=e, id_=state.cur_id)
     except IOError:
-        EventDAO.delete(new_event.id)
+        _abort_import(new_event)
         raise NotFoundError('File %s missing in event zip' % item[0])
     except ValueError:
-        EventDAO.delete(new_event.id)
+        _abort_import(new_event)
         raise make_error(item[0], er=ServerError('Invalid json'))
     except Exception:
         print traceback.format_exc()
-        EventDAO.delete(new_event.id)
-        raise make_error(item[0], id_=CUR_ID)
+        _abort_import(new_event)
+        raise make_error(item[0], id_=state.cur_id)
     # run uploads
-    _upload_media(task_handle, new_event.id, path)
+    _upload_media(state, new_event.id, path)
     # set version
     VersionUpdater(False, new_event.id, '').set(version_data)
     # return
@@ -365,11 +615,12 @@ def import_event_json(task_handle, zip_path):
 # HELPERS
 ##########
 
-def is_downloadable(url):
+def is_downloadable(url, session=None, timeout=None):
     """
-    Does the url contain a downloadable resource
+    Does the url contain a downloadable resource.
+    `session` is a requests.Session to reuse its connections.
     """
-    h = requests.head(url, allow_redirects=True)
+    h = (session or requests).head(url, allow_redirects=True, timeout=timeout)
     header = h.headers
     content_type = header.get('content-type')
     # content_length = header.get('content-length', 1e10)
@@ -0,0 +1,58 @@
+"""
+Database level pagination for list queries.
+
+Two modes are supported -
+- offset mode: `start` and `limit` are pushed into SQL as OFFSET/LIMIT
+- keyset mode: opt-in by passing `after` (id of the last item seen). Pages
+  are fetched with `id > after ORDER BY id LIMIT n` which stays stable
+  when rows are inserted or deleted while a client is paging.
+"""
+from app.helpers.cache import cache
+
+PAGE_COUNT_CACHE_PREFIX = 'page_count'
+
+
+def make_count_cache_key(klass, filters):
+    """
+    Returns a cache key for the count of `klass` rows matching `filters`
+    """
+    filters_str = '&'.join('%s=%s' % (key, filters[key]) for key in sorted(filters))
+    return '%s/%s/%s' % (PAGE_COUNT_CACHE_PREFIX, klass.__name__, filters_str)
+
+
+def get_query_count(query, cache_key=None, timeout=None, refresh=False):
+    """
+    Returns the number of rows matched by `query` using a separate
+    COUNT query. Ordering is dropped as it doesn't affect the count.
+    If `cache_key` and `timeout` are set, the count is cached for
+    `timeout` seconds. `refresh` skips the cached value.
+    """
+    use_cache = cache_key is not None and timeout
+    if use_cache and not refresh:
+        count = cache.get(cache_key)
+        if count is not None:
+            return count
+    count = query.order_by(None).count()
+    if use_cache:
+        cache.set(cache_key, count, timeout=timeout)
+    return count
+
+
+def get_offset_page(query, klass, start, limit):
+    """
+    Returns `limit` rows of `query` starting from position `start` (1-indexed).
+    Primary key is added as the last sort key so that pages don't overlap.
+    """
+    return query.order_by(klass.id).offset(max(start - 1, 0)).limit(limit).all()
+
+
+def get_keyset_page(query, klass, after, limit):
+    """
+    Returns a tuple of the `limit` rows of `query` having id greater than
+    `after` and a boolean telling if more rows exist after them.
+    Any ordering already applied on `query` is replaced by the primary key.
+    """
+    results = query.filter(klass.id > after) \
+        .order_by(None).order_by(klass.id) \
+        .limit(limit + 1).all()
+    return results[:limit], len(results) > limit
@@ -1,7 +1,8 @@
-import requests
-from sqlalchemy import or_, func, and_
+from sqlalchemy import or_, func
 
+from app.helpers.geocoding import geocode, get_query_close_area, order_by_distance
 from app.helpers.helpers import get_date_range
+from app.helpers.search import search_events
 from app.models.event import Event
 from app.models.session import Session
 from custom_fields import DateTime
@@ -44,6 +45,20 @@ def event_contains(value, query):
     return q
 
 
+def event_search(value, query):
+    """
+   Full text search of events, most relevant first
+   """
+    return search_events(value, query)
+
+
+def event_search_prefix(value, query):
+    """
+   Full text search matching the last word as a prefix, for autocomplete
+   """
+    return search_events(value, query, prefix=True)
+
+
 def event_location(value, query):
     """
    Return all queries which contain either A or B or C
@@ -61,35 +76,23 @@ def event_search_location(value, query):
     """
    Return all queries which contain either A or B or C
    when location is A,B,C
-   TODO: Proper ordering of results a/c proximity
+   Events close to the first location found are ordered first
    """
     locations = list(value.split(','))
     queries = []
+    closest_to = None
 
     for i in locations:
-        response = requests.get(
-            "https://maps.googleapis.com/maps/api/geocode/json?address=" + unicode(i)).json()
-        if response["results"]:
-            lng = float(response["results"][0]["geometry"]["location"]["lng"])
-            lat = float(response["results"][0]["geometry"]["location"]["lat"])
-            queries.append(get_query_close_area(lng, lat))
+        coordinates = geocode(i)
+        if coordinates:
+            queries.append(get_query_close_area(coordinates['lng'], coordinates['lat']))
+            closest_to = closest_to or coordinates
         queries.append(func.lower(Event.searchable_location_name).contains(i.lower()))
         queries.append(func.lower(Event.location_name).contains(i.lower()))
-    return query.filter(or_(*queries))
-
-
-def get_query_close_area(lng, lat):
-    up_lat = lat + 0.249788
-    bottom_lat = lat - 0.249788
-    left_lng = lng - 0.249788
-    right_lng = lng + 0.249788
-    if Event.latitude and Event.longitude:
-        return and_(Event.latitude <= up_lat,
-                    Event.latitude >= bottom_lat,
-                    Event.longitude >= left_lng,
-                    Event.longitude <= right_lng)
-    else:
-        return None
+    query = query.filter(or_(*queries))
+    if closest_to:
+        query = order_by_distance(query, closest_to['lng'], closest_to['lat'])
+    return query
 
 
 def event_start_time_gt(value, query):
@@ -148,6 +151,8 @@ def sessions_order_by(value, query):
 
 FILTERS_LIST = {
     '__event_contains': event_contains,
+    '__event_search': event_search,
+    '__event_search_prefix': event_search_prefix,
     '__event_location': event_location,
     '__event_search_location': event_search_location,
     '__event_start_time_gt': event_start_time_gt,
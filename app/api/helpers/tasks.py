@@ -45,7 +45,7 @@ def import_event_task(self, file, source_type, creator_id):
 def export_event_task(self, event_id, settings):
     try:
         logging.info('Exporting started')
-        path = event_export_task_base(event_id, settings)
+        path = event_export_task_base(event_id, settings, self)
         # task_id = self.request.id.__str__()  # str(async result)
         if get_settings()['storage_place'] == 'local' or get_settings()['storage_place'] == None:
             download_url = url_for(
@@ -1,6 +1,3 @@
-import json
-from hashlib import md5
-
 from flask import request
 from flask.ext.restplus import Resource as RestplusResource
 from flask_restplus import Model, fields, reqparse
@@ -13,6 +10,7 @@ from app.api.helpers.error_docs import (
     validation_error_model,
     invalidservice_error_model,
 )
+from .etags import content_etag, version_etag
 from .helpers import get_object_list, get_object_or_404, get_object_in_event, \
     create_model, validate_payload, delete_model, update_model, \
     handle_extra_payload, get_paginated_list, fix_attribute_names
@@ -50,6 +48,10 @@ PAGE_PARAMS = {
         'type': int,
         'default': DEFAULT_PAGE_LIMIT
     },
+    'after': {
+        'description': 'Id of the last item received. Switches to keyset pagination',
+        'type': int
+    },
 }
 
 # ETag Header (required=False by default)
@@ -69,32 +71,46 @@ PAGINATED_MODEL = Model('PaginatedModel', {
 
 # Custom Resource Class
 class Resource(RestplusResource):
+    """
+    Resource with ETag support for GET requests.
+
+    etag_versions - `Version` columns of the event the GET response depends
+        on. If set, the ETag is computed from them before the view is run.
+    etag_fallback - function computing ETag from the response data for
+        resources without version columns.
+    """
+    etag_versions = None
+    etag_fallback = staticmethod(content_etag)
+
     def dispatch_request(self, *args, **kwargs):
+        new_etag = None
+        if request.method == 'GET':
+            old_etag = request.headers.get('If-None-Match', '')
+            if self.etag_versions and 'event_id' in kwargs:
+                new_etag = version_etag(kwargs['event_id'], self.etag_versions)
+            if new_etag is not None and new_etag == old_etag:
+                # Resource has not changed, no need to load it
+                return '', 304, {'ETag': new_etag}
+
         resp = super(Resource, self).dispatch_request(*args, **kwargs)
 
         # ETag checking.
         if request.method == 'GET':
-            old_etag = request.headers.get('If-None-Match', '')
-            # Generate hash
-            data = json.dumps(resp)
-            new_etag = md5(data).hexdigest()
-
-            if new_etag == old_etag:
-                # Resource has not changed
-                return '', 304
-            else:
-                # Resource has changed, send new ETag value
-                return resp, 200, {'ETag': new_etag}
+            if new_etag is None:
+                # Generate hash
+                new_etag = self.etag_fallback(resp)
+                if new_etag == old_etag:
+                    # Resource has not changed
+                    return '', 304
+            # Resource has changed, send new ETag value
+            return resp, 200, {'ETag': new_etag}
         elif request.method == 'POST':
             # Grab just the response data
             # Exclude status code and headers
             resp_data = resp[0]
 
-            data = json.dumps(resp_data)
-            etag = md5(data).hexdigest()
-
             # Add ETag to response headers
-            resp[2].update({'ETag': etag})
+            resp[2].update({'ETag': content_etag(resp_data)})
 
         return resp
 
@@ -108,6 +124,7 @@ class PaginatedResourceBase():
     parser = reqparse.RequestParser()
     parser.add_argument('start', type=int, default=DEFAULT_PAGE_START)
     parser.add_argument('limit', type=int, default=DEFAULT_PAGE_LIMIT)
+    parser.add_argument('after', type=int)
 
 
 # DAO for Models
@@ -129,8 +146,9 @@ class BaseDAO:
     def list(self, **kwargs):
         return get_object_list(self.model, **kwargs)
 
-    def paginated_list(self, url=None, args={}, **kwargs):
-        return get_paginated_list(self.model, url=url, args=args, **kwargs)
+    def paginated_list(self, url=None, args={}, count_timeout=None, **kwargs):
+        return get_paginated_list(self.model, url=url, args=args,
+                                  count_timeout=count_timeout, **kwargs)
 
     def create(self, data, validate=True):
         if validate:
@@ -200,8 +218,9 @@ class ServiceDAO(BaseDAO):
         get_object_or_404(EventModel, event_id)
         return get_object_list(self.model, event_id=event_id, **kwargs)
 
-    def paginated_list(self, url=None, args={}, **kwargs):
-        return get_paginated_list(self.model, url=url, args=args, **kwargs)
+    def paginated_list(self, url=None, args={}, count_timeout=None, **kwargs):
+        return get_paginated_list(self.model, url=url, args=args,
+                                  count_timeout=count_timeout, **kwargs)
 
     def create(self, event_id, data, url, validate=True):
         if validate:
@@ -225,6 +244,12 @@ class ServiceDAO(BaseDAO):
         self.update_version(event_id)
         return item
 
+    def get_post_model(self, event_id):
+        """
+        API model the payloads of an event are validated against
+        """
+        return self.post_api_model
+
 
 # store task results in case of testing
 # state and info
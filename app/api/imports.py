@@ -6,6 +6,7 @@ from flask.ext.restplus import abort
 from app.helpers.data import record_activity
 from app.helpers.importers.ical import ICalImporter
 from app.helpers.importers.pentabarfxml import PentabarfImporter
+from app.helpers.importers.xcal import XCalImporter
 from events import EVENT
 from helpers.helpers import requires_auth
 from helpers.import_helpers import get_file_from_request, import_event_json, create_import_job, \
@@ -26,6 +27,8 @@ class EventImportJson(Resource):
             file_path = get_file_from_request(['xml'])
         elif source_type == 'ical':
             file_path = get_file_from_request(['ical', 'ics'])
+        elif source_type == 'xcal':
+            file_path = get_file_from_request(['xcs', 'xml'])
         else:
             file_path = None
             abort(404)
@@ -56,6 +59,8 @@ def import_event_task_base(task_handle, file_path, source_type='json', creator_i
         new_event = PentabarfImporter.import_data(file_path=file_path, task_handle=task_handle, creator_id=creator_id)
     elif source_type == 'ical':
         new_event = ICalImporter.import_data(file_path=file_path, task_handle=task_handle, creator_id=creator_id)
+    elif source_type == 'xcal':
+        new_event = XCalImporter.import_data(file_path=file_path, task_handle=task_handle, creator_id=creator_id)
     if new_event:
         record_activity('import_event', event_id=new_event.id)
         return marshal(new_event, EVENT)
@@ -42,6 +42,8 @@ DAO = MicrolocationDAO(MicrolocationModel, MICROLOCATION_POST)
 @api.route('/events/<string:event_id>/microlocations/<int:microlocation_id>')
 @api.doc(responses=SERVICE_RESPONSES)
 class Microlocation(Resource):
+    etag_versions = ('microlocations_ver',)
+
     @api.doc('get_microlocation')
     @api.header(*ETAG_HEADER_DEFN)
     @api.marshal_with(MICROLOCATION)
@@ -72,6 +74,8 @@ class Microlocation(Resource):
 
 @api.route('/events/<string:event_id>/microlocations')
 class MicrolocationList(Resource):
+    etag_versions = ('microlocations_ver',)
+
     @api.doc('list_microlocations')
     @api.header(*ETAG_HEADER_DEFN)
     @api.marshal_list_with(MICROLOCATION)
@@ -97,6 +101,8 @@ class MicrolocationList(Resource):
 
 @api.route('/events/<string:event_id>/microlocations/page')
 class MicrolocationListPaginated(Resource, PaginatedResourceBase):
+    etag_versions = ('microlocations_ver',)
+
     @api.doc('list_microlocations_paginated', params=PAGE_PARAMS)
     @api.header(*ETAG_HEADER_DEFN)
     @api.marshal_with(MICROLOCATION_PAGINATED)
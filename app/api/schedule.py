@@ -0,0 +1,128 @@
+"""
+Public schedule of an event as a single json bundle.
+
+The bundle is rendered and gzipped once per state of the event and kept in
+the cache under its `Version` counters, so it is rebuilt only after the
+event, its sessions, speakers, tracks or microlocations change. A
+conditional GET is answered from the counters alone.
+"""
+import gzip
+import json
+from StringIO import StringIO
+from hashlib import md5
+
+from flask import request, make_response, current_app as app
+from flask.ext.restplus import Namespace, Resource, marshal
+from sqlalchemy.orm import joinedload
+
+from app.helpers.cache import cache
+from app.helpers.data_getter import DataGetter
+from app.models.event import Event as EventModel
+from app.models.microlocation import Microlocation as MicrolocationModel
+from app.models.session import Session as SessionModel
+from app.models.session_type import SessionType as SessionTypeModel
+from app.models.track import Track as TrackModel
+from app.api.events import EVENT
+from app.api.microlocations import MICROLOCATION
+from app.api.sessions import SESSION, SESSION_TYPE, SESSION_VERSIONS
+from app.api.speakers import SPEAKER_PRIVATE
+from app.api.tracks import TRACK
+from app.api.helpers.errors import NotFoundError
+from app.api.helpers.etags import get_event_versions
+from app.api.helpers.utils import ETAG_HEADER_DEFN
+
+api = Namespace('schedule', description='Schedule', path='/')
+
+# Version columns the bundle depends on
+SCHEDULE_VERSIONS = ('event_ver',) + SESSION_VERSIONS
+# seconds a rendered bundle is kept. Bundles of older versions are never
+# requested again, so they only have to expire eventually.
+SCHEDULE_TIMEOUT = 24 * 3600
+GZIP_LEVEL = 9
+
+
+def _schedule_key(event_id, versions):
+    return 'schedule_json/%d/%s' % (event_id, ','.join(str(version or 0) for version in versions))
+
+
+def _schedule_etag(key):
+    return md5('|'.join([app.config.get('VERSION', ''), key])).hexdigest()
+
+
+def get_schedule(event_id):
+    """
+    Returns the public schedule of an event: the event with its accepted
+    and confirmed sessions, their speakers and the tracks, microlocations
+    and session types.
+    """
+    event = EventModel.query.get(event_id)
+    sessions = DataGetter.get_sessions(event_id) \
+        .options(joinedload(SessionModel.track),
+                 joinedload(SessionModel.microlocation),
+                 joinedload(SessionModel.session_type),
+                 joinedload(SessionModel.speakers)) \
+        .order_by(SessionModel.start_time, SessionModel.id).all()
+    speakers = {}
+    for session in sessions:
+        for speaker in session.speakers:
+            speakers[speaker.id] = speaker
+    return {
+        'event': marshal(event, EVENT),
+        'sessions': marshal(sessions, SESSION),
+        'speakers': marshal([speakers[_] for _ in sorted(speakers)], SPEAKER_PRIVATE),
+        'tracks': marshal(TrackModel.query.filter_by(event_id=event_id)
+                          .order_by(TrackModel.id).all(), TRACK),
+        'microlocations': marshal(MicrolocationModel.query.filter_by(event_id=event_id)
+                                  .order_by(MicrolocationModel.id).all(), MICROLOCATION),
+        'session_types': marshal(SessionTypeModel.query.filter_by(event_id=event_id)
+                                 .order_by(SessionTypeModel.id).all(), SESSION_TYPE),
+    }
+
+
+def render_schedule(event_id):
+    """gzipped json of the schedule of an event"""
+    data = json.dumps(get_schedule(event_id), separators=(',', ':'))
+    buf = StringIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=GZIP_LEVEL) as gzip_file:
+        gzip_file.write(data)
+    return buf.getvalue()
+
+
+def get_schedule_gzip(event_id, key):
+    """Cached gzipped schedule, rendered if it isn't cached"""
+    body = cache.get(key)
+    if body is None:
+        body = render_schedule(event_id)
+        cache.set(key, body, timeout=SCHEDULE_TIMEOUT)
+    return body
+
+
+@api.route('/events/<string:event_id>/schedule.json')
+class Schedule(Resource):
+    @api.doc('get_schedule', responses={404: 'Event does not exist'})
+    @api.header(*ETAG_HEADER_DEFN)
+    def get(self, event_id):
+        """
+        Fetch the public schedule of an event in one response.
+        gzip encoded if accepted by the client.
+        """
+        versions = get_event_versions(event_id, ('event_id',) + SCHEDULE_VERSIONS)
+        if versions is None:
+            raise NotFoundError(message='Event does not exist')
+        key = _schedule_key(versions[0], versions[1:])
+        etag = _schedule_etag(key)
+        headers = {
+            'ETag': etag,
+            'Vary': 'Accept-Encoding',
+            'Cache-Control': 'public, no-cache',
+        }
+        if request.headers.get('If-None-Match', '') == etag:
+            return make_response('', 304, headers)
+
+        body = get_schedule_gzip(versions[0], key)
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            headers['Content-Encoding'] = 'gzip'
+        else:
+            body = gzip.GzipFile(fileobj=StringIO(body)).read()
+        headers['Content-Type'] = 'application/json'
+        return make_response(body, 200, headers)
@@ -196,11 +196,14 @@ class SessionDAO(ServiceDAO):
             trigger_new_session_notifications(session.id, event_id=event_id)
         return session, status_code, location
 
-    def validate(self, data, event_id, check_required=True):
+    def get_post_model(self, event_id):
         form = DataGetter.get_custom_form_elements(event_id)
-        model = None
         if form:
-            model = model_custom_form(form.session_form, self.post_api_model)
+            return model_custom_form(form.session_form, self.post_api_model)
+        return self.post_api_model
+
+    def validate(self, data, event_id, check_required=True):
+        model = self.get_post_model(event_id)
         return ServiceDAO.validate(
             self, data, model=model, check_required=check_required)
 
@@ -225,6 +228,9 @@ SESSIONS_PARAMS = {
 # Resources
 # #########
 
+# Version columns a marshalled session depends on
+SESSION_VERSIONS = ('sessions_ver', 'speakers_ver', 'tracks_ver', 'microlocations_ver')
+
 
 class SessionResource():
     """
@@ -241,6 +247,8 @@ class SessionResource():
 @api.route('/events/<string:event_id>/sessions/<int:session_id>')
 @api.doc(responses=SERVICE_RESPONSES)
 class Session(Resource):
+    etag_versions = SESSION_VERSIONS
+
     @api.doc('get_session')
     @replace_event_id
     @api.header(*ETAG_HEADER_DEFN)
@@ -271,6 +279,8 @@ class Session(Resource):
 
 @api.route('/events/<string:event_id>/sessions')
 class SessionList(Resource, SessionResource):
+    etag_versions = SESSION_VERSIONS
+
     @replace_event_id
     @api.doc('list_sessions', params=SESSIONS_PARAMS)
     @api.header(*ETAG_HEADER_DEFN)
@@ -298,6 +308,8 @@ class SessionList(Resource, SessionResource):
 
 @api.route('/events/<string:event_id>/sessions/page')
 class SessionListPaginated(Resource, PaginatedResourceBase, SessionResource):
+    etag_versions = SESSION_VERSIONS
+
     @api.doc('list_sessions_paginated', params=PAGE_PARAMS)
     @replace_event_id
     @api.doc(params=SESSIONS_PARAMS)
@@ -315,6 +327,8 @@ class SessionListPaginated(Resource, PaginatedResourceBase, SessionResource):
 
 @api.route('/events/<string:event_id>/sessions/types')
 class SessionTypeList(Resource):
+    etag_versions = ('sessions_ver',)
+
     @api.doc('list_session_types')
     @replace_event_id
     @api.header(*ETAG_HEADER_DEFN)
@@ -339,6 +353,8 @@ class SessionTypeList(Resource):
 
 @api.route('/events/<string:event_id>/sessions/types/<int:type_id>')
 class SessionType(Resource):
+    etag_versions = ('sessions_ver',)
+
     @requires_auth
     @replace_event_id
     @can_delete(DAO)
@@ -83,11 +83,14 @@ class SpeakerDAO(ServiceDAO):
         data = self.validate(data, event_id, False)
         return ServiceDAO.update(self, event_id, service_id, data, validate=False)
 
-    def validate(self, data, event_id, check_required=True):
+    def get_post_model(self, event_id):
         form = DataGetter.get_custom_form_elements(event_id)
-        model = None
         if form:
-            model = model_custom_form(form.speaker_form, self.post_api_model)
+            return model_custom_form(form.speaker_form, self.post_api_model)
+        return self.post_api_model
+
+    def validate(self, data, event_id, check_required=True):
+        model = self.get_post_model(event_id)
         return ServiceDAO.validate(
             self, data, model, check_required=check_required)
 
@@ -128,9 +131,14 @@ def speakers_marshal_with(fields=None, fields_private=None):
 # API Resource
 # ############
 
+# Version columns a marshalled speaker depends on
+SPEAKER_VERSIONS = ('speakers_ver', 'sessions_ver')
+
 @api.route('/events/<string:event_id>/speakers/<int:speaker_id>')
 @api.doc(responses=SERVICE_RESPONSES)
 class Speaker(Resource):
+    etag_versions = SPEAKER_VERSIONS
+
     @replace_event_id
     @api.doc('get_speaker', model=SPEAKER)
     @api.header(*ETAG_HEADER_DEFN)
@@ -161,6 +169,8 @@ class Speaker(Resource):
 
 @api.route('/events/<string:event_id>/speakers')
 class SpeakerList(Resource):
+    etag_versions = SPEAKER_VERSIONS
+
     @api.doc('list_speakers', model=[SPEAKER])
     @replace_event_id
     @api.header(*ETAG_HEADER_DEFN)
@@ -186,6 +196,8 @@ class SpeakerList(Resource):
 
 @api.route('/events/<string:event_id>/speakers/page')
 class SpeakerListPaginated(Resource, PaginatedResourceBase):
+    etag_versions = SPEAKER_VERSIONS
+
     @api.doc('list_speakers_paginated', params=PAGE_PARAMS)
     @replace_event_id
     @api.doc(model=SPEAKER_PAGINATED)
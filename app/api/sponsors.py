@@ -49,6 +49,8 @@ DAO = SponsorDAO(SponsorModel, SPONSOR_POST)
 @api.route('/events/<string:event_id>/sponsors/<int:sponsor_id>')
 @api.doc(responses=SERVICE_RESPONSES)
 class Sponsor(Resource):
+    etag_versions = ('sponsors_ver',)
+
     @replace_event_id
     @api.doc('get_sponsor')
     @api.header(*ETAG_HEADER_DEFN)
@@ -79,6 +81,8 @@ class Sponsor(Resource):
 
 @api.route('/events/<string:event_id>/sponsors')
 class SponsorList(Resource):
+    etag_versions = ('sponsors_ver',)
+
     @api.doc('list_sponsors')
     @replace_event_id
     @api.header(*ETAG_HEADER_DEFN)
@@ -104,6 +108,8 @@ class SponsorList(Resource):
 
 @api.route('/events/<string:event_id>/sponsors/types')
 class SponsorTypesList(Resource):
+    etag_versions = ('sponsors_ver',)
+
     @replace_event_id
     @api.doc('list_sponsor_types', model=[fields.String()])
     @api.header(*ETAG_HEADER_DEFN)
@@ -114,6 +120,8 @@ class SponsorTypesList(Resource):
 
 @api.route('/events/<string:event_id>/sponsors/page')
 class SponsorListPaginated(Resource, PaginatedResourceBase):
+    etag_versions = ('sponsors_ver',)
+
     @replace_event_id
     @api.doc('list_sponsors_paginated', params=PAGE_PARAMS)
     @api.header(*ETAG_HEADER_DEFN)
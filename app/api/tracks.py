@@ -47,10 +47,15 @@ class TrackDAO(ServiceDAO):
 
 DAO = TrackDAO(TrackModel, TRACK_POST)
 
+# Version columns a marshalled track depends on
+TRACK_VERSIONS = ('tracks_ver', 'sessions_ver')
+
 
 @api.route('/events/<string:event_id>/tracks/<int:track_id>')
 @api.doc(responses=SERVICE_RESPONSES)
 class Track(Resource):
+    etag_versions = TRACK_VERSIONS
+
     @replace_event_id
     @api.doc('get_track')
     @api.header(*ETAG_HEADER_DEFN)
@@ -81,6 +86,8 @@ class Track(Resource):
 
 @api.route('/events/<string:event_id>/tracks')
 class TrackList(Resource):
+    etag_versions = TRACK_VERSIONS
+
     @replace_event_id
     @api.doc('list_tracks')
     @api.header(*ETAG_HEADER_DEFN)
@@ -106,6 +113,8 @@ class TrackList(Resource):
 
 @api.route('/events/<string:event_id>/tracks/page')
 class TrackListPaginated(Resource, PaginatedResourceBase):
+    etag_versions = TRACK_VERSIONS
+
     @replace_event_id
     @api.doc('list_tracks_paginated', params=PAGE_PARAMS)
     @api.header(*ETAG_HEADER_DEFN)
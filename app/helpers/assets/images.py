@@ -1,10 +1,18 @@
+import hashlib
 import os
 import uuid
+from StringIO import StringIO
 
 import PIL
+import requests
 from PIL import Image
 from flask import current_app as app
-from app.helpers.storage import upload, UploadedFile, generate_hash
+from app.helpers.storage import upload, is_external_file, UploadedFile, UploadedMemory
+
+# jpg quality of resized images
+VARIANT_QUALITY = 75
+# seconds to download an uploaded image
+DOWNLOAD_TIMEOUT = 30
 
 
 def get_image_file_name():
@@ -38,42 +46,123 @@ def save_event_image(image_url, upload_path, ext='png', remove_after_upload=Fals
     return url if url else ''
 
 
-def save_resized_image(image_file, basewidth, aspect, height_size, upload_path,
-                       ext='jpg', remove_after_upload=False):
+def get_variant_size(source_size, width, height, aspect):
     """
-    Save the resized version of the background image
-    :param upload_path:
-    :param ext:
-    :param remove_after_upload:
-    :param height_size:
-    :param aspect:
-    :param basewidth:
-    :param image_file:
-    :return:
+    Size of a variant. With aspect 'on' the height follows the aspect ratio
+    of the source
     """
-    filename = '{filename}.{ext}'.format(filename=get_image_file_name(), ext=ext)
-
-    img = Image.open(image_file)
     if aspect == 'on':
-        width_percent = (basewidth / float(img.size[0]))
-        height_size = int((float(img.size[1]) * float(width_percent)))
-
-    img = img.resize((basewidth, height_size), PIL.Image.ANTIALIAS)
+        height = int(float(source_size[1]) * (width / float(source_size[0])))
+    return width, height
 
-    temp_file_relative_path = 'static/media/temp/' + generate_hash(str(image_file)) + get_image_file_name() + '.jpg'
-    temp_file_path = app.config['BASE_DIR'] + '/' + temp_file_relative_path
 
-    img.save(temp_file_path)
+def get_file_digest(source_file):
+    """sha1 of a file object, which is rewound"""
+    digest = hashlib.sha1()
+    for chunk in iter(lambda: source_file.read(64 * 1024), ''):
+        digest.update(chunk)
+    source_file.seek(0)
+    return digest.hexdigest()
 
-    file = UploadedFile(file_path=temp_file_path, filename=filename)
-
-    if remove_after_upload:
-        os.remove(image_file)
 
-    uploaded_url = upload(file, upload_path)
+def open_upload(url):
+    """
+    File object of an uploaded file. Files of the local storage are read
+    from the disk, others are downloaded.
+    """
+    if is_external_file(url):
+        response = requests.get(url, timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+        return StringIO(response.content)
+    return open(get_path_of_temp_url(url), 'rb')
 
-    os.remove(temp_file_path)
 
-    return uploaded_url
+def decode_image(img, sizes):
+    """
+    Decodes an opened image as RGB, transparent parts on white. JPEGs are
+    decoded at the smallest scale still larger than all `sizes`.
+    """
+    if img.format == 'JPEG':
+        img.draft('RGB', (max(_[0] for _ in sizes), max(_[1] for _ in sizes)))
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, (0, 0), img)
+        return background
+    return img.convert('RGB') if img.mode != 'RGB' else img
 
 
+def save_image_variants(source_file, variants, current_urls=None):
+    """
+    Resizes an image into jpg variants and uploads them.
+    The source is decoded once for all variants. Variant files are named
+    after the content of the source and their size, so a variant whose
+    current url already has its name is kept as it is.
+    :param source_file: file object of the source image
+    :param variants: list of (name, width, height, aspect, upload_path)
+    :param current_urls: dict of variant name -> current url
+    :return: dict of variant name -> url
+    """
+    current_urls = current_urls or {}
+    digest = get_file_digest(source_file)
+    img = Image.open(source_file)
+    urls = {}
+    pending = []
+    for name, width, height, aspect, upload_path in variants:
+        size = get_variant_size(img.size, width, height, aspect)
+        filename = hashlib.sha1('%s/%dx%d' % (digest, size[0], size[1])).hexdigest() + '.jpg'
+        if (current_urls.get(name) or '').endswith('/' + filename):
+            urls[name] = current_urls[name]
+        else:
+            pending.append((name, size, filename, upload_path))
+    if not pending:
+        return urls
+
+    img = decode_image(img, [_[1] for _ in pending])
+    for name, size, filename, upload_path in pending:
+        variant = img.resize(size, PIL.Image.ANTIALIAS)
+        data = StringIO()
+        variant.save(data, 'JPEG', quality=VARIANT_QUALITY)
+        urls[name] = upload(UploadedMemory(data.getvalue(), filename), upload_path)
+    return urls
+
+
+def update_image_variants(model_name, obj_id, source_url, variants):
+    """
+    Saves the variants of the image uploaded at `source_url` and sets their
+    urls on the object of `model_name` having id `obj_id`. Variant names
+    are the fields of the object. Nothing is done if the image of the
+    object changed since.
+    """
+    # models import helpers which import this module
+    from app.helpers.data import save_to_db
+    from app.models.event import Event
+    from app.models.speaker import Speaker
+    from app.models.user_detail import UserDetail
+    model, source_field = {
+        'event': (Event, 'background_url'),
+        'speaker': (Speaker, 'photo'),
+        'user_detail': (UserDetail, 'avatar_uploaded'),
+    }[model_name]
+    obj = model.query.get(obj_id)
+    if obj is None or getattr(obj, source_field) != source_url:
+        return
+    source_file = open_upload(source_url)
+    try:
+        urls = save_image_variants(source_file, variants,
+                                   dict((_[0], getattr(obj, _[0])) for _ in variants))
+    finally:
+        source_file.close()
+    for name, url in urls.items():
+        setattr(obj, name, url)
+    save_to_db(obj)
+
+
+def queue_image_variants(model_name, obj_id, source_url, variants):
+    """
+    Runs `update_image_variants` in a celery task, out of the request.
+    The object must be saved already, with its image uploaded at
+    `source_url`, as workers may not share the disk of the web process.
+    """
+    from app.helpers.tasks import image_variants_task
+    image_variants_task.delay(model_name, obj_id, source_url, [list(_) for _ in variants])
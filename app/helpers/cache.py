@@ -1,3 +1,21 @@
 from flask.ext.cache import Cache
 
-cache = Cache()
+from app.helpers.instrumentation import record_cache_lookups
+
+
+class InstrumentedCache(Cache):
+    """Cache counting its hits and misses in the request metrics"""
+
+    def get(self, *args, **kwargs):
+        value = super(InstrumentedCache, self).get(*args, **kwargs)
+        record_cache_lookups(int(value is not None), int(value is None))
+        return value
+
+    def get_many(self, *args, **kwargs):
+        values = super(InstrumentedCache, self).get_many(*args, **kwargs)
+        hits = len([value for value in values if value is not None])
+        record_cache_lookups(hits, len(values) - hits)
+        return values
+
+
+cache = InstrumentedCache()
@@ -4,6 +4,10 @@ from app.models.discount_code import DiscountCode
 from app.models.ticket import Ticket
 from app.models.user import User
 
+# Seconds for which data shared by all templates is cached. Edits from the
+# super admin clear it right away in the process handling them.
+TEMPLATE_CONTEXT_TIMEOUT = 300
+
 
 class CachedGetter(object):
     """Cached data getters"""
@@ -27,3 +31,19 @@ class CachedGetter(object):
     @cache.memoize(50)
     def get_user(user_id):
         return User.query.get(user_id)
+
+    @staticmethod
+    @cache.memoize(TEMPLATE_CONTEXT_TIMEOUT)
+    def get_all_pages(selected_lang):
+        return DataGetter.get_all_pages(selected_lang)
+
+    @staticmethod
+    @cache.memoize(TEMPLATE_CONTEXT_TIMEOUT)
+    def get_custom_placeholder_by_name(name):
+        return DataGetter.get_custom_placeholder_by_name(name)
+
+    @staticmethod
+    def clear_template_context():
+        """Clear cached pages and placeholders used in every template"""
+        cache.delete_memoized(CachedGetter.get_all_pages)
+        cache.delete_memoized(CachedGetter.get_custom_placeholder_by_name)
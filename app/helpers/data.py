@@ -2,34 +2,31 @@ import json
 import logging
 import os.path
 import random
-import shutil
 import traceback
 from datetime import datetime, timedelta
 from os import path
 from urllib2 import urlopen
 from uuid import uuid4
 
-import PIL
 import oauth2
-from PIL import Image
 from flask import flash, url_for, g, current_app
 from flask.ext import login
 from flask.ext.scrypt import generate_password_hash, generate_random_salt
 from flask_socketio import emit
 from requests_oauthlib import OAuth2Session
 
-from app.helpers.assets.images import get_image_file_name, get_path_of_temp_url
+from app.helpers.assets.images import get_image_file_name, get_path_of_temp_url, queue_image_variants
 from app.helpers.cache import cache
 from app.helpers.helpers import string_empty, string_not_empty
 from app.helpers.notification_email_triggers import trigger_new_session_notifications, \
     trigger_session_state_change_notifications
 from app.helpers.oauth import OAuth, FbOAuth, InstagramOAuth, TwitterOAuth
 from app.helpers.sessions_speakers.speakers import save_speaker
-from app.helpers.storage import upload, UPLOAD_PATHS, UploadedFile, upload_local, \
-    is_external_file
+from app.helpers.storage import upload, UPLOAD_PATHS, UploadedFile, is_external_file
 from app.helpers import helpers as Helper
 from app.helpers.data_getter import DataGetter
 from app.helpers.system_mails import MAILS
+from app.helpers.permission_resolver import clear_permission_table, clear_user_roles
 from app.helpers.update_version import VersionUpdater
 from app.models import db
 from app.models.activity import Activity, ACTIVITIES
@@ -542,6 +539,7 @@ class DataManager(object):
             Helper.send_email_confirmation(form, link)
             user.email = form['email']
 
+        avatar_variants = None
         user_detail.contact = form['contact']
         if not contacts_only_update:
             user_detail.firstname = form['firstname']
@@ -571,9 +569,6 @@ class DataManager(object):
             avatar_img = form.get('avatar-img', None)
             if string_not_empty(avatar_img) and avatar_img:
                 user_detail.avatar_uploaded = ""
-                user_detail.thumbnail = ""
-                user_detail.small = ""
-                user_detail.icon = ""
                 filename = '{}.png'.format(get_image_file_name())
                 filepath = '{}/static/{}'.format(path.realpath('.'),
                                                  avatar_img[len('/serve_static/'):])
@@ -591,59 +586,18 @@ class DataManager(object):
                                              thumbnail_height=50,
                                              type='profile')
                 save_to_db(image_sizes, "Image Sizes Saved")
-                filename = '{}.jpg'.format(get_image_file_name())
-                filepath = '{}/static/{}'.format(path.realpath('.'),
-                                                 avatar_img[len('/serve_static/'):])
-                # print "File path 1", filepath
-                avatar_img_file = UploadedFile(filepath, filename)
-
-                temp_img_file = upload_local(avatar_img_file,
-                                             'users/{user_id}/temp'.format(user_id=int(user_id)))
-                temp_img_file = temp_img_file.replace('/serve_', '')
-
-                basewidth = image_sizes.full_width
-                img = Image.open(temp_img_file)
-                hsize = image_sizes.full_height
-                img = img.resize((basewidth, hsize), PIL.Image.ANTIALIAS)
-                img.save(temp_img_file)
-                file_name = temp_img_file.rsplit('/', 1)[1]
-                large_file = UploadedFile(file_path=temp_img_file, filename=file_name)
-                profile_thumbnail_url = upload(
-                    large_file,
-                    UPLOAD_PATHS['user']['thumbnail'].format(
-                        user_id=int(user_id)
-                    ))
-
-                basewidth = image_sizes.thumbnail_width
-                img = Image.open(temp_img_file)
-                hsize = image_sizes.thumbnail_height
-                img = img.resize((basewidth, hsize), PIL.Image.ANTIALIAS)
-                img.save(temp_img_file)
-                file_name = temp_img_file.rsplit('/', 1)[1]
-                thumbnail_file = UploadedFile(file_path=temp_img_file, filename=file_name)
-                profile_small_url = upload(
-                    thumbnail_file,
-                    UPLOAD_PATHS['user']['small'].format(
-                        user_id=int(user_id)
-                    ))
-
-                basewidth = image_sizes.icon_width
-                img = Image.open(temp_img_file)
-                hsize = image_sizes.icon_height
-                img = img.resize((basewidth, hsize), PIL.Image.ANTIALIAS)
-                img.save(temp_img_file)
-                file_name = temp_img_file.rsplit('/', 1)[1]
-                icon_file = UploadedFile(file_path=temp_img_file, filename=file_name)
-                profile_icon_url = upload(
-                    icon_file,
-                    UPLOAD_PATHS['user']['icon'].format(
-                        user_id=int(user_id)
-                    ))
-                shutil.rmtree(path='static/media/' + 'users/{user_id}/temp'.format(user_id=int(user_id)))
-                user_detail.thumbnail = profile_thumbnail_url
-                user_detail.small = profile_small_url
-                user_detail.icon = profile_icon_url
+                avatar_variants = [
+                    ('thumbnail', image_sizes.full_width, image_sizes.full_height, 'off',
+                     UPLOAD_PATHS['user']['thumbnail'].format(user_id=int(user_id))),
+                    ('small', image_sizes.thumbnail_width, image_sizes.thumbnail_height, 'off',
+                     UPLOAD_PATHS['user']['small'].format(user_id=int(user_id))),
+                    ('icon', image_sizes.icon_width, image_sizes.icon_height, 'off',
+                     UPLOAD_PATHS['user']['icon'].format(user_id=int(user_id))),
+                ]
         user, user_detail, save_to_db(user, "User updated")
+        if avatar_variants:
+            # thumbnail, small and icon are kept until resized, unchanged if the avatar is
+            queue_image_variants('user_detail', user_detail.id, user_detail.avatar_uploaded, avatar_variants)
         record_activity('update_user', user=user)
 
     @staticmethod
@@ -729,20 +683,25 @@ class DataManager(object):
                         setattr(perm, oper[v], False)
 
                 save_to_db(perm, 'Permission saved')
+        clear_permission_table()
 
     @staticmethod
     def delete_event(e_id):
-        EventsUsers.query.filter_by(event_id=e_id).delete()
-        UsersEventsRoles.query.filter_by(event_id=e_id).delete()
-        EmailNotification.query.filter_by(event_id=e_id).delete()
-        SessionType.query.filter_by(event_id=e_id).delete()
-        SocialLink.query.filter_by(event_id=e_id).delete()
-        Track.query.filter_by(id=e_id).delete()
-        Invite.query.filter_by(event_id=e_id).delete()
-        Session.query.filter_by(event_id=e_id).delete()
-        Event.query.filter_by(id=e_id).delete()
+        DataManager.delete_events([e_id])
         # record_activity('delete_event', event_id=e_id)
         db.session.commit()
+        clear_user_roles()
+
+    @staticmethod
+    def delete_events(event_ids):
+        """
+        Deletes events with their data, a statement per table.
+        Doesn't commit.
+        """
+        for model in (EventsUsers, UsersEventsRoles, EmailNotification, SocialLink, Invite,
+                      Session, SessionType, Track):
+            model.query.filter(model.event_id.in_(event_ids)).delete(synchronize_session=False)
+        Event.query.filter(Event.id.in_(event_ids)).delete(synchronize_session=False)
 
     @staticmethod
     def trash_event(e_id):
@@ -5,14 +5,15 @@ from collections import Counter
 import binascii
 import humanize
 import pytz
-import requests
 from flask import flash, abort, request
 from flask import url_for
 from flask.ext import login
 from sqlalchemy import desc, asc, or_
+from sqlalchemy.orm import joinedload
 from sqlalchemy.orm.exc import MultipleResultsFound, NoResultFound
 
 from app.helpers.cache import cache
+from app.helpers.geocoding import get_locality
 from app.helpers.helpers import get_event_id, string_empty, represents_int, get_count, \
     send_email_after_account_create_with_password
 from app.helpers.language_list import LANGUAGE_LIST
@@ -47,7 +48,7 @@ from app.models.session_type import SessionType
 from app.models.social_link import SocialLink
 from app.models.speaker import Speaker
 from app.models.sponsor import Sponsor
-from app.models.system_role import CustomSysRole
+from app.models.system_role import CustomSysRole, UserSystemRole
 from app.models.tax import Tax
 from app.models.ticket import Ticket
 from app.models.track import Track
@@ -56,8 +57,37 @@ from app.models.user_detail import UserDetail
 from app.models.user_permissions import UserPermission
 from app.models.users_events_roles import UsersEventsRoles
 
+# model -> profile name -> relationships loaded along with the model, see
+# `DataGetter.with_profiles`
+LOAD_PROFILES = {
+    User: {
+        'with_roles': (joinedload(User.user_detail),
+                       joinedload(User.sys_roles).joinedload(UserSystemRole.role)),
+    },
+    Event: {
+        'with_roles': (joinedload(Event.roles).joinedload(UsersEventsRoles.role),),
+        'with_tickets': (joinedload(Event.tickets),),
+    },
+    Session: {
+        'with_speakers': (joinedload(Session.speakers), joinedload(Session.track)),
+    },
+}
+
 
 class DataGetter(object):
+    @staticmethod
+    def with_profiles(query, *profiles):
+        """
+        Applies the loading `profiles` of LOAD_PROFILES to a query, so the
+        relationships they name are read along with its rows instead of with
+        a query per row
+        """
+        model = query.column_descriptions[0]['type']
+        options = []
+        for profile in profiles:
+            options.extend(LOAD_PROFILES[model][profile])
+        return query.options(*options)
+
     @staticmethod
     def get_super_admin_user():
         return User.query \
@@ -97,9 +127,10 @@ class DataGetter(object):
             return None
 
     @staticmethod
-    def get_all_events():
+    def get_all_events(*profiles):
         """Method return all events"""
-        return Event.query.order_by(desc(Event.created_at)).filter_by(deleted_at=None).all()
+        return DataGetter.with_profiles(Event.query, *profiles) \
+            .order_by(desc(Event.created_at)).filter_by(deleted_at=None).all()
 
     @staticmethod
     def get_all_events_with_discounts():
@@ -128,6 +159,18 @@ class DataGetter(object):
     def get_event_roles_for_user(user_id):
         return UsersEventsRoles.query.filter_by(user_id=user_id)
 
+    @staticmethod
+    def get_event_roles_by_user():
+        """
+        :return: dict of user id -> event roles of the user, with their role
+        and event, in one query
+        """
+        roles = UsersEventsRoles.query.options(joinedload(UsersEventsRoles.role), joinedload(UsersEventsRoles.event))
+        roles_by_user = {}
+        for role in roles:
+            roles_by_user.setdefault(role.user_id, []).append(role)
+        return roles_by_user
+
     @staticmethod
     def get_roles():
         return Role.query.all()
@@ -174,11 +217,13 @@ class DataGetter(object):
         return EmailNotification.query.filter_by(user_id=user_id).filter_by(event_id=event_id).first()
 
     @staticmethod
-    def get_sessions_by_event_id(event_id):
+    def get_sessions_by_event_id(event_id, *profiles):
         """
+        :param profiles: loading profiles, see `with_profiles`
         :return: All Sessions with correct event_id
         """
-        return Session.query.filter_by(event_id=event_id).filter(Session.deleted_at.is_(None))
+        return DataGetter.with_profiles(Session.query, *profiles) \
+            .filter_by(event_id=event_id).filter(Session.deleted_at.is_(None))
 
     @staticmethod
     def get_sessions_by_state(state):
@@ -365,11 +410,12 @@ class DataGetter(object):
         return user
 
     @staticmethod
-    def get_all_users():
+    def get_all_users(*profiles):
         """
+        :param profiles: loading profiles, see `with_profiles`
         :return: All system users
         """
-        return User.query.all()
+        return DataGetter.with_profiles(User.query, *profiles).all()
 
     @staticmethod
     def get_user(user_id):
@@ -456,30 +502,34 @@ class DataGetter(object):
         return [_ for _ in events if _.has_staff_access(user_id)]
 
     @staticmethod
-    def get_live_events_of_user(user_id=None):
-        events = Event.query.join(Event.roles, aliased=True).filter_by(
-            user_id=login.current_user.id if not user_id else user_id) \
+    def get_live_events_of_user(user_id=None, *profiles):
+        events = DataGetter.with_profiles(Event.query, 'with_roles', *profiles) \
+            .join(Event.roles, aliased=True) \
+            .filter_by(user_id=login.current_user.id if not user_id else user_id) \
             .filter(Event.end_time >= datetime.datetime.now()) \
             .filter(Event.state == 'Published').filter(Event.deleted_at.is_(None))
         return DataGetter.trim_attendee_events(events, user_id)
 
     @staticmethod
-    def get_all_events_of_user(user_id=None):
-        events = Event.query.join(Event.roles, aliased=True).filter_by(
-            user_id=login.current_user.id if not user_id else user_id)
+    def get_all_events_of_user(user_id=None, *profiles):
+        events = DataGetter.with_profiles(Event.query, 'with_roles', *profiles) \
+            .join(Event.roles, aliased=True) \
+            .filter_by(user_id=login.current_user.id if not user_id else user_id)
         return DataGetter.trim_attendee_events(events, user_id)
 
     @staticmethod
-    def get_draft_events_of_user(user_id=None):
-        events = Event.query.join(Event.roles, aliased=True).filter_by(
-            user_id=login.current_user.id if not user_id else user_id) \
+    def get_draft_events_of_user(user_id=None, *profiles):
+        events = DataGetter.with_profiles(Event.query, 'with_roles', *profiles) \
+            .join(Event.roles, aliased=True) \
+            .filter_by(user_id=login.current_user.id if not user_id else user_id) \
             .filter(Event.state == 'Draft').filter(Event.deleted_at.is_(None))
         return DataGetter.trim_attendee_events(events, user_id)
 
     @staticmethod
-    def get_past_events_of_user(user_id=None):
-        events = Event.query.join(Event.roles, aliased=True).filter_by(
-            user_id=login.current_user.id if not user_id else user_id) \
+    def get_past_events_of_user(user_id=None, *profiles):
+        events = DataGetter.with_profiles(Event.query, 'with_roles', *profiles) \
+            .join(Event.roles, aliased=True) \
+            .filter_by(user_id=login.current_user.id if not user_id else user_id) \
             .filter(Event.end_time <= datetime.datetime.now()).filter(
             or_(Event.state == 'Completed', Event.state == 'Published')).filter(Event.deleted_at.is_(None))
         return DataGetter.trim_attendee_events(events, user_id)
@@ -731,13 +781,9 @@ class DataGetter(object):
             for event in DataGetter.get_live_and_public_events():
                 if not string_empty(event.location_name) and not string_empty(event.latitude) and not string_empty(
                         event.longitude):
-                    response = requests.get(
-                        "https://maps.googleapis.com/maps/api/geocode/json?latlng=" + str(event.latitude) + "," + str(
-                            event.longitude)).json()
-                    if response['status'] == u'OK':
-                        for addr in response['results'][0]['address_components']:
-                            if addr['types'] == ['locality', 'political']:
-                                names.append(addr['long_name'])
+                    locality = event.searchable_location_name or get_locality(event.latitude, event.longitude)
+                    if locality:
+                        names.append(locality)
 
             cnt = Counter()
             for location in names:
@@ -0,0 +1,182 @@
+"""
+Streaming CSV exports of speakers, sessions, attendees and orders.
+
+Rows are sent to the client as they are read, so memory does not grow with
+the size of an export. Items are read in keyset batches of CSV_BATCH, each
+batch in one query along with the relationships its columns use.
+"""
+from csv import writer
+
+from flask import Response, stream_with_context
+from sqlalchemy import desc, or_
+from sqlalchemy.orm import joinedload
+
+from app.helpers.versioning import strip_tags
+from app.models import db
+from app.models.order import Order
+from app.models.session import Session, speakers_sessions
+from app.models.speaker import Speaker
+from app.models.ticket_holder import TicketHolder
+from app.models.user import User
+
+# items read per query
+CSV_BATCH = 1000
+# rows sent to the client at once
+CSV_CHUNK_ROWS = 100
+
+SPEAKER_HEADER = ["Speaker Name", "Speaker Email", "Speaker Session(s)",
+                  "Speaker Mobile", "Speaker Organisation", "Speaker Position"]
+SESSION_HEADER = ["Session Title", "Session Speakers", "Session Track", "Session Abstract", "Email Sent"]
+ATTENDEE_HEADER = ["Order#", "Order Date", "Status", "First Name", "Last Name", "Email", "Country",
+                   "Payment Type", "Ticket Name", "Ticket Price", "Ticket Type"]
+ORDER_HEADER = ["Order#", "Order Date", "Status", "Payment Type", "Quantity", "Total Amount", "Discount Code",
+                "First Name", "Last Name", "Email"]
+
+
+class _Line(object):
+    """File-like object handing back what is written to it"""
+
+    def write(self, value):
+        return value
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return str(value)
+
+
+def iter_batches(query, id_column, descending=False):
+    """
+    Yields the items of `query` ordered by `id_column` in lists of at most
+    CSV_BATCH. Each list is read with one query, starting after the last
+    id of the previous one, so the eager loads of `query` apply to it.
+    """
+    last_id = None
+    while True:
+        batch_query = query
+        if last_id is not None:
+            batch_query = query.filter(id_column < last_id if descending else id_column > last_id)
+        items = batch_query.order_by(desc(id_column) if descending else id_column).limit(CSV_BATCH).all()
+        if not items:
+            return
+        yield items
+        last_id = getattr(items[-1], id_column.key)
+
+
+def stream_csv(header, rows):
+    """Yields the CSV of `header` and `rows` in chunks of CSV_CHUNK_ROWS lines"""
+    csv_writer = writer(_Line())
+    lines = [csv_writer.writerow([_cell(value) for value in header])]
+    for row in rows:
+        lines.append(csv_writer.writerow([_cell(value) for value in row]))
+        if len(lines) >= CSV_CHUNK_ROWS:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def csv_response(header, rows, filename):
+    """Response streaming the CSV of `header` and `rows`, an iterable of lists of values"""
+    response = Response(stream_with_context(stream_csv(header, rows)), mimetype='text/csv')
+    response.headers['Content-Disposition'] = 'inline; filename=%s' % filename
+    return response
+
+
+def _get_speaker_sessions(speaker_ids):
+    """dict of speaker id -> 'title (state)' of the sessions of the speakers, in one query"""
+    sessions = db.session.query(speakers_sessions.c.speaker_id, Session.title, Session.state) \
+        .join(Session, Session.id == speakers_sessions.c.session_id) \
+        .filter(speakers_sessions.c.speaker_id.in_(speaker_ids)) \
+        .filter(Session.deleted_at.is_(None)) \
+        .order_by(Session.id)
+    speaker_sessions = {}
+    for speaker_id, title, state in sessions:
+        speaker_sessions.setdefault(speaker_id, []).append('%s (%s)' % (title, state))
+    return speaker_sessions
+
+
+def get_speaker_rows(event_id):
+    query = Speaker.query.filter_by(event_id=event_id)
+    for speakers in iter_batches(query, Speaker.id):
+        speaker_sessions = _get_speaker_sessions([speaker.id for speaker in speakers])
+        for speaker in speakers:
+            yield [speaker.name, speaker.email, ', '.join(speaker_sessions.get(speaker.id, [])),
+                   speaker.mobile, speaker.organisation, speaker.position]
+
+
+def get_session_rows(event_id):
+    query = Session.query \
+        .options(joinedload(Session.track), joinedload(Session.speakers)) \
+        .filter_by(event_id=event_id) \
+        .filter(Session.deleted_at.is_(None))
+    for sessions in iter_batches(query, Session.id):
+        for session in sessions:
+            yield ['%s (%s)' % (session.title, session.state) if session.title else '',
+                   ', '.join(speaker.name for speaker in session.speakers if speaker.name),
+                   session.track.name if session.track else '',
+                   strip_tags(session.short_abstract) if session.short_abstract else '',
+                   'Yes' if session.state_email_sent else 'No']
+
+
+def _get_orders_query(event_id, from_date=None, to_date=None):
+    query = Order.query \
+        .filter_by(event_id=event_id) \
+        .filter(Order.user_id.isnot(None)) \
+        .filter(or_(Order.status.is_(None), Order.status != 'deleted'))
+    if from_date:
+        query = query.filter(Order.created_at >= from_date)
+    if to_date:
+        query = query.filter(Order.created_at <= to_date)
+    return query
+
+
+def get_holder_price(holder, discount):
+    """Price of the ticket of `holder` after the `discount` of its order"""
+    price = holder.ticket.price
+    if discount and str(holder.ticket.id) in (discount.tickets or '').split(","):
+        if discount.type == "amount":
+            price -= discount.value
+        else:
+            price -= price * discount.value / 100.0
+    return price
+
+
+def get_attendee_rows(event_id, from_date=None, to_date=None, ticket_name=None):
+    """
+    Rows of the ticket holders of the orders of an event, and of the orders
+    without holders. Only holders of `ticket_name` tickets if given.
+    """
+    query = _get_orders_query(event_id, from_date, to_date) \
+        .options(joinedload(Order.ticket_holders).joinedload(TicketHolder.ticket),
+                 joinedload(Order.discount_code))
+    for orders in iter_batches(query, Order.id, descending=True):
+        for order in orders:
+            order_values = [order.get_invoice_number(), order.created_at, order.status]
+            for holder in order.ticket_holders:
+                if ticket_name and ticket_name != "All" and holder.ticket.name != ticket_name:
+                    continue
+                yield order_values + [holder.firstname, holder.lastname, holder.email, holder.country,
+                                      order.paid_via, holder.ticket.name,
+                                      get_holder_price(holder, order.discount_code), holder.ticket.type]
+            if not order.ticket_holders:
+                yield order_values + ['', '', '', '', order.paid_via, '', '', '']
+
+
+def get_order_rows(event_id, from_date=None, to_date=None):
+    query = _get_orders_query(event_id, from_date, to_date) \
+        .options(joinedload(Order.tickets),
+                 joinedload(Order.discount_code),
+                 joinedload(Order.user).joinedload(User.user_detail))
+    for orders in iter_batches(query, Order.id, descending=True):
+        for order in orders:
+            user_detail = order.user.user_detail if order.user else None
+            yield [order.get_invoice_number(), order.created_at, order.status, order.paid_via,
+                   order.get_tickets_count(), order.amount,
+                   order.discount_code.code if order.discount_code else '',
+                   user_detail.firstname if user_detail else '',
+                   user_detail.lastname if user_detail else '',
+                   order.user.email if order.user else '']
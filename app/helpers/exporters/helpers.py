@@ -1,3 +1,16 @@
+import hashlib
+from collections import OrderedDict
+
+from sqlalchemy import asc
+from sqlalchemy.orm import joinedload
+
+from app.helpers.cache import cache
+from app.models.session import Session
+
+# seconds a rendered session fragment is cached
+FRAGMENT_TIMEOUT = 7 * 24 * 3600
+
+
 def format_timedelta(td):
     hours, remainder = divmod(td.total_seconds(), 3600)
     minutes, seconds = divmod(remainder, 60)
@@ -7,3 +20,59 @@ def format_timedelta(td):
     if minutes < 10:
         minutes = '0%s' % minutes
     return '%s:%s' % (hours, minutes)
+
+
+def render_fragments(name, items, render):
+    """
+    Returns the fragments of an export rendered by `render` from `items`,
+    tuples of all the values a fragment depends on. Fragments are cached
+    by a digest of these values, so only new or changed ones are rendered.
+    """
+    if not items:
+        return []
+    keys = ['schedule_fragment/%s/%s' % (name, hashlib.md5(repr(item)).hexdigest()) for item in items]
+    fragments = cache.get_many(*keys)
+    rendered = {}
+    for count, fragment in enumerate(fragments):
+        if fragment is None:
+            fragments[count] = rendered[keys[count]] = render(*items[count])
+    if rendered:
+        cache.set_many(rendered, timeout=FRAGMENT_TIMEOUT)
+    return fragments
+
+
+def load_schedule(event_id):
+    """
+    Returns the accepted sessions of an event ordered by start time, with
+    their track, microlocation, session type and speakers, in one query
+    """
+    return Session.query \
+        .options(joinedload(Session.track),
+                 joinedload(Session.microlocation),
+                 joinedload(Session.session_type),
+                 joinedload(Session.speakers)) \
+        .filter_by(event_id=event_id) \
+        .filter_by(state='accepted') \
+        .filter(Session.deleted_at.is_(None)) \
+        .filter(Session.start_time.isnot(None)) \
+        .filter(Session.end_time.isnot(None)) \
+        .order_by(asc(Session.start_time)).all()
+
+
+def group_schedule(sessions):
+    """
+    Groups sessions ordered by start time by day and then by
+    microlocation. Returns an OrderedDict of date -> list of
+    (microlocation, sessions) ordered by microlocation id. Sessions without
+    a microlocation are left out.
+    """
+    days = OrderedDict()
+    for session in sessions:
+        if session.microlocation is None:
+            continue
+        rooms = days.setdefault(session.start_time.date(), {})
+        rooms.setdefault(session.microlocation.id, (session.microlocation, []))[1].append(session)
+    return OrderedDict(
+        (date, [rooms[microlocation_id] for microlocation_id in sorted(rooms)])
+        for date, rooms in days.items()
+    )
@@ -2,17 +2,49 @@ import icalendar
 import pytz
 from flask import url_for
 from icalendar import Calendar, vCalAddress, vText
-from sqlalchemy import asc
 
+from app.helpers.exporters.helpers import load_schedule, render_fragments
 from app.models.event import Event as EventModel
-from app.models.session import Session
-from app.helpers.signals import event_json_modified, speakers_modified, sessions_modified
 
 
 class ICalExporter:
     def __init__(self):
         pass
 
+    @staticmethod
+    def get_session_values(event, session, url):
+        """All values the vevent of a session is rendered from"""
+        speakers = tuple(speaker.name for speaker in session.speakers)
+        location = session.microlocation.name or '' + " " + event.location_name
+        return (session.id, event.identifier, event.timezone or 'UTC', event.latitude, event.longitude,
+                event.email, url, session.title, location, session.start_time, session.end_time,
+                session.short_abstract, speakers)
+
+    @staticmethod
+    def render_session(session_id, identifier, timezone, latitude, longitude, email, url, title, location,
+                       start_time, end_time, short_abstract, speakers):
+        """Renders the vevent of a session"""
+        tz = pytz.timezone(timezone)
+        event_component = icalendar.Event()
+        event_component.add('summary', title)
+        event_component.add('uid', str(session_id) + "-" + identifier)
+        event_component.add('geo', (latitude, longitude))
+        event_component.add('location', location)
+        event_component.add('dtstart', tz.localize(start_time))
+        event_component.add('dtend', tz.localize(end_time))
+        event_component.add('email', email)
+        event_component.add('description', short_abstract)
+        event_component.add('url', url)
+
+        for speaker in speakers:
+            # Ref: http://icalendar.readthedocs.io/en/latest/usage.html#file-structure
+            # can use speaker.email below but privacy reasons
+            attendee = vCalAddress('MAILTO:' + email if email else 'undefined@email.com')
+            attendee.params['cn'] = vText(speaker)
+            event_component.add('attendee', attendee)
+
+        return event_component.to_ical()
+
     @staticmethod
     def export(event_id):
         """Takes an event id and returns the event in iCal format"""
@@ -25,45 +57,11 @@ class ICalExporter:
         cal.add('x-wr-calname', event.name)
         cal.add('x-wr-caldesc', "Schedule for sessions at " + event.name)
 
-        tz = event.timezone or 'UTC'
-        tz = pytz.timezone(tz)
-
-        sessions = Session.query \
-            .filter_by(event_id=event_id) \
-            .filter_by(state='accepted') \
-            .filter(Session.deleted_at.is_(None)) \
-            .order_by(asc(Session.start_time)).all()
-
-        for session in sessions:
-
-            if session and session.start_time and session.end_time:
-                event_component = icalendar.Event()
-                event_component.add('summary', session.title)
-                event_component.add('uid', str(session.id) + "-" + event.identifier)
-                event_component.add('geo', (event.latitude, event.longitude))
-                event_component.add('location', session.microlocation.name or '' + " " + event.location_name)
-                event_component.add('dtstart', tz.localize(session.start_time))
-                event_component.add('dtend', tz.localize(session.end_time))
-                event_component.add('email', event.email)
-                event_component.add('description', session.short_abstract)
-                event_component.add('url', url_for('event_detail.display_event_detail_home',
-                                                   identifier=event.identifier, _external=True))
-
-                for speaker in session.speakers:
-                    # Ref: http://icalendar.readthedocs.io/en/latest/usage.html#file-structure
-                    # can use speaker.email below but privacy reasons
-                    attendee = vCalAddress('MAILTO:' + event.email if event.email else 'undefined@email.com')
-                    attendee.params['cn'] = vText(speaker.name)
-                    event_component.add('attendee', attendee)
-
-                cal.add_component(event_component)
-
-        return cal.to_ical()
-
+        url = url_for('event_detail.display_event_detail_home',
+                      identifier=event.identifier, _external=True)
+        items = [ICalExporter.get_session_values(event, session, url) for session in load_schedule(event_id)]
+        vevents = render_fragments('ical', items, ICalExporter.render_session)
 
-@speakers_modified.connect
-@sessions_modified.connect
-@event_json_modified.connect
-def ical_export_celery(app, **kwargs):
-    from app.helpers.tasks import export_ical_task
-    export_ical_task.delay(kwargs['event_id'])
+        # the vevents go before the end of the calendar
+        end = 'END:VCALENDAR\r\n'
+        return cal.to_ical()[:-len(end)] + ''.join(vevents) + end
@@ -5,17 +5,10 @@ from pentabarf.Day import Day
 from pentabarf.Event import Event
 from pentabarf.Person import Person
 from pentabarf.Room import Room
-from sqlalchemy import DATE
-from sqlalchemy import asc
-from sqlalchemy import cast
-from sqlalchemy import func
 
-from app import db
 from app.helpers.data_getter import DataGetter
-from app.helpers.exporters.helpers import format_timedelta
-from app.models.session import Session
+from app.helpers.exporters.helpers import format_timedelta, group_schedule, load_schedule
 from app.settings import get_settings
-from app.helpers.signals import event_json_modified, speakers_modified, microlocations_modified, sessions_modified
 
 
 class PentabarfExporter:
@@ -34,29 +27,12 @@ class PentabarfExporter:
                                 days=diff.days if diff.days > 0 else 1,
                                 day_change="00:00", timeslot_duration="00:15",
                                 venue=event.location_name)
-        dates = (db.session.query(cast(Session.start_time, DATE))
-                 .filter_by(event_id=event_id)
-                 .filter_by(state='accepted')
-                 .filter(Session.deleted_at.is_(None))
-                 .order_by(asc(Session.start_time)).distinct().all())
+        url = url_for('event_detail.display_event_detail_home', identifier=event.identifier)
+        full_url = url_for('event_detail.display_event_detail_home', identifier=event.identifier, _external=True)
 
-        for date in dates:
-            date = date[0]
+        for date, rooms in group_schedule(load_schedule(event_id)).items():
             day = Day(date=date)
-            microlocation_ids = list(db.session.query(Session.microlocation_id)
-                                     .filter(func.date(Session.start_time) == date)
-                                     .filter_by(state='accepted')
-                                     .filter(Session.deleted_at.is_(None))
-                                     .order_by(asc(Session.microlocation_id)).distinct())
-            for microlocation_id in microlocation_ids:
-                microlocation_id = microlocation_id[0]
-                microlocation = DataGetter.get_microlocation(microlocation_id)
-                sessions = Session.query.filter_by(microlocation_id=microlocation_id) \
-                    .filter(func.date(Session.start_time) == date) \
-                    .filter_by(state='accepted') \
-                    .filter(Session.deleted_at.is_(None)) \
-                    .order_by(asc(Session.start_time)).all()
-
+            for microlocation, sessions in rooms:
                 room = Room(name=microlocation.name)
                 for session in sessions:
 
@@ -64,15 +40,13 @@ class PentabarfExporter:
                                           date=tz.localize(session.start_time),
                                           start=tz.localize(session.start_time).strftime("%H:%M"),
                                           duration=format_timedelta(session.end_time - session.start_time),
-                                          track=session.track.name,
+                                          track=session.track.name if session.track else None,
                                           abstract=session.short_abstract,
                                           title=session.title,
                                           type='Talk',
                                           description=session.long_abstract,
-                                          conf_url=url_for('event_detail.display_event_detail_home',
-                                                           identifier=event.identifier),
-                                          full_conf_url=url_for('event_detail.display_event_detail_home',
-                                                                identifier=event.identifier, _external=True),
+                                          conf_url=url,
+                                          full_conf_url=full_url,
                                           released="True" if event.schedule_published_on else "False")
 
                     for speaker in session.speakers:
@@ -84,12 +58,3 @@ class PentabarfExporter:
             conference.add_day(day)
 
         return conference.generate("Generated by " + get_settings()['app_name'])
-
-
-@speakers_modified.connect
-@sessions_modified.connect
-@microlocations_modified.connect
-@event_json_modified.connect
-def pentabarf_export_celery(app, **kwargs):
-    from app.helpers.tasks import export_pentabarf_task
-    export_pentabarf_task.delay(kwargs['event_id'])
@@ -0,0 +1,135 @@
+"""
+Regeneration of the iCal, xCal and Pentabarf schedule exports of events.
+
+Changes to an event, its sessions, speakers or microlocations schedule one
+regeneration of all the exports EXPORT_DELAY seconds later, so that a burst
+of edits results in a single run. iCal and xCal are assembled from cached
+per-session fragments (see `render_fragments`) and an export is uploaded
+only when its content changed.
+
+The queued regenerations and the digests of the uploaded exports are kept
+in the database, as the web processes and the celery workers don't share
+a cache.
+"""
+import errno
+import hashlib
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from flask import current_app as app
+from sqlalchemy.exc import IntegrityError
+
+from app.helpers.data import save_to_db
+from app.helpers.data_getter import DataGetter
+from app.helpers.exporters.ical import ICalExporter
+from app.helpers.exporters.pentabarfxml import PentabarfExporter
+from app.helpers.exporters.xcal import XCalExporter
+from app.helpers.signals import event_json_modified, speakers_modified, microlocations_modified, \
+    sessions_modified
+from app.helpers.storage import UPLOAD_PATHS, upload, UploadedFile
+from app.models import db
+from app.models.schedule_export import ScheduleExport, ScheduleExportPending
+
+# seconds between the first change and the regeneration
+EXPORT_DELAY = 60
+# seconds after which a queued regeneration which never ran is given up
+EXPORT_PENDING_TIMEOUT = 15 * 60
+
+# format -> (exporter, file name, event url field)
+EXPORT_FORMATS = {
+    'ical': (ICalExporter, 'ical.ics', 'ical_url'),
+    'xcal': (XCalExporter, 'xcal.xcs', 'xcal_url'),
+    'pentabarf': (PentabarfExporter, 'pentabarf.xml', 'pentabarf_url'),
+}
+
+
+def _mark_pending(event_id):
+    """
+    Records that the regeneration of the exports of an event is queued.
+    False if one already is. Written on its own connection and committed
+    at once, so that the other processes see it.
+    """
+    table = ScheduleExportPending.__table__
+    now = datetime.now()
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(table.delete()
+                               .where(table.c.event_id == event_id)
+                               .where(table.c.scheduled_at < now - timedelta(seconds=EXPORT_PENDING_TIMEOUT)))
+            connection.execute(table.insert(), event_id=event_id, scheduled_at=now)
+    except IntegrityError:
+        return False
+    return True
+
+
+def _clear_pending(event_id):
+    table = ScheduleExportPending.__table__
+    with db.engine.begin() as connection:
+        connection.execute(table.delete().where(table.c.event_id == event_id))
+
+
+def schedule_exports(event_id):
+    """
+    Schedules the regeneration of the exports of an event, unless one is
+    already pending
+    """
+    from app.helpers.tasks import export_schedule_task
+    if _mark_pending(event_id):
+        export_schedule_task.apply_async((event_id,), countdown=EXPORT_DELAY)
+
+
+def regenerate_export(event_id, export_format):
+    """
+    Renders an export of an event and uploads it if it changed since the
+    last upload. Returns True if it was uploaded.
+    """
+    exporter, filename, url_field = EXPORT_FORMATS[export_format]
+    event = DataGetter.get_event(event_id)
+    data = exporter.export(event_id)
+    if isinstance(data, unicode):
+        data = data.encode('utf-8')
+    digest = hashlib.sha1(data).hexdigest()
+    export = ScheduleExport.query.filter_by(event_id=event_id, export_format=export_format).first()
+    if export is None:
+        export = ScheduleExport(event_id=event_id, export_format=export_format)
+    elif getattr(event, url_field) and export.digest == digest:
+        return False
+
+    temp_dir = app.config['TEMP_UPLOADS_FOLDER']
+    try:
+        os.mkdir(temp_dir)
+    except OSError as exc:
+        if exc.errno != errno.EEXIST:
+            raise exc
+    # a file per task, as exports of several events can run at once
+    fd, file_path = tempfile.mkstemp(prefix=export_format, dir=temp_dir)
+    try:
+        with os.fdopen(fd, 'w') as temp_file:
+            temp_file.write(data)
+        uploaded_file = UploadedFile(file_path=file_path, filename=filename)
+        setattr(event, url_field,
+                upload(uploaded_file, UPLOAD_PATHS['exports'][export_format].format(event_id=event_id)))
+        uploaded_file.file.close()
+    finally:
+        os.remove(file_path)
+    export.digest = digest
+    db.session.add(export)
+    save_to_db(event)
+    return True
+
+
+def regenerate_exports(event_id):
+    """Regenerates all the exports of an event"""
+    # changes made from now on, which this run may miss, queue another one
+    _clear_pending(event_id)
+    for export_format in EXPORT_FORMATS:
+        regenerate_export(event_id, export_format)
+
+
+@speakers_modified.connect
+@sessions_modified.connect
+@microlocations_modified.connect
+@event_json_modified.connect
+def schedule_exports_celery(app, **kwargs):
+    schedule_exports(kwargs['event_id'])
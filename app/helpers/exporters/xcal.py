@@ -2,12 +2,9 @@ from xml.etree.ElementTree import Element, SubElement, tostring
 
 import pytz
 from flask import url_for
-from sqlalchemy import asc
 
 from app.helpers.data_getter import DataGetter
-from app.helpers.exporters.helpers import format_timedelta
-from app.models.session import Session
-from app.helpers.signals import event_json_modified, speakers_modified, sessions_modified
+from app.helpers.exporters.helpers import format_timedelta, load_schedule, render_fragments
 
 
 class XCalExporter:
@@ -15,83 +12,84 @@ class XCalExporter:
         pass
 
     @staticmethod
-    def export(event_id):
-        event = DataGetter.get_event(event_id)
-
-        tz = event.timezone or 'UTC'
-        tz = pytz.timezone(tz)
-
-        i_calendar_node = Element('iCalendar')
-        i_calendar_node.set('xmlns:xCal', 'urn:ietf:params:xml:ns:xcal')
-        v_calendar_node = SubElement(i_calendar_node, 'vcalendar')
-        version_node = SubElement(v_calendar_node, 'version')
-        version_node.text = '2.0'
-        prod_id_node = SubElement(v_calendar_node, 'prodid')
-        prod_id_node.text = '-//fossasia//open-event//EN'
-        cal_desc_node = SubElement(v_calendar_node, 'x-wr-caldesc')
-        cal_desc_node.text = "Schedule for sessions at " + event.name
-        cal_name_node = SubElement(v_calendar_node, 'x-wr-calname')
-        cal_name_node.text = event.name
-
-        sessions = Session.query \
-            .filter_by(event_id=event_id) \
-            .filter_by(state='accepted') \
-            .filter(Session.deleted_at.is_(None)) \
-            .order_by(asc(Session.start_time)).all()
+    def get_session_values(event, session, url):
+        """All values the vevent of a session is rendered from"""
+        speakers = tuple(speaker.name for speaker in session.speakers)
+        session_type = session.session_type.name if session.session_type else ''
+        return (session.id, event.identifier, event.timezone or 'UTC', url, session.title,
+                session.microlocation.name, session.start_time, session.end_time,
+                session.short_abstract, session_type, speakers)
 
-        for session in sessions:
+    @staticmethod
+    def render_session(session_id, identifier, timezone, url, title, location, start_time, end_time,
+                       short_abstract, session_type, speakers):
+        """Renders the vevent of a session"""
+        tz = pytz.timezone(timezone)
+        v_event_node = Element('vevent')
 
-            if session and session.start_time and session.end_time:
+        method_node = SubElement(v_event_node, 'method')
+        method_node.text = 'PUBLISH'
 
-                v_event_node = SubElement(v_calendar_node, 'vevent')
+        uid_node = SubElement(v_event_node, 'uid')
+        uid_node.text = str(session_id) + "-" + identifier
 
-                method_node = SubElement(v_event_node, 'method')
-                method_node.text = 'PUBLISH'
+        dtstart_node = SubElement(v_event_node, 'dtstart')
+        dtstart_node.text = tz.localize(start_time).isoformat()
 
-                uid_node = SubElement(v_event_node, 'uid')
-                uid_node.text = str(session.id) + "-" + event.identifier
+        dtend_node = SubElement(v_event_node, 'dtend')
+        dtend_node.text = tz.localize(end_time).isoformat()
 
-                dtstart_node = SubElement(v_event_node, 'dtstart')
-                dtstart_node.text = tz.localize(session.start_time).isoformat()
+        duration_node = SubElement(v_event_node, 'duration')
+        duration_node.text = format_timedelta(end_time - start_time) + "00:00"
 
-                dtend_node = SubElement(v_event_node, 'dtend')
-                dtend_node.text = tz.localize(session.end_time).isoformat()
+        summary_node = SubElement(v_event_node, 'summary')
+        summary_node.text = title
 
-                duration_node = SubElement(v_event_node, 'duration')
-                duration_node.text = format_timedelta(session.end_time - session.start_time) + "00:00"
+        description_node = SubElement(v_event_node, 'description')
+        description_node.text = short_abstract or 'N/A'
 
-                summary_node = SubElement(v_event_node, 'summary')
-                summary_node.text = session.title
+        class_node = SubElement(v_event_node, 'class')
+        class_node.text = 'PUBLIC'
 
-                description_node = SubElement(v_event_node, 'description')
-                description_node.text = session.short_abstract or 'N/A'
+        status_node = SubElement(v_event_node, 'status')
+        status_node.text = 'CONFIRMED'
 
-                class_node = SubElement(v_event_node, 'class')
-                class_node.text = 'PUBLIC'
+        categories_node = SubElement(v_event_node, 'categories')
+        categories_node.text = session_type
 
-                status_node = SubElement(v_event_node, 'status')
-                status_node.text = 'CONFIRMED'
+        url_node = SubElement(v_event_node, 'url')
+        url_node.text = url
 
-                categories_node = SubElement(v_event_node, 'categories')
-                categories_node.text = session.session_type.name if session.session_type else ''
+        location_node = SubElement(v_event_node, 'location')
+        location_node.text = location
 
-                url_node = SubElement(v_event_node, 'url')
-                url_node.text = url_for('event_detail.display_event_detail_home',
-                                        identifier=event.identifier, _external=True)
+        for speaker in speakers:
+            attendee_node = SubElement(v_event_node, 'attendee')
+            attendee_node.text = speaker
 
-                location_node = SubElement(v_event_node, 'location')
-                location_node.text = session.microlocation.name
+        return tostring(v_event_node)
 
-                for speaker in session.speakers:
-                    attendee_node = SubElement(v_event_node, 'attendee')
-                    attendee_node.text = speaker.name
+    @staticmethod
+    def export(event_id):
+        event = DataGetter.get_event(event_id)
 
-        return tostring(i_calendar_node)
+        i_calendar_node = Element('iCalendar')
+        i_calendar_node.set('xmlns:xCal', 'urn:ietf:params:xml:ns:xcal')
+        v_calendar_node = SubElement(i_calendar_node, 'vcalendar')
+        version_node = SubElement(v_calendar_node, 'version')
+        version_node.text = '2.0'
+        prod_id_node = SubElement(v_calendar_node, 'prodid')
+        prod_id_node.text = '-//fossasia//open-event//EN'
+        cal_desc_node = SubElement(v_calendar_node, 'x-wr-caldesc')
+        cal_desc_node.text = "Schedule for sessions at " + event.name
+        cal_name_node = SubElement(v_calendar_node, 'x-wr-calname')
+        cal_name_node.text = event.name
 
+        url = url_for('event_detail.display_event_detail_home',
+                      identifier=event.identifier, _external=True)
+        items = [XCalExporter.get_session_values(event, session, url) for session in load_schedule(event_id)]
+        vevents = render_fragments('xcal', items, XCalExporter.render_session)
 
-@speakers_modified.connect
-@sessions_modified.connect
-@event_json_modified.connect
-def xcal_export_celery(app, **kwargs):
-    from app.helpers.tasks import export_xcal_task
-    export_xcal_task.delay(kwargs['event_id'])
+        # the vevents go at the end of the vcalendar
+        head, tail = tostring(i_calendar_node).rsplit('</vcalendar>', 1)
+        return head + ''.join(vevents) + '</vcalendar>' + tail
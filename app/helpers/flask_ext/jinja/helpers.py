@@ -1,10 +1,7 @@
-import base64
 from datetime import datetime, timedelta
 
-import qrcode
-from StringIO import StringIO
-
-from app.helpers.payment import forex
+from app.helpers.payment import convert_currency
+from app.helpers.qr import get_qr
 from app.helpers.data_getter import DataGetter
 
 
@@ -26,29 +23,13 @@ def init_helpers(app):
         def current_date(format='%a, %B %d %I:%M %p', **kwargs):
             return (datetime.now() + timedelta(**kwargs)).strftime(format)
 
-        def generate_qr(text):
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=0,
-            )
-            qr.add_data(text)
-            qr.make(fit=True)
-            img = qr.make_image()
-
-            buffer = StringIO()
-            img.save(buffer, format="JPEG")
-            img_str = base64.b64encode(buffer.getvalue())
-            return img_str
-
         return dict(
             string_empty=string_empty,
             current_date=current_date,
-            forex=forex,
+            forex=convert_currency,
             locations=get_locations_of_events,
             get_fee=get_fee,
-            generate_qr=generate_qr
+            generate_qr=get_qr
         )
 
     @app.context_processor
@@ -1,8 +1,10 @@
 from datetime import datetime
 
 from flask import request
+from werkzeug.local import LocalProxy
 
 from app.helpers.babel import babel
+from app.helpers.cached_getter import CachedGetter
 from app.helpers.data_getter import DataGetter
 from app.settings import get_settings
 from config import LANGUAGES
@@ -16,20 +18,36 @@ def get_locale():
         return request.accept_languages.best_match(LANGUAGES.keys())
 
 
+def lazy(func):
+    """
+    Returns a proxy which calls `func` only when a template first uses it
+    """
+    value = []
+
+    def get_value():
+        if not value:
+            value.append(func())
+        return value[0]
+
+    return LocalProxy(get_value)
+
+
 def init_variables(app):
     @app.context_processor
     def template_context():
+        locale = get_locale()
+        settings = lazy(get_settings)
         return dict(
             all_languages=LANGUAGES,
-            selected_lang=get_locale(),
-            settings=get_settings(),
-            app_name=get_settings()['app_name'],
-            tagline=get_settings()['tagline'],
-            event_typo=DataGetter.get_event_types()[:10],
+            selected_lang=locale,
+            settings=settings,
+            app_name=lazy(lambda: settings['app_name']),
+            tagline=lazy(lambda: settings['tagline']),
+            event_typo=lazy(lambda: DataGetter.get_event_types()[:10]),
             base_dir=app.config['BASE_DIR'],
-            system_pages=DataGetter.get_all_pages(get_locale()),
+            system_pages=lazy(lambda: CachedGetter.get_all_pages(locale)),
             datetime_now=datetime.now(),
-            logo=DataGetter.get_custom_placeholder_by_name('Logo'),
-            avatar=DataGetter.get_custom_placeholder_by_name('Avatar'),
+            logo=lazy(lambda: CachedGetter.get_custom_placeholder_by_name('Logo')),
+            avatar=lazy(lambda: CachedGetter.get_custom_placeholder_by_name('Avatar')),
             integrate_socketio=app.config.get('INTEGRATE_SOCKETIO', False)
         )
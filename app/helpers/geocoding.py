@@ -0,0 +1,144 @@
+"""
+Geocoding with a persistent cache and proximity queries on events.
+
+Responses of the Google geocoding API are stored in `GeocodeCache`, so a
+location is looked up over HTTP only once. Failed requests are not stored
+and are retried on the next lookup. Entries are written on their own
+connection, so a lookup never commits or rolls back the session of the
+request it is made in.
+"""
+import math
+
+import requests
+from requests.exceptions import RequestException
+from sqlalchemy import and_, case
+from sqlalchemy.exc import IntegrityError
+
+from app.helpers.cache import cache
+from app.models import db
+from app.models.event import Event
+from app.models.geocode import GeocodeCache
+
+GEOCODE_URL = 'https://maps.googleapis.com/maps/api/geocode/json'
+GEOCODE_TIMEOUT = 5
+# statuses which are answers and not errors of the API
+FINAL_STATUSES = (u'OK', u'ZERO_RESULTS')
+# decimals kept from coordinates in reverse lookups (~11 m)
+LATLNG_PRECISION = 4
+
+KM_PER_DEGREE = 111.045
+# radius of proximity searches, close to the ±0.25° box used before
+DEFAULT_RADIUS_KM = 28
+
+
+def _request(params):
+    try:
+        return requests.get(GEOCODE_URL, params, timeout=GEOCODE_TIMEOUT).json()
+    except (RequestException, ValueError):
+        return None
+
+
+def _get_locality(result):
+    for addr in result.get('address_components', []):
+        if addr['types'] == ['locality', 'political']:
+            return addr['long_name']
+    return None
+
+
+def _lookup(lookup, params):
+    """
+    Returns the cache entry of `lookup`, calling the API with `params` if
+    it isn't cached yet. None if the API couldn't be reached.
+    """
+    entry = GeocodeCache.query.filter_by(lookup=lookup).first()
+    if entry:
+        return entry
+    response = _request(params)
+    if not response or response.get('status') not in FINAL_STATUSES:
+        return None
+    entry = GeocodeCache(lookup=lookup, status=response['status'])
+    if response['status'] == u'OK':
+        result = response['results'][0]
+        entry.latitude = result['geometry']['location']['lat']
+        entry.longitude = result['geometry']['location']['lng']
+        entry.locality = _get_locality(result)
+    _store(entry)
+    return entry
+
+
+def _store(entry):
+    """
+    Inserts a cache entry in a transaction of its own. An entry stored by a
+    concurrent lookup of the same location is kept.
+    """
+    values = {column.key: getattr(entry, column.key)
+              for column in GeocodeCache.__table__.columns if column.key != 'id'}
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(GeocodeCache.__table__.insert(), values)
+    except IntegrityError:
+        pass
+
+
+@cache.memoize(3600)
+def geocode(address):
+    """
+    Returns a dict of 'lat' and 'lng' of an address. None if not found.
+    """
+    if not address or not address.strip():
+        return None
+    entry = _lookup(u'address:' + address.strip().lower(), {'address': address})
+    if entry and entry.status == u'OK':
+        return {'lat': entry.latitude, 'lng': entry.longitude}
+    return None
+
+
+@cache.memoize(3600)
+def get_locality(latitude, longitude):
+    """
+    Returns the city of a point. None if not found.
+    """
+    if latitude is None or longitude is None:
+        return None
+    latlng = '{},{}'.format(round(float(latitude), LATLNG_PRECISION), round(float(longitude), LATLNG_PRECISION))
+    entry = _lookup(u'latlng:' + latlng, {'latlng': latlng})
+    return entry.locality if entry else None
+
+
+def get_bounding_box(lat, lng, radius_km=DEFAULT_RADIUS_KM):
+    """
+    Returns (min lat, max lat, min lng, max lng) of the box around a point
+    """
+    lat_delta = radius_km / KM_PER_DEGREE
+    lng_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    return lat - lat_delta, lat + lat_delta, lng - lng_delta, lng + lng_delta
+
+
+def get_distance_expression(lat, lng):
+    """
+    SQL expression of the squared distance of events from a point, in km.
+    Equirectangular approximation, which is accurate at city scale and
+    only needs arithmetic so it runs on any database.
+    """
+    lng_scale = math.cos(math.radians(lat))
+    return ((Event.latitude - lat) * KM_PER_DEGREE) * ((Event.latitude - lat) * KM_PER_DEGREE) + \
+        ((Event.longitude - lng) * KM_PER_DEGREE * lng_scale) * ((Event.longitude - lng) * KM_PER_DEGREE * lng_scale)
+
+
+def get_query_close_area(lng, lat, radius_km=DEFAULT_RADIUS_KM):
+    """
+    Returns the condition for events within `radius_km` of a point. The
+    bounding box conditions use the index on latitude and longitude.
+    """
+    min_lat, max_lat, min_lng, max_lng = get_bounding_box(lat, lng, radius_km)
+    return and_(Event.latitude >= min_lat,
+                Event.latitude <= max_lat,
+                Event.longitude >= min_lng,
+                Event.longitude <= max_lng,
+                get_distance_expression(lat, lng) <= radius_km * radius_km)
+
+
+def order_by_distance(query, lng, lat):
+    """Orders events closest first, events without coordinates last"""
+    return query.order_by(case([(Event.latitude.is_(None), 1)], else_=0),
+                          get_distance_expression(lat, lng))
@@ -1,11 +1,19 @@
+import random
 from datetime import timedelta, datetime
 
 from app.helpers.data import save_to_db
 from app.helpers.helpers import update_state
+from app.models import db
+from app.models.microlocation import Microlocation
 from app.models.role import Role
+from app.models.session_type import SessionType
+from app.models.track import Track
 from app.models.user import ORGANIZER
 from app.models.users_events_roles import UsersEventsRoles
 
+# sessions committed at a time by importers
+IMPORT_BATCH = 200
+
 
 def string_to_timedelta(string):
     if string:
@@ -36,3 +44,83 @@ def get_valid_event_name(value):
         else:
             name = value
     return name
+
+
+def get_track_color(name):
+    """Color of a track, always the same for a name"""
+    seed = int('100'.join(list(str(ord(character)) for character in name)))
+    random.seed(seed)
+    return "#%06x" % random.randint(0, 0xFFFFFF)
+
+
+def get_speaker_email(name, event_name):
+    """Placeholder email of a speaker whose email isn't known"""
+    name_mix = name + ' ' + event_name
+    return ''.join(x for x in name_mix.title() if not x.isspace()) + '@example.com'
+
+
+class SessionBatch(object):
+    """
+    Adds the sessions of an imported event.
+
+    Tracks, microlocations and session types are looked up by name in
+    memory and created once. Sessions are committed IMPORT_BATCH at a time,
+    so an import holds at most one batch in the session. The event span is
+    extended to cover the sessions added.
+    """
+
+    def __init__(self, event, task_handle=None):
+        self.event = event
+        self.task_handle = task_handle
+        self.tracks = {}
+        self.microlocations = {}
+        self.session_types = {}
+        self.pending = 0
+        self.count = 0
+        self.span = None
+
+    def _get_id(self, cache, model, name, **kwargs):
+        if name not in cache:
+            obj = model(name=name, event_id=self.event.id, **kwargs)
+            db.session.add(obj)
+            db.session.flush()
+            cache[name] = obj.id
+        return cache[name]
+
+    def get_track_id(self, name):
+        if not name:
+            return None
+        return self._get_id(self.tracks, Track, name, color=get_track_color(name))
+
+    def get_microlocation_id(self, name):
+        return self._get_id(self.microlocations, Microlocation, name)
+
+    def get_session_type_id(self, name, length):
+        if not name:
+            return None
+        return self._get_id(self.session_types, SessionType, name, length=length)
+
+    def add(self, session, speakers=()):
+        session.event_id = self.event.id
+        session.state = 'accepted'
+        session.speakers = []
+        for speaker in speakers:
+            speaker.event_id = self.event.id
+            session.speakers.append(speaker)
+        db.session.add(session)
+        if self.span is None:
+            self.span = [session.start_time, session.end_time]
+        else:
+            self.span = [min(self.span[0], session.start_time), max(self.span[1], session.end_time)]
+        self.pending += 1
+        self.count += 1
+        if self.pending >= IMPORT_BATCH:
+            self.commit()
+
+    def commit(self):
+        """Commits the pending sessions"""
+        if self.span:
+            self.event.start_time, self.event.end_time = self.span
+        db.session.commit()
+        self.pending = 0
+        update_status(self.task_handle, 'Added %d sessions' % self.count)
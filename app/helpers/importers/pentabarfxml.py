@@ -1,16 +1,40 @@
-import random
+from datetime import datetime
 
-from pentabarf.PentabarfParser import PentabarfParser
+from defusedxml.ElementTree import iterparse
 
-from app.helpers.data import get_or_create, save_to_db
-from app.helpers.importers.helpers import update_status, string_to_timedelta, own_event
+from app.helpers.data import save_to_db
+from app.helpers.importers.helpers import update_status, string_to_timedelta, own_event, \
+    get_speaker_email, SessionBatch
 from app.models import db
 from app.models.event import Event
-from app.models.microlocation import Microlocation
 from app.models.session import Session
-from app.models.session_type import SessionType
 from app.models.speaker import Speaker
-from app.models.track import Track
+
+
+def get_text(element, name):
+    sub_element = element.find(name)
+    if sub_element is not None:
+        return sub_element.text
+    return None
+
+
+def get_link_urls(event_element):
+    """
+    Returns the video, audio and slides urls among the links of an event
+    """
+    video_url = audio_url = slides_url = None
+    links_element = event_element.find('links')
+    if links_element is None:
+        return video_url, audio_url, slides_url
+    for link_element in links_element.findall('link'):
+        link_url = link_element.get('href') or ''
+        if not video_url and any(_ in link_url for _ in ('mp4', 'webm', 'youtube', 'avi')):
+            video_url = link_url
+        if not audio_url and any(_ in link_url for _ in ('mp3', 'wav', 'soundcloud')):
+            audio_url = link_url
+        if not slides_url and any(_ in link_url for _ in ('ppt', 'pptx', 'slide')):
+            slides_url = link_url
+    return video_url, audio_url, slides_url
 
 
 class PentabarfImporter:
@@ -18,86 +42,88 @@ class PentabarfImporter:
         pass
 
     @staticmethod
-    def import_data(file_path, creator_id, task_handle):
-
-        with open(file_path, 'r') as xml_file:
-            string = xml_file.read().replace('\n', '')
-
-        update_status(task_handle, 'Parsing XML file')
-        conference_object = PentabarfParser.parse(string)
-        update_status(task_handle, 'Processing event')
+    def create_event(conference_element):
         event = Event()
-        event.start_time = conference_object.start
-        event.end_time = conference_object.end
+        event.name = get_text(conference_element, 'title')
+        event.start_time = datetime.strptime(get_text(conference_element, 'start'), '%Y-%m-%d')
+        event.end_time = datetime.strptime(get_text(conference_element, 'end'), '%Y-%m-%d')
         event.has_session_speakers = True
-        event.name = conference_object.title
-        event.location_name = conference_object.venue  # + ', ' + conference_object.city
-        event.searchable_location_name = conference_object.city
+        event.location_name = get_text(conference_element, 'venue')  # + ', ' + city
+        event.searchable_location_name = get_text(conference_element, 'city')
         event.state = 'Published'
         event.privacy = 'public'
         db.session.add(event)
-        event_time_updated = False
-        update_status(task_handle, 'Adding sessions')
-        for day_object in conference_object.day_objects:
-            for room_object in day_object.room_objects:
-                microlocation, _ = get_or_create(Microlocation, event_id=event.id, name=room_object.name)
-                for event_object in room_object.event_objects:
-                    session_type_id = None
-                    if event_object.type:
-                        session_type, _ = get_or_create(SessionType, event_id=event.id,
-                                                        name=event_object.type, length=str(30))  # TODO: hardcoded here
-                        session_type_id = session_type.id
-                    track_id = None
-                    if event_object.track:
-                        string_to_hash = event_object.track
-                        seed = int('100'.join(list(str(ord(character)) for character in string_to_hash)))
-                        random.seed(seed)
-                        color = "#%06x" % random.randint(0, 0xFFFFFF)
-                        track, _ = get_or_create(Track, event_id=event.id, name=event_object.track, color=color)
-                        track_id = track.id
-
-                    session = Session()
-                    session.track_id = track_id
-                    session.microlocation_id = microlocation.id
-                    session.session_type_id = session_type_id
-                    session.title = event_object.title
-                    session.short_abstract = event_object.abstract
-                    session.long_abstract = event_object.description
-                    session.level = getattr(event_object, 'level', None)  # https://github.com/niranjan94/python-pentabarf-xml/issues/3
-                    session.start_time = event_object.date + string_to_timedelta(event_object.start)
-                    session.end_time = session.start_time + string_to_timedelta(event_object.duration)
-                    session.slides = event_object.slides_url
-                    session.video = event_object.video_url
-                    session.audio = event_object.audio_url
-                    session.signup_url = event_object.conf_url
-                    session.event_id = event.id
-                    session.state = 'accepted'
-                    session.speakers = []
-                    save_to_db(session, 'Session Updated')
+        db.session.flush()
+        return event
 
-                    if not event_time_updated:
-                        event.start_time = None
-                        event.end_time = None
-                        event_time_updated = True
+    @staticmethod
+    def add_session(batch, event_element, date, room_name):
+        event = batch.event
+        session = Session()
+        session.track_id = batch.get_track_id(get_text(event_element, 'track'))
+        session.microlocation_id = batch.get_microlocation_id(room_name)
+        session.session_type_id = batch.get_session_type_id(get_text(event_element, 'type'),
+                                                            str(30))  # TODO: hardcoded here
+        session.title = get_text(event_element, 'title')
+        session.short_abstract = get_text(event_element, 'abstract')
+        session.long_abstract = get_text(event_element, 'description')
+        session.level = get_text(event_element, 'level')
+        session.start_time = date + string_to_timedelta(get_text(event_element, 'start'))
+        session.end_time = session.start_time + string_to_timedelta(get_text(event_element, 'duration'))
+        session.video, session.audio, session.slides = get_link_urls(event_element)
+        session.signup_url = get_text(event_element, 'conf_url')
 
-                    if not event.start_time or session.start_time < event.start_time:
-                        event.start_time = session.start_time
-                    if not event.end_time or session.end_time > event.end_time:
-                        event.end_time = session.end_time
+        speakers = []
+        persons_element = event_element.find('persons')
+        if persons_element is not None:
+            for person_element in persons_element.findall('person'):
+                speakers.append(Speaker(name=person_element.text,
+                                        email=get_speaker_email(person_element.text, event.name),
+                                        country='Earth',
+                                        organisation=''))
+        batch.add(session, speakers)
 
-                    for person_object in event_object.person_objects:
-                        name_mix = person_object.name + ' ' + conference_object.title
-                        email = ''.join(x for x in name_mix.title() if not x.isspace()) + '@example.com'
-                        speaker = Speaker(name=person_object.name, event_id=event.id, email=email,
-                                          country='Earth',
-                                          organisation='')
-                        db.session.add(speaker)
-                        session.speakers.append(speaker)
-                        db.session.commit()
+    @staticmethod
+    def import_data(file_path, creator_id, task_handle):
+        """
+        Parses the XML incrementally, each <event> is added as a session
+        and dropped as soon as it is read. The room of a session is the
+        <room> of the <day> holding it, not the <room> child of the <event>
+        written by frab.
+        """
+        update_status(task_handle, 'Parsing XML file')
+        event = None
+        batch = None
+        date = None
+        room_name = None
+        tags = []
+        with open(file_path, 'r') as xml_file:
+            for action, element in iterparse(xml_file, events=('start', 'end')):
+                if action == 'start':
+                    if element.tag == 'day':
+                        date = datetime.strptime(element.get('date'), '%Y-%m-%d')
+                    elif element.tag == 'room' and tags and tags[-1] == 'day':
+                        room_name = element.get('name')
+                    tags.append(element.tag)
+                    continue
+                tags.pop()
+                if element.tag == 'conference':
+                    update_status(task_handle, 'Processing event')
+                    event = PentabarfImporter.create_event(element)
+                    batch = SessionBatch(event, task_handle)
+                    update_status(task_handle, 'Adding sessions')
+                    element.clear()
+                elif element.tag == 'event' and batch:
+                    PentabarfImporter.add_session(batch, element, date, room_name)
+                    element.clear()
+                elif element.tag in ('room', 'day'):
+                    element.clear()
 
-                    update_status(task_handle, 'Added session "' + session.title + '"')
+        if event is None:
+            raise ValueError('No conference in Pentabarf XML file')
 
         update_status(task_handle, 'Saving data')
+        batch.commit()
         save_to_db(event)
         update_status(task_handle, 'Finalizing')
         own_event(event=event, user_id=creator_id)
@@ -1 +1,164 @@
-# TODO
+from datetime import datetime
+
+from defusedxml.ElementTree import iterparse
+
+from app.helpers.data import save_to_db
+from app.helpers.importers.helpers import get_valid_event_name, own_event, update_status, \
+    get_speaker_email, SessionBatch
+from app.models import db
+from app.models.event import Event
+from app.models.session import Session
+from app.models.speaker import Speaker
+
+# properties of the calendar used for the event
+CALENDAR_PROPERTIES = ('x-wr-calname', 'x-wr-caldesc', 'x-wr-timezone')
+
+
+def local_name(element):
+    """Tag of an element without its namespace"""
+    return element.tag.rsplit('}', 1)[-1].lower()
+
+
+def get_value(element):
+    """
+    Text of a property. Values wrapped in a type element (<text>,
+    <date-time>...) as in RFC 6321 are supported too.
+    """
+    if element.text and element.text.strip():
+        return element.text.strip()
+    for child in element:
+        if child.text and child.text.strip():
+            return child.text.strip()
+    return None
+
+
+def get_parameter(element, name):
+    """
+    Value of a parameter of a property. RFC 6321 puts them in the
+    <parameters> element of the property.
+    """
+    for child in element:
+        if local_name(child) == 'parameters':
+            for parameter in child:
+                if local_name(parameter) == name:
+                    return get_value(parameter)
+    return None
+
+
+def get_properties(vevent):
+    """dict of property name -> list of property elements of a vevent"""
+    properties = {}
+    for element in vevent.iter():
+        if element is not vevent:
+            properties.setdefault(local_name(element), []).append(element)
+    return properties
+
+
+def get_property(properties, name):
+    elements = properties.get(name)
+    return get_value(elements[0]) if elements else None
+
+
+def parse_datetime(value):
+    """
+    Local time of an xCal date-time. Sessions are stored in the local time
+    of the event, so the offset is dropped.
+    """
+    if not value:
+        return None
+    value = value.replace('-', '').replace(':', '')[:15]
+    if 'T' in value:
+        return datetime.strptime(value, '%Y%m%dT%H%M%S')
+    return datetime.strptime(value[:8], '%Y%m%d')
+
+
+class XCalImporter:
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def create_event(calendar, first_properties):
+        event = Event()
+        event.name = get_valid_event_name(calendar.get('x-wr-calname'))
+        if not event.name:
+            event.name = get_valid_event_name(calendar.get('x-wr-caldesc'))
+        if not event.name:
+            event.name = get_valid_event_name(get_property(first_properties, 'uid'))
+        if not event.name:
+            event.name = 'Un-named Event'
+        if calendar.get('x-wr-timezone'):
+            event.timezone = calendar['x-wr-timezone']
+        # the span of the sessions is set while adding them
+        event.start_time = parse_datetime(get_property(first_properties, 'dtstart'))
+        event.end_time = parse_datetime(get_property(first_properties, 'dtend'))
+        event.has_session_speakers = True
+        event.state = 'Published'
+        event.privacy = 'public'
+        db.session.add(event)
+        db.session.flush()
+        return event
+
+    @staticmethod
+    def add_session(batch, properties):
+        session = Session()
+        session.track_id = batch.get_track_id(get_property(properties, 'categories'))
+        session.microlocation_id = batch.get_microlocation_id(get_property(properties, 'location'))
+        session.title = get_property(properties, 'summary')
+        session.short_abstract = get_property(properties, 'description')
+        session.start_time = parse_datetime(get_property(properties, 'dtstart'))
+        session.end_time = parse_datetime(get_property(properties, 'dtend'))
+        session.signup_url = get_property(properties, 'url')
+
+        speakers = []
+        for attendee in properties.get('attendee', []):
+            value = get_value(attendee)
+            if not value:
+                continue
+            if value.lower().startswith('mailto:'):
+                name = get_parameter(attendee, 'cn') or value[7:]
+                email = value[7:]
+            else:
+                name = value
+                email = get_speaker_email(name, batch.event.name)
+            speakers.append(Speaker(name=name, email=email, country='Earth', organisation=''))
+        batch.add(session, speakers)
+
+    @staticmethod
+    def import_data(file_path, creator_id, task_handle):
+        """
+        Parses the XML incrementally, each vevent is added as a session and
+        dropped as soon as it is read
+        """
+        update_status(task_handle, 'Parsing xCal file')
+        calendar = {}
+        event = None
+        batch = None
+        depth = 0
+        with open(file_path, 'r') as xml_file:
+            for action, element in iterparse(xml_file, events=('start', 'end')):
+                name = local_name(element)
+                if name == 'vevent':
+                    depth += 1 if action == 'start' else -1
+                if action == 'start':
+                    continue
+                if name == 'vevent':
+                    properties = get_properties(element)
+                    if event is None:
+                        update_status(task_handle, 'Processing event')
+                        event = XCalImporter.create_event(calendar, properties)
+                        batch = SessionBatch(event, task_handle)
+                        update_status(task_handle, 'Adding sessions')
+                    XCalImporter.add_session(batch, properties)
+                    element.clear()
+                elif not depth and name in CALENDAR_PROPERTIES:
+                    calendar[name] = get_value(element)
+
+        if event is None:
+            raise ValueError('No vevent in xCal file')
+
+        update_status(task_handle, 'Saving data')
+        batch.commit()
+        save_to_db(event)
+        update_status(task_handle, 'Finalizing')
+        own_event(event=event, user_id=creator_id)
+        return event
@@ -0,0 +1,201 @@
+"""
+Request metrics by endpoint.
+
+A sample of the requests (INSTRUMENTATION_SAMPLE_RATE) records its number of
+queries, the time spent in the database, rendering templates and
+marshalling API responses, and its cache hits and misses. Totals by
+endpoint are kept in the process and shown in the reports panel and as
+Prometheus metrics. Requests running more queries than the budget of their
+endpoint (QUERY_BUDGETS, DEFAULT_QUERY_BUDGET) are logged.
+"""
+import logging
+import random
+import threading
+import time
+
+import flask_restplus.marshalling
+from flask import current_app as app, g, has_request_context, request, before_render_template, \
+    template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# totals kept by endpoint
+METRIC_FIELDS = ('requests', 'duration', 'queries', 'db_time', 'render_time', 'marshal_time',
+                 'cache_hits', 'cache_misses', 'budget_violations')
+
+# prometheus name, field, type, help
+PROMETHEUS_METRICS = (
+    ('requests_total', 'requests', 'counter', 'Sampled requests'),
+    ('request_duration_seconds_total', 'duration', 'counter', 'Time spent handling sampled requests'),
+    ('request_queries_total', 'queries', 'counter', 'Database queries of sampled requests'),
+    ('request_queries_max', 'max_queries', 'gauge', 'Most database queries run by one sampled request'),
+    ('request_db_seconds_total', 'db_time', 'counter', 'Time spent in the database by sampled requests'),
+    ('request_render_seconds_total', 'render_time', 'counter', 'Time spent rendering templates by sampled requests'),
+    ('request_marshal_seconds_total', 'marshal_time', 'counter', 'Time spent marshalling by sampled requests'),
+    ('cache_hits_total', 'cache_hits', 'counter', 'Cache hits of sampled requests'),
+    ('cache_misses_total', 'cache_misses', 'counter', 'Cache misses of sampled requests'),
+    ('query_budget_violations_total', 'budget_violations', 'counter', 'Sampled requests over their query budget'),
+)
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+class RequestMetrics(object):
+    """Metrics of one request"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.marshal_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # start times of the templates being rendered
+        self.renders = []
+        # nested marshal calls running
+        self.marshal_depth = 0
+
+
+def get_request_metrics():
+    """Metrics of the current request, None if it isn't sampled"""
+    if not has_request_context():
+        return None
+    return getattr(g, 'request_metrics', None)
+
+
+def record_cache_lookups(hits, misses):
+    metrics = get_request_metrics()
+    if metrics:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+def get_query_budget(endpoint):
+    return app.config['QUERY_BUDGETS'].get(endpoint, app.config['DEFAULT_QUERY_BUDGET'])
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if get_request_metrics():
+        conn.info.setdefault('query_started', []).append(time.time())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = get_request_metrics()
+    started = conn.info.get('query_started')
+    if metrics and started:
+        metrics.queries += 1
+        metrics.db_time += time.time() - started.pop()
+
+
+def _before_render_template(sender, template, context, **extra):
+    metrics = get_request_metrics()
+    if metrics:
+        metrics.renders.append(time.time())
+
+
+def _template_rendered(sender, template, context, **extra):
+    metrics = get_request_metrics()
+    if metrics and metrics.renders:
+        started = metrics.renders.pop()
+        # templates rendered while rendering another one are counted in it
+        if not metrics.renders:
+            metrics.render_time += time.time() - started
+
+
+def _timed(marshal):
+    def timed_marshal(*args, **kwargs):
+        metrics = get_request_metrics()
+        if not metrics:
+            return marshal(*args, **kwargs)
+        metrics.marshal_depth += 1
+        started = time.time()
+        try:
+            return marshal(*args, **kwargs)
+        finally:
+            metrics.marshal_depth -= 1
+            if not metrics.marshal_depth:
+                metrics.marshal_time += time.time() - started
+    timed_marshal.original = marshal
+    return timed_marshal
+
+
+def start_request():
+    if random.random() < app.config['INSTRUMENTATION_SAMPLE_RATE']:
+        g.request_metrics = RequestMetrics()
+
+
+def finish_request(response):
+    metrics = get_request_metrics()
+    if not metrics:
+        return response
+    g.request_metrics = None
+    # requests to unknown urls are counted together
+    endpoint = request.endpoint or 'unmatched'
+    budget = get_query_budget(endpoint)
+    over_budget = budget is not None and metrics.queries > budget
+    if over_budget:
+        logging.warning('QUERY BUDGET: %s ran %d queries, budget is %d (%s %s)' % (
+            endpoint, metrics.queries, budget, request.method, request.path))
+    values = {
+        'requests': 1,
+        'duration': time.time() - metrics.started,
+        'queries': metrics.queries,
+        'db_time': metrics.db_time,
+        'render_time': metrics.render_time,
+        'marshal_time': metrics.marshal_time,
+        'cache_hits': metrics.cache_hits,
+        'cache_misses': metrics.cache_misses,
+        'budget_violations': int(over_budget),
+    }
+    with _stats_lock:
+        stats = _stats.setdefault(endpoint, dict.fromkeys(METRIC_FIELDS + ('max_queries',), 0))
+        for field in METRIC_FIELDS:
+            stats[field] += values[field]
+        stats['max_queries'] = max(stats['max_queries'], metrics.queries)
+    return response
+
+
+def get_endpoint_stats():
+    """
+    :return: list of (endpoint, totals) ordered by endpoint, totals being a
+    dict of METRIC_FIELDS and max_queries
+    """
+    with _stats_lock:
+        return [(endpoint, dict(stats)) for endpoint, stats in sorted(_stats.items())]
+
+
+def reset_endpoint_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus():
+    """Endpoint totals in the Prometheus text format"""
+    stats = get_endpoint_stats()
+    lines = ['# HELP openevent_instrumentation_sample_rate Share of the requests sampled',
+             '# TYPE openevent_instrumentation_sample_rate gauge',
+             'openevent_instrumentation_sample_rate %s' % app.config['INSTRUMENTATION_SAMPLE_RATE']]
+    for name, field, metric_type, description in PROMETHEUS_METRICS:
+        lines.append('# HELP openevent_%s %s' % (name, description))
+        lines.append('# TYPE openevent_%s %s' % (name, metric_type))
+        for endpoint, totals in stats:
+            lines.append('openevent_%s{endpoint="%s"} %s' % (name, _escape_label(endpoint), totals[field]))
+    return '\n'.join(lines) + '\n'
+
+
+def init_instrumentation(app):
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render_template, app)
+    template_rendered.connect(_template_rendered, app)
+    if not hasattr(flask_restplus.marshalling.marshal, 'original'):
+        # marshal_with and nested fields call the module function
+        flask_restplus.marshalling.marshal = _timed(flask_restplus.marshalling.marshal)
@@ -1,4 +1,5 @@
 import urlparse
+from datetime import datetime
 from urllib import urlencode
 
 import requests
@@ -11,13 +12,19 @@ from app.helpers.cache import cache
 from app.helpers.data import save_to_db
 from app.helpers.data_getter import DataGetter
 from app.helpers.helpers import represents_int
+from app.models import db
 from app.models.fees import TicketFees
+from app.models.forex_rate import ForexRate
 from app.models.order import Order
 from app.models.stripe_authorization import StripeAuthorization
 from app.settings import get_settings
 
 DEFAULT_FEE = 0.0
 
+# Currency of the super admin reports
+REPORTS_CURRENCY = 'USD'
+FOREX_RATE_TIMEOUT = 300
+
 
 @cache.memoize(5)
 def forex(from_currency, to_currency, amount):
@@ -28,6 +35,52 @@ def forex(from_currency, to_currency, amount):
         return amount
 
 
+@cache.memoize(FOREX_RATE_TIMEOUT)
+def get_forex_rate(from_currency, to_currency):
+    """
+    Returns the stored conversion rate between two currencies. None if
+    it hasn't been fetched yet.
+    """
+    rate = ForexRate.query.filter_by(from_currency=from_currency, to_currency=to_currency).first()
+    return rate.rate if rate else None
+
+
+def convert_currency(from_currency, to_currency, amount):
+    """
+    Converts amount using the stored rates which are refreshed by a
+    scheduled job. Falls back to `forex` for pairs not fetched yet.
+    """
+    if not amount or not from_currency or from_currency == to_currency:
+        return amount
+    rate = get_forex_rate(from_currency, to_currency)
+    if rate is None:
+        return forex(from_currency, to_currency, amount)
+    return amount * rate
+
+
+def update_forex_rates(currencies, to_currency=REPORTS_CURRENCY):
+    """
+    Fetches and stores the rates of `currencies` to `to_currency`.
+    Currencies whose rate can't be fetched keep their old rate.
+    """
+    currency_rates = CurrencyRates()
+    for currency in set(currencies):
+        if not currency or currency == to_currency:
+            continue
+        try:
+            value = currency_rates.get_rate(currency, to_currency)
+        except Exception:
+            continue
+        rate = ForexRate.query.filter_by(from_currency=currency, to_currency=to_currency).first()
+        if not rate:
+            rate = ForexRate(from_currency=currency, to_currency=to_currency)
+        rate.rate = value
+        rate.updated_at = datetime.now()
+        db.session.add(rate)
+    db.session.commit()
+    cache.delete_memoized(get_forex_rate)
+
+
 @cache.memoize(5)
 def get_fee(currency):
     fee = TicketFees.query.filter_by(currency=currency).order_by(sqlalchemy.desc(TicketFees.id)).first()
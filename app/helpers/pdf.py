@@ -0,0 +1,129 @@
+"""
+PDF rendering out of the request.
+
+The html of a PDF is rendered in the request, which is cheap, and hashed.
+The PDF itself is made by a celery task and uploaded to the storage. Its
+url is stored in `PdfDocument` along with the hash of the html, so the PDF
+is made again only when its content changes. Private PDFs are uploaded
+without public access and sent through signed urls.
+"""
+import hashlib
+from cStringIO import StringIO
+from datetime import datetime, timedelta
+
+from flask import current_app as app, request, redirect, send_file, make_response, jsonify, url_for, abort
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from xhtml2pdf import pisa
+
+from app.helpers.storage import upload, get_private_url, UploadedMemory
+from app.models import db
+from app.models.pdf_document import PdfDocument
+from app.settings import get_settings
+
+# seconds a render task is waited for before queuing another one
+PDF_PENDING_TIMEOUT = 10 * 60
+# seconds after which clients should try again
+PDF_RETRY_AFTER = 3
+
+
+def create_pdf(pdf_data):
+    pdf = StringIO()
+    pisa.CreatePDF(StringIO(pdf_data.encode('utf-8')), pdf)
+    return pdf
+
+
+def _get_document(key):
+    table = PdfDocument.__table__
+    return db.session.execute(select([table]).where(table.c.key == key)).first()
+
+
+def _save_document(key, **values):
+    """
+    Writes fields of the PDF at `key` on a connection of its own, so that
+    other processes see them at once and the session of the request is
+    left alone
+    """
+    table = PdfDocument.__table__
+    with db.engine.begin() as connection:
+        if connection.execute(table.update().where(table.c.key == key).values(**values)).rowcount:
+            return
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(table.insert().values(key=key, **values))
+    except IntegrityError:
+        # inserted meanwhile by another process
+        with db.engine.begin() as connection:
+            connection.execute(table.update().where(table.c.key == key).values(**values))
+
+
+def render_pdf(html, key, version, filename, private=False):
+    """
+    Makes the PDF of `html` and uploads it at storage `key`.
+    Returns its url.
+    """
+    pdf = create_pdf(html)
+    url = upload(UploadedMemory(pdf.getvalue(), filename), key, acl='private' if private else 'public-read')
+    _save_document(key, version=version, url=url)
+    return url
+
+
+def get_pdf(html, key, filename, private=False):
+    """
+    Returns the url of the PDF of `html` if it is made already. Otherwise
+    returns the task making it, a new one if the last one failed.
+    :return: (url, None) or (None, task)
+    """
+    version = hashlib.sha1(html.encode('utf-8')).hexdigest()
+    document = _get_document(key)
+    if document and document.version == version and document.url:
+        return document.url, None
+
+    from app.helpers.tasks import render_pdf_task
+    if document and document.task_version == version and document.task_id and \
+            document.queued_at > datetime.now() - timedelta(seconds=PDF_PENDING_TIMEOUT):
+        task = render_pdf_task.AsyncResult(document.task_id)
+        if not task.failed():
+            return None, task
+    queued_at = datetime.now()
+    task = render_pdf_task.delay(html, key, version, filename, private)
+    _save_document(key, task_id=task.id, task_version=version, queued_at=queued_at)
+    return None, task
+
+
+def send_pdf(url, filename, private=False):
+    """Response with the PDF at `url`"""
+    if get_settings()['storage_place'] != "s3" and get_settings()['storage_place'] != 'gs':
+        response = send_file(app.config['BASE_DIR'] + url.replace('/serve_', '/'),
+                             mimetype='application/pdf')
+        response.headers['Content-Disposition'] = 'inline; filename=%s' % filename
+        return response
+    return redirect(get_private_url(url) if private else url)
+
+
+def pdf_response(html, key, filename, private=False):
+    """
+    Response for the PDF of `html`. If it isn't made yet, 202 with the url
+    of the task making it. Browsers reload the page after PDF_RETRY_AFTER
+    seconds, other clients can poll the task.
+    Private PDFs, like lists of attendees, are sent through urls which
+    expire. A failed task is an error, the next request queues another one.
+    """
+    url, task = get_pdf(html, key, filename, private)
+    if url is None and task.failed():
+        _save_document(key, task_id=None, task_version=None)
+        abort(500)
+    if url is None and task.ready():
+        url = task.get()
+    if url:
+        return send_pdf(url, filename, private)
+
+    task_url = url_for('api.extras_celery_task', task_id=task.id)
+    if request.accept_mimetypes.best == 'application/json':
+        response = jsonify(task_url=task_url)
+    else:
+        response = make_response('The PDF is being generated, this page will reload when it is ready.')
+    response.status_code = 202
+    response.headers['Retry-After'] = str(PDF_RETRY_AFTER)
+    response.headers['Refresh'] = str(PDF_RETRY_AFTER)
+    return response
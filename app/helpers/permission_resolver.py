@@ -0,0 +1,121 @@
+"""
+Resolution of event roles and service permissions of users.
+
+- Role, Service and Permission tables are small and rarely change. They are
+  loaded together and kept in a process wide LRU cache which is refreshed
+  every `STATIC_TABLES_TIMEOUT` seconds so other processes catch up with
+  writes too.
+- Roles of a user in all events are loaded with a single joined query and
+  memoized for the rest of the request.
+"""
+import time
+
+from flask import g
+from functools32 import lru_cache
+from sqlalchemy import event
+
+from app.helpers.helpers import represents_int
+from app.models import db
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.service import Service
+from app.models.users_events_roles import UsersEventsRoles as UER
+
+STATIC_TABLES_TIMEOUT = 60
+
+# Operation names and their corresponding permission in `Permissions`
+OPERATIONS = ('create', 'read', 'update', 'delete')
+
+
+@lru_cache(maxsize=1)
+def _load_permission_table(time_bucket):
+    """
+    Returns a dict mapping (role name, service name) to a dict of
+    operation -> bool. `time_bucket` is only used as the cache key.
+    """
+    rows = db.session.query(Role.name, Service.name, Permission.can_create,
+                            Permission.can_read, Permission.can_update,
+                            Permission.can_delete) \
+        .join(Permission, Permission.role_id == Role.id) \
+        .join(Service, Service.id == Permission.service_id)
+    table = {}
+    for row in rows:
+        table[(row[0], row[1])] = dict(zip(OPERATIONS, row[2:]))
+    return table
+
+
+def get_permission_table():
+    return _load_permission_table(int(time.time() // STATIC_TABLES_TIMEOUT))
+
+
+def get_user_roles(user_id):
+    """
+    Returns a dict mapping event id to the set of role names the user has
+    in that event. Memoized per request.
+    """
+    memo = g.setdefault('_user_event_roles', {})
+    if user_id not in memo:
+        roles = {}
+        rows = db.session.query(UER.event_id, Role.name) \
+            .join(Role, Role.id == UER.role_id) \
+            .filter(UER.user_id == user_id)
+        for event_id, role_name in rows:
+            roles.setdefault(event_id, set()).add(role_name)
+        memo[user_id] = roles
+    return memo[user_id]
+
+
+def get_event_roles(user_id, event_id):
+    """
+    Returns the set of role names of a user in an event
+    """
+    if not represents_int(event_id):
+        return set()
+    return get_user_roles(user_id).get(int(event_id), set())
+
+
+def has_permission(user_id, operation, service_name, event_id):
+    """
+    Checks if any role of the user at the event allows `operation`
+    on the service
+    """
+    if operation not in OPERATIONS:
+        raise ValueError('No such operation defined')
+    table = get_permission_table()
+    for role_name in get_event_roles(user_id, event_id):
+        perm = table.get((role_name, service_name))
+        if perm and perm[operation]:
+            return True
+    return False
+
+
+def clear_user_roles():
+    """
+    Clears roles memoized for the current request
+    """
+    g.pop('_user_event_roles', None)
+
+
+def clear_permission_table():
+    """
+    Clears the cached permission table of this process
+    """
+    _load_permission_table.cache_clear()
+
+
+# LISTENERS
+
+@event.listens_for(UER, 'after_insert')
+@event.listens_for(UER, 'after_update')
+@event.listens_for(UER, 'after_delete')
+def receive_role_change(mapper, conn, target):
+    """role assignments changed, don't serve memoized roles"""
+    clear_user_roles()
+
+
+@event.listens_for(Permission, 'after_insert')
+@event.listens_for(Permission, 'after_update')
+@event.listens_for(Permission, 'after_delete')
+def receive_permission_change(mapper, conn, target):
+    """permissions changed, reload them on next check"""
+    clear_permission_table()
@@ -0,0 +1,150 @@
+"""
+QR codes of tickets.
+
+QR codes are PNGs, base64 encoded to be embedded in pages and PDFs. They
+only depend on their text, so they are kept in an in-process LRU cache
+and on disk, and rendered once. Files not read for QR_DISK_DAYS are
+deleted by `prune_qr_files`, run daily.
+"""
+import base64
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from StringIO import StringIO
+
+import qrcode
+from flask import current_app as app
+
+# QR codes kept in memory
+QR_CACHE_SIZE = 2048
+# days a QR code file is kept after it was last read
+QR_DISK_DAYS = 30
+
+
+class LRUCache(object):
+    """Thread safe mapping keeping the `size` most recently used items"""
+
+    def __init__(self, size):
+        self.size = size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.items.pop(key, None)
+            if value is not None:
+                self.items[key] = value
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.items.pop(key, None)
+            self.items[key] = value
+            if len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+
+_qr_cache = LRUCache(QR_CACHE_SIZE)
+
+
+def render_qr(text):
+    """PNG of the QR code of `text`"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=0,
+    )
+    qr.add_data(text)
+    qr.make(fit=True)
+    img = qr.make_image()
+
+    buffer = StringIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _get_qr_dir():
+    return os.path.join(app.config['TEMP_UPLOADS_FOLDER'], 'qr')
+
+
+def _get_qr_path(text):
+    if isinstance(text, unicode):
+        text = text.encode('utf-8')
+    return os.path.join(_get_qr_dir(), hashlib.sha1(text).hexdigest() + '.png')
+
+
+def _load_qr(path):
+    try:
+        with open(path, 'rb') as png_file:
+            png = png_file.read()
+        # the modification time is the last use, for `prune_qr_files`
+        os.utime(path, None)
+        return png
+    except (IOError, OSError):
+        return None
+
+
+def _store_qr(path, png):
+    dir_path = os.path.dirname(path)
+    if not os.path.isdir(dir_path):
+        try:
+            os.makedirs(dir_path)
+        except OSError:
+            # made by another process meanwhile
+            pass
+    # written aside and moved, so readers never see a partial file
+    fd, temp_path = tempfile.mkstemp(dir=dir_path)
+    with os.fdopen(fd, 'wb') as temp_file:
+        temp_file.write(png)
+    os.rename(temp_path, path)
+
+
+def get_qr(text):
+    """Base64 encoded PNG of the QR code of `text`"""
+    qr = _qr_cache.get(text)
+    if qr is None:
+        path = _get_qr_path(text)
+        png = _load_qr(path)
+        if png is None:
+            png = render_qr(text)
+            _store_qr(path, png)
+        qr = base64.b64encode(png)
+        _qr_cache.set(text, qr)
+    return qr
+
+
+def get_qrs(texts):
+    """dict of text -> base64 encoded PNG of the QR code, for many texts"""
+    return dict((text, get_qr(text)) for text in set(texts))
+
+
+def get_order_qrs(order):
+    """QR codes of all the ticket holders of an order, by holder id"""
+    qrs = get_qrs(holder.qr_text for holder in order.ticket_holders)
+    return dict((holder.id, qrs[holder.qr_text]) for holder in order.ticket_holders)
+
+
+def prune_qr_files(days=QR_DISK_DAYS):
+    """
+    Deletes the QR code files not read for `days`. Returns the number of
+    files deleted.
+    """
+    dir_path = _get_qr_dir()
+    if not os.path.isdir(dir_path):
+        return 0
+    cutoff = time.time() - days * 24 * 3600
+    deleted = 0
+    for name in os.listdir(dir_path):
+        path = os.path.join(dir_path, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                deleted += 1
+        except OSError:
+            # deleted or replaced meanwhile
+            pass
+    return deleted
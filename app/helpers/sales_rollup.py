@@ -0,0 +1,222 @@
+"""
+Daily rollup of ticket sales for the super admin sales reports.
+
+`SalesRollup` holds the sales of every event per day, order status and
+ticket. Whenever orders of an event are created, change status or are
+deleted, the flush marks their (event, day) bucket as pending, which costs
+one insert whatever the number of orders. `refresh_pending_rollups`, run
+by the scheduler, recomputes the pending buckets from committed orders with
+the event locked, so concurrent writers and refreshes never double count.
+Reports only read a few rows per event and day.
+"""
+from datetime import datetime, time
+from itertools import chain
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session as SessionBase
+from sqlalchemy.orm.attributes import get_history
+
+from app.helpers.sales_stats import get_order_totals, get_ticket_lines, get_lines_sales, load_by_id, \
+    normalize_status, ORDER_STATUSES
+from app.models import db
+from app.models.discount_code import DiscountCode, TICKET
+from app.models.event import Event
+from app.models.order import Order, OrderTicket
+from app.models.sales_rollup import SalesRollup, SalesRollupPending
+from app.models.ticket import Ticket
+
+# Order columns the rollup depends on
+ROLLUP_COLUMNS = ('status', 'amount', 'paid_via', 'discount_code_id', 'event_id', 'created_at', 'user_id')
+
+
+def get_rollup_rows(event_id, day):
+    """
+    Computes the rollup rows of orders of an event created on `day`
+    """
+    filters = {
+        'event_id': event_id,
+        'from_date': datetime.combine(day, time.min),
+        'to_date': datetime.combine(day, time.max)
+    }
+    currency = db.session.query(Event.payment_currency).filter(Event.id == event_id).scalar()
+    rows = {}
+
+    def row(ticket_id, status):
+        key = (ticket_id, normalize_status(status))
+        if key not in rows:
+            rows[key] = {
+                'event_id': event_id,
+                'ticket_id': ticket_id,
+                'status': key[1],
+                'currency': currency,
+                'day': day,
+                'orders_count': 0,
+                'amount': 0,
+                'tickets_count': 0,
+                'sales': 0,
+                'fee_base': 0
+            }
+        return rows[key]
+
+    for _, status, orders_count, amount in get_order_totals(**filters):
+        order_row = row(None, status)
+        order_row['orders_count'] += orders_count
+        order_row['amount'] += amount or 0
+
+    lines = get_ticket_lines(**filters)
+    tickets = load_by_id(Ticket, [line[2] for line in lines])
+    discounts = load_by_id(DiscountCode, [line[3] for line in lines],
+                           DiscountCode.event_id == event_id, DiscountCode.used_for == TICKET)
+    for _, status, ticket_id, discount_code_id, paid, quantity, count in lines:
+        ticket = tickets.get(ticket_id)
+        if not ticket:
+            continue
+        ticket_row = row(ticket_id, status)
+        ticket_row['tickets_count'] += (quantity or 0) * count
+        ticket_row['sales'] += get_lines_sales(ticket, quantity, count, discounts.get(discount_code_id), paid)
+        if paid and ticket.price > 0:
+            ticket_row['fee_base'] += count * ticket.price
+
+    return rows.values()
+
+
+def refresh_rollup(event_id, day):
+    """
+    Replaces the rollup rows of an event and day. Uses core statements so
+    that it can run while the session is flushing.
+    """
+    table = SalesRollup.__table__
+    db.session.execute(table.delete().where(table.c.event_id == event_id).where(table.c.day == day))
+    rows = get_rollup_rows(event_id, day)
+    if rows:
+        db.session.execute(table.insert(), rows)
+
+
+def mark_rollup_pending(buckets):
+    """
+    Marks (event id, day) buckets to be recomputed by
+    `refresh_pending_rollups`. Uses core statements so that it can run
+    while the session is flushing.
+    """
+    if buckets:
+        db.session.execute(SalesRollupPending.__table__.insert(),
+                           [{'event_id': event_id, 'day': day} for event_id, day in buckets])
+
+
+def refresh_pending_rollups():
+    """
+    Recomputes the pending buckets, each in its own transaction. The event
+    row is locked first so that refreshes of an event from several
+    processes run one after the other. Buckets marked meanwhile are left
+    for the next run.
+    Returns the number of buckets recomputed.
+    """
+    table = SalesRollupPending.__table__
+    buckets = {}
+    for pending_id, event_id, day in db.session.query(SalesRollupPending.id, SalesRollupPending.event_id,
+                                                      SalesRollupPending.day):
+        buckets.setdefault((event_id, day), []).append(pending_id)
+    for (event_id, day), pending_ids in buckets.items():
+        db.session.query(Event.id).filter(Event.id == event_id).with_for_update().first()
+        refresh_rollup(event_id, day)
+        db.session.execute(table.delete().where(table.c.id.in_(pending_ids)))
+        db.session.commit()
+    return len(buckets)
+
+
+def rebuild_sales_rollup():
+    """
+    Recomputes the rollup of all events and days. Needed once to fill the
+    rollup with orders created before it existed.
+    """
+    days = db.session.query(Order.event_id, func.date(Order.created_at)) \
+        .filter(Order.event_id.isnot(None)) \
+        .filter(Order.created_at.isnot(None)) \
+        .distinct().all()
+    db.session.execute(SalesRollup.__table__.delete())
+    db.session.execute(SalesRollupPending.__table__.delete())
+    for event_id, day in days:
+        if not hasattr(day, 'year'):
+            day = datetime.strptime(day, '%Y-%m-%d').date()
+        refresh_rollup(event_id, day)
+    db.session.commit()
+
+
+def _filter_rollup(query, from_date=None, to_date=None, promoted_event=False, status=None, event_id=None):
+    if from_date:
+        query = query.filter(SalesRollup.day >= from_date.date())
+    if to_date:
+        query = query.filter(SalesRollup.day <= to_date.date())
+    if status:
+        query = query.filter(SalesRollup.status == status)
+    if event_id:
+        query = query.filter(SalesRollup.event_id == event_id)
+    if promoted_event:
+        query = query.join(Event, Event.id == SalesRollup.event_id).filter(Event.discount_code_id.isnot(None))
+    return query
+
+
+def get_rollup_sales(**filters):
+    """
+    Returns (event_id, status, currency, orders_count, amount, tickets_count,
+    sales, fee_base) rows summed over the days matching `filters`
+    """
+    query = db.session.query(SalesRollup.event_id, SalesRollup.status, SalesRollup.currency,
+                             func.sum(SalesRollup.orders_count), func.sum(SalesRollup.amount),
+                             func.sum(SalesRollup.tickets_count), func.sum(SalesRollup.sales),
+                             func.sum(SalesRollup.fee_base))
+    query = _filter_rollup(query, **filters) \
+        .filter(SalesRollup.status.in_(ORDER_STATUSES)) \
+        .group_by(SalesRollup.event_id, SalesRollup.status, SalesRollup.currency)
+    return query.all()
+
+
+def get_rollup_daily_sales(**filters):
+    """
+    Returns (day, currency, orders_count, amount, tickets_count, sales) rows
+    of the days matching `filters`, ordered by day
+    """
+    query = db.session.query(SalesRollup.day, SalesRollup.currency,
+                             func.sum(SalesRollup.orders_count), func.sum(SalesRollup.amount),
+                             func.sum(SalesRollup.tickets_count), func.sum(SalesRollup.sales))
+    query = _filter_rollup(query, **filters) \
+        .group_by(SalesRollup.day, SalesRollup.currency) \
+        .order_by(SalesRollup.day)
+    return query.all()
+
+
+# LISTENERS
+
+def _order_buckets(obj, deleted=False):
+    """(event id, day) of an order before and after this flush"""
+    buckets = set()
+    if obj.event_id and obj.created_at:
+        buckets.add((obj.event_id, obj.created_at.date()))
+    if not deleted:
+        old_event_ids = get_history(obj, 'event_id').deleted or [obj.event_id]
+        old_created_ats = get_history(obj, 'created_at').deleted or [obj.created_at]
+        for event_id in old_event_ids:
+            for created_at in old_created_ats:
+                if event_id and created_at:
+                    buckets.add((event_id, created_at.date()))
+    return buckets
+
+
+@event.listens_for(SessionBase, 'after_flush')
+def update_sales_rollup(session, flush_context):
+    """session.new/dirty/deleted still hold the pre-flush state here"""
+    buckets = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Order):
+            if obj in session.dirty and not any(get_history(obj, column).has_changes()
+                                                for column in ROLLUP_COLUMNS):
+                continue
+            buckets |= _order_buckets(obj, deleted=obj in session.deleted)
+        elif isinstance(obj, OrderTicket):
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            order = session.query(Order).get(obj.order_id)
+            if order:
+                buckets |= _order_buckets(order)
+
+    mark_rollup_pending(buckets)
@@ -0,0 +1,204 @@
+"""
+Aggregation of ticket sales for the organizer and super admin dashboards.
+
+Order lines (orders_tickets rows) are grouped in SQL by everything the
+sales rules depend on - event, order status, ticket, discount code, whether
+the order was paid for and the line quantity. Fee and discount rules are
+then applied once per group instead of once per order line, and tickets,
+discount codes and fee settings are loaded once per page.
+"""
+from sqlalchemy import and_, case, func, or_
+
+from app.models import db
+from app.models.discount_code import DiscountCode, TICKET
+from app.models.event import Event
+from app.models.fees import TicketFees
+from app.models.order import Order, OrderTicket
+from app.models.ticket import Ticket
+
+# Order statuses shown on the dashboards and their label class
+ORDER_STATUSES = ('completed', 'placed', 'pending', 'expired', 'deleted', 'cancelled')
+STATUS_CLASSES = {
+    'completed': 'success',
+    'placed': 'info',
+    'pending': 'warning',
+    'expired': 'danger',
+    'deleted': 'primary',
+    'cancelled': 'default'
+}
+
+# Orders counted as sold tickets in ticket stats
+SOLD_STATUSES = ('completed', 'placed')
+
+
+def normalize_status(status):
+    """initialized orders are shown as pending"""
+    return 'pending' if status == 'initialized' else status
+
+
+def empty_orders_summary():
+    return dict((status, {
+        'class': STATUS_CLASSES[status],
+        'tickets_count': 0,
+        'orders_count': 0,
+        'total_sales': 0
+    }) for status in ORDER_STATUSES)
+
+
+def empty_status_summary():
+    return dict((status, {
+        'tickets_count': 0,
+        'sales': 0
+    }) for status in ORDER_STATUSES)
+
+
+def _filter_orders(query, event_id=None, status=None, from_date=None, to_date=None,
+                   promoted_event=False, registered_only=True):
+    """
+    Applies the filters of `TicketingManager.get_orders` to an aggregate
+    query over orders
+    """
+    if event_id:
+        query = query.filter(Order.event_id == event_id)
+    else:
+        query = query.filter(Order.event_id.isnot(None))
+    if status:
+        query = query.filter(Order.status == status)
+    if registered_only:
+        query = query.filter(Order.user_id.isnot(None))
+    if from_date:
+        query = query.filter(Order.created_at >= from_date)
+    if to_date:
+        query = query.filter(Order.created_at <= to_date)
+    if promoted_event:
+        query = query.join(Event, Event.id == Order.event_id).filter(Event.discount_code_id.isnot(None))
+    return query
+
+
+def get_order_totals(**filters):
+    """
+    Returns (event_id, status, orders count, sum of amount) rows for
+    orders matching `filters`
+    """
+    query = db.session.query(Order.event_id, Order.status, func.count(Order.id), func.sum(Order.amount))
+    return _filter_orders(query, **filters).group_by(Order.event_id, Order.status).all()
+
+
+def get_ticket_lines(**filters):
+    """
+    Returns (event_id, status, ticket_id, discount_code_id, paid, quantity,
+    lines count) rows for order lines of orders matching `filters`.
+    `paid` is 1 if the order was not free and has a positive amount.
+    """
+    paid = case([(and_(or_(Order.paid_via.is_(None), Order.paid_via != 'free'), Order.amount > 0), 1)],
+                else_=0)
+    query = db.session.query(Order.event_id, Order.status, OrderTicket.ticket_id, Order.discount_code_id,
+                             paid.label('paid'), OrderTicket.quantity, func.count()) \
+        .join(OrderTicket, OrderTicket.order_id == Order.id)
+    return _filter_orders(query, **filters) \
+        .group_by(Order.event_id, Order.status, OrderTicket.ticket_id, Order.discount_code_id,
+                  paid, OrderTicket.quantity).all()
+
+
+def get_tickets_sold(event_id, statuses=SOLD_STATUSES):
+    """
+    Returns a dict mapping ticket id to the number of tickets sold in
+    orders of `statuses`
+    """
+    return get_tickets_sold_of_events([event_id], statuses)
+
+
+def get_tickets_sold_of_events(event_ids, statuses=SOLD_STATUSES):
+    """
+    Returns a dict mapping ticket id to the number of tickets sold in
+    orders of `statuses`, for the tickets of all the events in one query
+    """
+    if not event_ids:
+        return {}
+    rows = db.session.query(OrderTicket.ticket_id, func.sum(OrderTicket.quantity)) \
+        .join(Order, Order.id == OrderTicket.order_id) \
+        .filter(Order.event_id.in_(event_ids)) \
+        .filter(Order.status.in_(statuses)) \
+        .group_by(OrderTicket.ticket_id)
+    return dict((ticket_id, quantity or 0) for ticket_id, quantity in rows)
+
+
+def load_by_id(model, ids, *criterion):
+    """
+    Returns a dict mapping id to the objects of `model` having `ids`
+    """
+    ids = set(_id for _id in ids if _id is not None)
+    if not ids:
+        return {}
+    return dict((item.id, item) for item in model.query.filter(model.id.in_(ids)).filter(*criterion))
+
+
+def get_ticket_price(ticket, quantity, fees=None):
+    """
+    Price of one ticket in an order line of `quantity` tickets including
+    the service fee charged on the buyer, capped at the maximum fee per line.
+    """
+    price = ticket.price or 0
+    if fees and not ticket.absorb_fees and quantity:
+        order_fee = fees.service_fee * (price * quantity) / 100.0
+        if order_fee > fees.maximum_fee:
+            return price + fees.maximum_fee / quantity
+        return price + fees.service_fee * price / 100.0
+    return price
+
+
+def get_lines_sales(ticket, quantity, lines, discount=None, paid=True, fees=None):
+    """
+    Sales of `lines` order lines of `quantity` tickets each. Free and
+    unpaid orders don't count as sales.
+    """
+    if not paid or not quantity:
+        return 0
+    price = get_ticket_price(ticket, quantity, fees)
+    if discount and discount.tickets and str(ticket.id) in discount.tickets.split(","):
+        if discount.type == "amount":
+            price -= discount.value
+        else:
+            price -= discount.value * price / 100.0
+    return lines * quantity * price
+
+
+def get_event_sales(event):
+    """
+    Returns orders summary and tickets summary for the ticket sales page
+    of an event. Ticket sales include the service fee of event currency.
+    """
+    orders_summary = empty_orders_summary()
+    tickets_summary = {}
+    for ticket in event.tickets:
+        tickets_summary[str(ticket.id)] = dict(name=ticket.name, quantity=ticket.quantity,
+                                               **empty_status_summary())
+
+    for _, status, orders_count, amount in get_order_totals(event_id=event.id):
+        summary = orders_summary.get(normalize_status(status))
+        if summary:
+            summary['orders_count'] += orders_count
+            summary['total_sales'] += amount or 0
+
+    lines = get_ticket_lines(event_id=event.id)
+    tickets = load_by_id(Ticket, [line[2] for line in lines])
+    discounts = load_by_id(DiscountCode, [line[3] for line in lines],
+                           DiscountCode.event_id == event.id, DiscountCode.used_for == TICKET)
+    fees = TicketFees.query.filter_by(currency=event.payment_currency).first() \
+        if event.payment_currency else None
+
+    for _, status, ticket_id, discount_code_id, paid, quantity, count in lines:
+        status = normalize_status(status)
+        if status not in orders_summary:
+            continue
+        orders_summary[status]['tickets_count'] += (quantity or 0) * count
+        ticket = tickets.get(ticket_id)
+        if not ticket or str(ticket_id) not in tickets_summary:
+            continue
+        ticket_summary = tickets_summary[str(ticket_id)][status]
+        ticket_summary['tickets_count'] += (quantity or 0) * count
+        ticket_summary['sales'] += get_lines_sales(ticket, quantity, count, discounts.get(discount_code_id),
+                                                   paid, fees)
+
+    return orders_summary, tickets_summary
+
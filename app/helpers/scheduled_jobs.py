@@ -1,49 +1,125 @@
+import logging
+import time
 from datetime import datetime, timedelta
 
 from dateutil.relativedelta import relativedelta
 from flask import url_for
 from sqlalchemy_continuum import transaction_class
 
-from app.helpers.data import DataManager, delete_from_db, save_to_db
+from app.helpers.data import DataManager, save_to_db
 from app.helpers.data_getter import DataGetter
 from app.helpers.helpers import send_after_event, monthdelta, send_followup_email_for_monthly_fee_payment
 from app.helpers.helpers import send_email_for_expired_orders, send_email_for_monthly_fee_payment
-from app.helpers.payment import get_fee
+from app.helpers.payment import get_fee, update_forex_rates
+from app.helpers.permission_resolver import clear_user_roles
+from app.helpers.qr import prune_qr_files
+from app.helpers.sales_rollup import mark_rollup_pending, refresh_pending_rollups
+from app.helpers.signals import scheduled_job_finished
 from app.helpers.ticketing import TicketingManager
+from app.models import db
 from app.models.event import Event
 from app.models.event_invoice import EventInvoice
 from app.models.order import Order
 from app.models.session import Session
 from app.models.user import User
 
+# ids deleted or updated per statement
+JOB_BATCH = 500
+# days before trashed items are deleted
+TRASH_DAYS = 30
+# days before pending orders expire
+PENDING_ORDER_DAYS = 3
+
+
+def record_job_metrics(job, rows, started):
+    """
+    Logs the rows affected by a job and its duration and sends them to the
+    receivers of `scheduled_job_finished`
+    """
+    duration = time.time() - started
+    logging.info('%s: %d rows in %.2fs' % (job, rows, duration))
+    scheduled_job_finished.send(None, job=job, rows=rows, duration=duration)
+
+
+def run_in_batches(job, query, id_column, apply_batch):
+    """
+    Calls `apply_batch` with lists of at most JOB_BATCH ids selected by
+    `query`, committing after each batch, until no id is left.
+    Returns the number of ids processed.
+    """
+    started = time.time()
+    last_id = None
+    rows = 0
+    while True:
+        batch_query = query if last_id is None else query.filter(id_column > last_id)
+        ids = [id_ for id_, in batch_query.order_by(id_column).limit(JOB_BATCH)]
+        if not ids:
+            break
+        apply_batch(ids)
+        db.session.commit()
+        last_id = ids[-1]
+        rows += len(ids)
+        logging.info('%s: %d rows done' % (job, rows))
+    record_job_metrics(job, rows, started)
+    return rows
+
+
+def delete_trashed_users(ids):
+    transaction = transaction_class(Event)
+    transaction.query.filter(transaction.user_id.in_(ids)).delete(synchronize_session=False)
+    User.query.filter(User.id.in_(ids)).delete(synchronize_session=False)
+
+
+def delete_trashed_sessions(ids):
+    Session.query.filter(Session.id.in_(ids)).delete(synchronize_session=False)
+
+
+def expire_orders(ids):
+    buckets = set((event_id, created_at.date()) for event_id, created_at in
+                  db.session.query(Order.event_id, Order.created_at).filter(Order.id.in_(ids))
+                  if event_id and created_at)
+    Order.query.filter(Order.id.in_(ids)).update({'status': 'expired'}, synchronize_session=False)
+    # bulk updates don't go through the flush listener of the sales rollup
+    mark_rollup_pending(buckets)
+
+
+def expire_pending_orders():
+    """
+    Marks the orders pending for PENDING_ORDER_DAYS as expired and
+    recomputes the sales rollup of their days
+    """
+    cutoff = datetime.now() - timedelta(days=PENDING_ORDER_DAYS)
+    rows = run_in_batches('expire_pending_orders',
+                          db.session.query(Order.id)
+                          .filter(Order.status == 'pending')
+                          .filter(Order.created_at <= cutoff),
+                          Order.id, expire_orders)
+    if rows:
+        refresh_pending_rollups()
+    return rows
+
 
 def empty_trash():
+    """
+    Deletes the events, users and sessions trashed for TRASH_DAYS and
+    expires pending orders. Rows are deleted by batches of ids.
+    """
     from app import current_app as app
 
     with app.app_context():
-        events = Event.query.filter(Event.deleted_at.isnot(None)).all()
-        users = User.query.filter(User.deleted_at.isnot(None)).all()
-        sessions = Session.query.filter(Session.deleted_at.isnot(None)).all()
-        pending_orders = Order.query.filter_by(status="pending")
-
-        for event in events:
-            if datetime.now() - event.deleted_at >= timedelta(days=30):
-                DataManager.delete_event(event.id)
-
-        for user in users:
-            if datetime.now() - user.deleted_at >= timedelta(days=30):
-                transaction = transaction_class(Event)
-                transaction.query.filter_by(user_id=user.id).delete()
-                delete_from_db(user, "User deleted permanently")
-
-        for session_ in sessions:
-            if datetime.now() - session_.deleted_at >= timedelta(days=30):
-                delete_from_db(session_, "Session deleted permanently")
-
-        for pending_order in pending_orders:
-            if datetime.now() - pending_order.created_at >= timedelta(days=3):
-                pending_order.status = "expired"
-                save_to_db(pending_order, "Pending order expired.")
+        cutoff = datetime.now() - timedelta(days=TRASH_DAYS)
+        events = run_in_batches('empty_trash.events',
+                                db.session.query(Event.id).filter(Event.deleted_at <= cutoff),
+                                Event.id, DataManager.delete_events)
+        if events:
+            clear_user_roles()
+        run_in_batches('empty_trash.users',
+                       db.session.query(User.id).filter(User.deleted_at <= cutoff),
+                       User.id, delete_trashed_users)
+        run_in_batches('empty_trash.sessions',
+                       db.session.query(Session.id).filter(Session.deleted_at <= cutoff),
+                       Session.id, delete_trashed_sessions)
+        expire_pending_orders()
 
 
 def send_after_event_mail():
@@ -65,6 +141,27 @@ def send_after_event_mail():
                                      upcoming_events)
 
 
+def refresh_forex_rates():
+    from app import current_app as app
+    with app.app_context():
+        currencies = [currency for currency, in Event.query.with_entities(Event.payment_currency).distinct()]
+        update_forex_rates(currencies)
+
+
+def refresh_sales_rollup():
+    from app import current_app as app
+    with app.app_context():
+        started = time.time()
+        record_job_metrics('refresh_sales_rollup', refresh_pending_rollups(), started)
+
+
+def prune_qr_codes():
+    from app import current_app as app
+    with app.app_context():
+        started = time.time()
+        record_job_metrics('prune_qr_codes', prune_qr_files(), started)
+
+
 def send_mail_to_expired_orders():
     from app import current_app as app
     with app.app_context():
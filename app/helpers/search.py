@@ -0,0 +1,202 @@
+"""
+Full text search of events.
+
+Every event has a search document in `EventSearchDocument` built from its
+name, location and description, kept up to date by a flush listener.
+
+- On PostgreSQL the document is a weighted tsvector with a GIN index and
+  searches are ranked with `ts_rank`.
+- On other databases the document holds the weighted terms, and searches
+  go through an inverted index built from them in Python. Tests run on
+  PostgreSQL, so they cover the fallback by forcing it.
+
+Both support prefix search of the last word for autocomplete.
+"""
+import re
+import time
+from itertools import chain
+
+from sqlalchemy import event, case, desc, false, func
+from sqlalchemy.orm import Session as SessionBase
+from sqlalchemy.orm.attributes import get_history
+
+from app.helpers.versioning import strip_tags
+from app.models import db
+from app.models.event import Event
+from app.models.event_search import EventSearchDocument
+
+SEARCH_CONFIG = 'english'
+# Event columns in the search document and their weight
+SEARCH_FIELDS = (
+    ('name', 'A'),
+    ('location_name', 'B'),
+    ('searchable_location_name', 'B'),
+    ('description', 'C'),
+)
+# Weights of ts_rank for D, C, B and A, used by the fallback too
+WEIGHT_VALUES = {'D': 0.1, 'C': 0.2, 'B': 0.4, 'A': 1.0}
+# seconds after which the fallback index is rebuilt to catch writes of
+# other processes
+INDEX_TIMEOUT = 60
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+_index = {'terms': None, 'built_at': 0}
+
+
+def tokenize(text):
+    """Returns lowercase words of a text"""
+    if not text:
+        return []
+    return WORD_RE.findall(text.lower())
+
+
+def is_postgres():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def get_field_text(obj, field):
+    text = getattr(obj, field, None) or u''
+    if field == 'description':
+        text = strip_tags(text)
+    return text
+
+
+def get_vector(obj):
+    """
+    SQL expression of the tsvector of an event on PostgreSQL. String of
+    `term:weight` pairs elsewhere.
+    """
+    if is_postgres():
+        vector = None
+        for field, weight in SEARCH_FIELDS:
+            part = func.setweight(func.to_tsvector(SEARCH_CONFIG, get_field_text(obj, field)), weight)
+            vector = part if vector is None else vector.op('||')(part)
+        return vector
+    return u' '.join(u'%s:%s' % (term, weight)
+                     for field, weight in SEARCH_FIELDS
+                     for term in tokenize(get_field_text(obj, field)))
+
+
+def update_search_documents(events, deleted_ids=()):
+    """
+    Replaces the search documents of `events` and removes those of
+    `deleted_ids`. Uses core statements so that it can run while the
+    session is flushing.
+    """
+    table = EventSearchDocument.__table__
+    ids = [obj.id for obj in events] + list(deleted_ids)
+    if not ids:
+        return
+    db.session.execute(table.delete().where(table.c.event_id.in_(ids)))
+    for obj in events:
+        db.session.execute(table.insert().values(event_id=obj.id, vector=get_vector(obj)))
+    clear_search_index()
+
+
+def rebuild_search_documents():
+    """Rebuilds the search documents of all events"""
+    db.session.execute(EventSearchDocument.__table__.delete())
+    update_search_documents(Event.query.all())
+    db.session.commit()
+
+
+def clear_search_index():
+    """Clears the in-process fallback index"""
+    _index['terms'] = None
+
+
+def get_search_index():
+    """
+    Returns the fallback inverted index, a dict mapping term to a dict of
+    event id -> score
+    """
+    if _index['terms'] is None or time.time() - _index['built_at'] > INDEX_TIMEOUT:
+        set_search_index(build_search_index(
+            db.session.query(EventSearchDocument.event_id, EventSearchDocument.vector)))
+    return _index['terms']
+
+
+def set_search_index(terms):
+    _index['terms'] = terms
+    _index['built_at'] = time.time()
+
+
+def build_search_index(documents):
+    """
+    Returns the fallback inverted index of `documents`, pairs of event id
+    and fallback search document
+    """
+    terms = {}
+    for event_id, vector in documents:
+        for pair in (vector or u'').split():
+            term, _, weight = pair.rpartition(u':')
+            postings = terms.setdefault(term, {})
+            postings[event_id] = postings.get(event_id, 0) + WEIGHT_VALUES.get(weight, 0)
+    return terms
+
+
+def _search_index(words, prefix):
+    """Returns a dict of event id -> score of events matching all words"""
+    index = get_search_index()
+    scores = None
+    for position, word in enumerate(words):
+        if prefix and position == len(words) - 1:
+            matching_terms = [term for term in index if term.startswith(word)]
+        else:
+            matching_terms = [word] if word in index else []
+        word_scores = {}
+        for term in matching_terms:
+            for event_id, score in index[term].iteritems():
+                word_scores[event_id] = word_scores.get(event_id, 0) + score
+        if scores is None:
+            scores = word_scores
+        else:
+            scores = dict((event_id, scores[event_id] + score)
+                          for event_id, score in word_scores.iteritems() if event_id in scores)
+        if not scores:
+            break
+    return scores or {}
+
+
+def search_events(value, query, prefix=False):
+    """
+    Filters an Event `query` to events matching all words of `value` and
+    orders them by relevance. With `prefix`, the last word also matches
+    longer words starting with it.
+    """
+    words = tokenize(value)
+    if not words:
+        return query
+    if is_postgres():
+        terms = list(words)
+        if prefix:
+            terms[-1] += ':*'
+        ts_query = func.to_tsquery(SEARCH_CONFIG, u' & '.join(terms))
+        vector = EventSearchDocument.vector
+        return query.join(EventSearchDocument, EventSearchDocument.event_id == Event.id) \
+            .filter(vector.op('@@')(ts_query)) \
+            .order_by(desc(func.ts_rank(vector, ts_query)))
+    scores = _search_index(words, prefix)
+    if not scores:
+        return query.filter(false())
+    return query.filter(Event.id.in_(scores.keys())) \
+        .order_by(desc(case(scores, value=Event.id)))
+
+
+# LISTENERS
+
+@event.listens_for(SessionBase, 'after_flush')
+def update_event_search(session, flush_context):
+    """session.new/dirty/deleted still hold the pre-flush state here"""
+    fields = [field for field, _ in SEARCH_FIELDS]
+    events = []
+    deleted_ids = []
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, Event):
+            continue
+        if obj in session.deleted:
+            deleted_ids.append(obj.id)
+        elif obj in session.new or any(get_history(obj, field).has_changes() for field in fields):
+            events.append(obj)
+    update_search_documents(events, deleted_ids)
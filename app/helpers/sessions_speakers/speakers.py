@@ -1,5 +1,5 @@
 from flask import current_app as app
-from app.helpers.assets.images import save_resized_image, get_path_of_temp_url, save_event_image
+from app.helpers.assets.images import save_event_image, queue_image_variants
 from app.helpers.data_getter import DataGetter
 from app.helpers.storage import UPLOAD_PATHS
 from app.models.image_sizes import ImageSizes
@@ -75,13 +75,11 @@ def save_speaker(request, event_id=None, speaker=None, user=None, no_name=False)
     image_sizes = speaker_image_sizes()
 
     photo = trim_get_form(request.form, 'photo', None)
+    photo_variants = None
     if photo and photo.strip() != '':
         if speaker.photo != photo:
-            file_path = get_path_of_temp_url(photo)
             speaker.photo = save_untouched_photo(photo, event_id, speaker.id)
-            speaker.small = save_resized_photo(file_path, event_id, speaker.id, 'small', image_sizes)
-            speaker.thumbnail = save_resized_photo(file_path, event_id, speaker.id, 'thumbnail', image_sizes)
-            speaker.icon = save_resized_photo(file_path, event_id, speaker.id, 'icon', image_sizes)
+            photo_variants = get_photo_variants(event_id, speaker.id, image_sizes)
     else:
         speaker.photo = ''
         speaker.small = ''
@@ -110,6 +108,9 @@ def save_speaker(request, event_id=None, speaker=None, user=None, no_name=False)
     speaker.speaking_experience = trim_get_form(request.form, 'speaking_experience', None)
     speakers_modified.send(app._get_current_object(), event_id=event_id)
     save_to_db(speaker, "Speaker has been updated")
+    if photo_variants:
+        # small, thumbnail and icon are kept until resized, unchanged if the photo is
+        queue_image_variants('speaker', speaker.id, speaker.photo, photo_variants)
     record_activity('update_speaker', speaker=speaker, event_id=event_id)
     return speaker
 
@@ -129,38 +130,24 @@ def save_untouched_photo(photo_url, event_id, speaker_id):
     return save_event_image(photo_url, upload_path)
 
 
-def save_resized_photo(background_image_file, event_id, speaker_id, size, image_sizes):
+def get_photo_variants(event_id, speaker_id, image_sizes):
     """
-    Save the resized version of the background image
+    Resized versions of the photo, square
     :param speaker_id:
-    :param background_image_file:
     :param event_id:
-    :param size:
     :param image_sizes:
-    :return:
+    :return: list of (field, width, height, aspect, upload path)
     """
-
-    basewidth = image_sizes.full_width
-    height_size = image_sizes.full_height
-
-    if size == 'small':
-        basewidth = image_sizes.thumbnail_width
-        height_size = image_sizes.thumbnail_height
-    elif size == 'thumbnail':
-        basewidth = image_sizes.full_width
-        height_size = image_sizes.full_height
-    elif size == 'icon':
-        basewidth = image_sizes.icon_width
-        height_size = image_sizes.icon_height
-
-    upload_path = UPLOAD_PATHS['speakers'][size].format(
-        event_id=int(event_id), id=int(speaker_id)
-    )
-
-    if basewidth != height_size:
-        if height_size > basewidth:
-            basewidth = height_size
-        else:
-            height_size = basewidth
-
-    return save_resized_image(background_image_file, basewidth, 'off', height_size, upload_path)
+    sizes = [
+        ('small', image_sizes.thumbnail_width, image_sizes.thumbnail_height),
+        ('thumbnail', image_sizes.full_width, image_sizes.full_height),
+        ('icon', image_sizes.icon_width, image_sizes.icon_height),
+    ]
+    variants = []
+    for size, basewidth, height_size in sizes:
+        side = max(basewidth, height_size)
+        upload_path = UPLOAD_PATHS['speakers'][size].format(
+            event_id=int(event_id), id=int(speaker_id)
+        )
+        variants.append((size, side, side, 'off', upload_path))
+    return variants
@@ -38,3 +38,6 @@ event_json_modified = event_signals.signal('event_json_modified')
 speakers_modified = event_signals.signal('speakers_modified')
 sessions_modified = event_signals.signal('sessions_modified')
 microlocations_modified = event_signals.signal('microlocations_modified')
+
+# sent with job name, rows affected and duration (seconds) of maintenance jobs
+scheduled_job_finished = event_signals.signal('scheduled_job_finished')
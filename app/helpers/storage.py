@@ -1,18 +1,39 @@
+import hashlib
+import hmac
 import os
-from base64 import b64encode
+import threading
+from StringIO import StringIO
+from base64 import b64encode, urlsafe_b64encode
 from shutil import copyfile, rmtree
 
 import boto
 import magic
 from boto.gs.connection import GSConnection
+from boto.gs.resumable_upload_handler import ResumableUploadHandler
 from boto.s3.connection import S3Connection, OrdinaryCallingFormat
-from boto.s3.key import Key
 from flask.ext.scrypt import generate_password_hash
 from werkzeug.utils import secure_filename
 from flask import current_app as app
 
 from app.settings import get_settings
 
+# bytes read to find the MIME type of a file
+MIME_SNIFF_SIZE = 8 * 1024
+# files larger than this are uploaded in parts
+MULTIPART_THRESHOLD = 16 * 1024 * 1024
+# size of a part, 5MB at least for S3
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+# seconds a signed url of a private file is valid
+PRIVATE_URL_EXPIRY = 5 * 60
+
+# length of the hash of a key in storage paths
+HASH_LENGTH = 10
+
+# settings the storage backend is made from
+STORAGE_SETTINGS = ('storage_place', 'aws_bucket_name', 'aws_key', 'aws_secret', 'aws_region',
+                    'gs_bucket_name', 'gs_key', 'gs_secret')
+
 #################
 # STORAGE SCHEMA
 #################
@@ -52,6 +73,13 @@ UPLOAD_PATHS = {
         'event': 'events/temp/{uuid}',
         'image': 'temp/images/{uuid}'
     },
+    'pdf': {
+        'order_invoice': 'orders/{identifier}/invoice',
+        'order_tickets': 'orders/{identifier}/tickets/{email}',
+        'event_invoice': 'invoices/{identifier}/invoice',
+        'attendees': 'events/{event_id}/attendees',
+        'orders': 'events/{event_id}/orders'
+    },
     'exports': {
         'zip': 'exports/{event_id}/zip',
         'pentabarf': 'exports/{event_id}/pentabarf',
@@ -75,6 +103,10 @@ class UploadedFile(object):
         self.filename = filename
         self.file = open(file_path)
 
+    @property
+    def stream(self):
+        return self.file
+
     def save(self, new_path):
         copyfile(self.file_path, new_path)
 
@@ -93,6 +125,7 @@ class UploadedMemory(object):
     def __init__(self, data, filename):
         self.data = data
         self.filename = filename
+        self.stream = StringIO(data)
 
     def read(self):
         return self.data
@@ -103,6 +136,293 @@ class UploadedMemory(object):
         f.close()
 
 
+def get_stream(uploaded_file):
+    """
+    Returns a seekable file object of an uploaded file, rewound, and its
+    size
+    """
+    stream = getattr(uploaded_file, 'stream', None)
+    if stream is None:
+        stream = StringIO(uploaded_file.read())
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return stream, size
+
+
+def get_mime_type(stream):
+    """
+    MIME type of a file sniffed from its first bytes. The stream is rewound.
+    """
+    head = stream.read(MIME_SNIFF_SIZE)
+    stream.seek(0)
+    return magic.from_buffer(head, mime=True)
+
+
+##########
+# BACKENDS
+##########
+
+class LocalStorage(object):
+    """
+    Stores files in static/media/ of `base_dir`, BASE_DIR of the app by
+    default
+    """
+
+    def __init__(self, base_dir=None):
+        self.base_dir = base_dir
+
+    def upload(self, uploaded_file, key, **kwargs):
+        filename = secure_filename(uploaded_file.filename)
+        file_relative_path = 'static/media/' + key + '/' + generate_hash(key) + '/' + filename
+        file_path = (self.base_dir or app.config['BASE_DIR']) + '/' + file_relative_path
+        dir_path = file_path.rsplit('/', 1)[0]
+        # delete current
+        try:
+            rmtree(dir_path)
+        except OSError:
+            pass
+        self.delete_legacy(key, dir_path.rsplit('/', 1)[0])
+        # create dirs
+        if not os.path.isdir(dir_path):
+            os.makedirs(dir_path)
+        uploaded_file.save(file_path)
+        return '/serve_' + file_relative_path
+
+    def get_private_url(self, url, expires_in):
+        """Local files are sent by the app, their url is kept"""
+        return url
+
+    def copy(self, url, key, **kwargs):
+        """Stores the file uploaded at `url` at `key` too"""
+        file_path = (self.base_dir or app.config['BASE_DIR']) + '/' + url[len('/serve_'):]
+        uploaded_file = UploadedFile(file_path, file_path.rsplit('/', 1)[1])
+        try:
+            return self.upload(uploaded_file, key)
+        finally:
+            uploaded_file.file.close()
+
+    @staticmethod
+    def delete_legacy(key, key_path):
+        """Deletes the files of `key` stored under its legacy hash"""
+        paths = [os.path.relpath(os.path.join(root, name), key_path)
+                 for root, _, names in os.walk(key_path) for name in names]
+        legacy = resolve_legacy_hash(key, paths)
+        if legacy:
+            # legacy hashes can contain '/'
+            rmtree(key_path + '/' + legacy.split('/')[0], ignore_errors=True)
+
+
+class BucketStorage(object):
+    """
+    Stores files in a bucket. The bucket handle, and so the connection
+    behind it, is kept and reused for every upload. Files larger than
+    MULTIPART_THRESHOLD are streamed in parts by `upload_large`.
+    """
+
+    def __init__(self, bucket, base_url):
+        self.bucket = bucket
+        self.base_url = base_url
+
+    def get_key_name(self, key, filename):
+        """
+        Name of the bucket key of `filename` stored at `key`. The other
+        files of `key`, stored under the current or the legacy hash, are
+        deleted.
+        """
+        key_dir = key + '/' + generate_hash(key) + '/'
+        key_name = key_dir + filename
+        items = list(self.bucket.list(prefix=key + '/'))
+        legacy = resolve_legacy_hash(key, [item.name[len(key) + 1:] for item in items])
+        old_dirs = (key_dir,) + ((key + '/' + legacy + '/',) if legacy else ())
+        for item in items:
+            if item.name != key_name and item.name.startswith(old_dirs):
+                item.delete()
+        return key_name
+
+    def upload(self, uploaded_file, key, acl='public-read'):
+        filename = secure_filename(uploaded_file.filename)
+        key_name = self.get_key_name(key, filename)
+        stream, size = get_stream(uploaded_file)
+        headers = {
+            'Content-Disposition': 'attachment; filename=%s' % filename,
+            'Content-Type': '%s' % get_mime_type(stream)
+        }
+        if size > MULTIPART_THRESHOLD:
+            self.upload_large(stream, size, key_name, headers, acl)
+        else:
+            k = self.bucket.new_key(key_name)
+            # the acl is sent along with the data
+            sent = k.set_contents_from_file(stream, headers=headers, policy=acl, size=size)
+            if sent != size:
+                return False
+        return self.base_url + key_name
+
+    def upload_large(self, stream, size, key_name, headers, acl):
+        """Multipart upload, one part of MULTIPART_CHUNK_SIZE at a time"""
+        upload = self.bucket.initiate_multipart_upload(key_name, headers=headers, policy=acl)
+        try:
+            for part_num, offset in enumerate(xrange(0, size, MULTIPART_CHUNK_SIZE), 1):
+                stream.seek(offset)
+                upload.upload_part_from_file(stream, part_num,
+                                             size=min(MULTIPART_CHUNK_SIZE, size - offset))
+            upload.complete_upload()
+        except Exception:
+            upload.cancel_upload()
+            raise
+
+    def get_private_url(self, url, expires_in):
+        """Signed url of the private file at `url`, valid for `expires_in` seconds"""
+        return self.bucket.new_key(url[len(self.base_url):]).generate_url(expires_in)
+
+    def copy(self, url, key, **kwargs):
+        """
+        Stores the file uploaded at `url` at `key` too. The bucket copies
+        it along with its headers and acl, nothing is sent again.
+        """
+        src_name = url[len(self.base_url):]
+        key_name = self.get_key_name(key, src_name.rsplit('/', 1)[1])
+        self.bucket.copy_key(key_name, self.bucket.name, src_name, preserve_acl=True)
+        return self.base_url + key_name
+
+
+class S3Storage(BucketStorage):
+    def __init__(self, bucket_name, aws_region, aws_key, aws_secret, bucket=None):
+        """
+        `bucket` can be given to use another S3 compatible bucket, like
+        a MemoryBucket
+        """
+        if bucket is None:
+            if '.' in bucket_name and aws_region and aws_region != '':
+                conn = boto.s3.connect_to_region(
+                    aws_region,
+                    aws_access_key_id=aws_key,
+                    aws_secret_access_key=aws_secret,
+                    calling_format=OrdinaryCallingFormat()
+                )
+            else:
+                conn = S3Connection(aws_key, aws_secret)
+            # not validated, that's a request more and uploads fail anyway
+            # if the bucket doesn't exist
+            bucket = conn.get_bucket(bucket_name, validate=False)
+        super(S3Storage, self).__init__(bucket, 'https://%s.s3.amazonaws.com/' % bucket_name)
+
+
+class GSStorage(BucketStorage):
+    def __init__(self, bucket_name, client_id, client_secret):
+        conn = GSConnection(client_id, client_secret, calling_format=OrdinaryCallingFormat())
+        bucket = conn.get_bucket(bucket_name, validate=False)
+        super(GSStorage, self).__init__(bucket, 'https://storage.googleapis.com/%s/' % bucket_name)
+
+    def upload_large(self, stream, size, key_name, headers, acl):
+        """Google Storage has resumable uploads instead of multipart ones"""
+        k = self.bucket.new_key(key_name)
+        k.set_contents_from_file(stream, headers=headers, policy=acl, size=size,
+                                 res_upload_handler=ResumableUploadHandler())
+
+
+class MemoryBucket(object):
+    """
+    In-memory stand-in for a boto S3 bucket, with the part of its API used
+    by BucketStorage. Lets the bucket storage run without a network, as in
+    tests and benchmarks.
+    """
+
+    class Key(object):
+        def __init__(self, bucket, name):
+            self.bucket = bucket
+            self.name = name
+            self.headers = {}
+            self.policy = None
+            self.data = ''
+
+        def set_contents_from_file(self, fp, headers=None, policy=None, size=None):
+            self.data = fp.read() if size is None else fp.read(size)
+            self.headers = dict(headers or {})
+            self.policy = policy
+            self.bucket.keys[self.name] = self
+            return len(self.data)
+
+        def delete(self):
+            self.bucket.keys.pop(self.name, None)
+
+        def generate_url(self, expires_in):
+            return 'memory://%s/%s?expires_in=%d' % (self.bucket.name, self.name, expires_in)
+
+    class MultiPartUpload(object):
+        def __init__(self, bucket, name, headers, policy):
+            self.key = MemoryBucket.Key(bucket, name)
+            self.key.headers = dict(headers or {})
+            self.key.policy = policy
+            self.parts = {}
+
+        def upload_part_from_file(self, fp, part_num, size=None):
+            self.parts[part_num] = fp.read() if size is None else fp.read(size)
+
+        def complete_upload(self):
+            self.key.data = ''.join(self.parts[_] for _ in sorted(self.parts))
+            self.key.bucket.keys[self.key.name] = self.key
+            self.key.bucket.multipart_uploads += 1
+
+        def cancel_upload(self):
+            self.parts = {}
+
+    def __init__(self, name='memory'):
+        self.name = name
+        self.keys = {}
+        self.multipart_uploads = 0
+
+    def list(self, prefix=''):
+        return [key for name, key in self.keys.items() if name.startswith(prefix)]
+
+    def new_key(self, name):
+        return MemoryBucket.Key(self, name)
+
+    def get_key(self, name):
+        return self.keys.get(name)
+
+    def initiate_multipart_upload(self, name, headers=None, policy=None):
+        return MemoryBucket.MultiPartUpload(self, name, headers, policy)
+
+    def copy_key(self, new_key_name, src_bucket_name, src_key_name, preserve_acl=False):
+        src = self.keys[src_key_name]
+        key = MemoryBucket.Key(self, new_key_name)
+        key.data = src.data
+        key.headers = dict(src.headers)
+        key.policy = src.policy if preserve_acl else None
+        self.keys[new_key_name] = key
+        return key
+
+
+# backend of the current thread, along with the settings it was made for.
+# boto connections must not be shared between threads.
+_storage = threading.local()
+
+
+def get_storage():
+    """
+    Returns the storage backend for the current settings. It is created
+    again only after the storage settings change.
+    """
+    settings = get_settings()
+    config = tuple(settings[_] for _ in STORAGE_SETTINGS)
+    cached = getattr(_storage, 'cached', None)
+    if cached is None or cached[0] != config:
+        cached = _storage.cached = (config, _create_storage(settings))
+    return cached[1]
+
+
+def _create_storage(settings):
+    if settings['aws_bucket_name'] and settings['aws_key'] and settings['aws_secret'] \
+            and settings['storage_place'] == 's3':
+        return S3Storage(settings['aws_bucket_name'], settings['aws_region'],
+                         settings['aws_key'], settings['aws_secret'])
+    elif settings['gs_bucket_name'] and settings['gs_key'] and settings['gs_secret'] \
+            and settings['storage_place'] == 'gs':
+        return GSStorage(settings['gs_bucket_name'], settings['gs_key'], settings['gs_secret'])
+    return LocalStorage()
+
+
 #########
 # MAIN
 #########
@@ -111,45 +431,30 @@ def upload(uploaded_file, key, **kwargs):
     """
     Upload handler
     """
-    # refresh settings
-    aws_bucket_name = get_settings()['aws_bucket_name']
-    aws_key = get_settings()['aws_key']
-    aws_secret = get_settings()['aws_secret']
-    aws_region = get_settings()['aws_region']
+    return get_storage().upload(uploaded_file, key, **kwargs)
 
-    gs_bucket_name = get_settings()['gs_bucket_name']
-    gs_key = get_settings()['gs_key']
-    gs_secret = get_settings()['gs_secret']
 
-    storage_place = get_settings()['storage_place']
+def copy(url, key, **kwargs):
+    """
+    Stores the file uploaded at `url` at `key` too, without uploading it
+    again
+    """
+    return get_storage().copy(url, key, **kwargs)
 
-    # upload
-    if aws_bucket_name and aws_key and aws_secret and storage_place == 's3':
-        return upload_to_aws(aws_bucket_name, aws_region, aws_key, aws_secret, uploaded_file, key, **kwargs)
-    elif gs_bucket_name and gs_key and gs_secret and storage_place == 'gs':
-        return upload_to_gs(gs_bucket_name, gs_key, gs_secret, uploaded_file, key, **kwargs)
-    else:
-        return upload_local(uploaded_file, key, **kwargs)
+
+def get_private_url(url, expires_in=PRIVATE_URL_EXPIRY):
+    """
+    Url giving access to the private file uploaded at `url` for
+    `expires_in` seconds
+    """
+    return get_storage().get_private_url(url, expires_in)
 
 
 def upload_local(uploaded_file, key, **kwargs):
     """
     Uploads file locally. Base dir - static/media/
     """
-    filename = secure_filename(uploaded_file.filename)
-    file_relative_path = 'static/media/' + key + '/' + generate_hash(key) + '/' + filename
-    file_path = app.config['BASE_DIR'] + '/' + file_relative_path
-    dir_path = file_path.rsplit('/', 1)[0]
-    # delete current
-    try:
-        rmtree(dir_path)
-    except OSError:
-        pass
-    # create dirs
-    if not os.path.isdir(dir_path):
-        os.makedirs(dir_path)
-    uploaded_file.save(file_path)
-    return '/serve_' + file_relative_path
+    return LocalStorage().upload(uploaded_file, key, **kwargs)
 
 
 def upload_to_aws(bucket_name, aws_region, aws_key, aws_secret, file, key, acl='public-read'):
@@ -157,73 +462,12 @@ def upload_to_aws(bucket_name, aws_region, aws_key, aws_secret, file, key, acl='
     Uploads to AWS at key
     http://{bucket}.s3.amazonaws.com/{key}
     """
-
-    if '.' in bucket_name and aws_region and aws_region != '':
-        conn = boto.s3.connect_to_region(
-            aws_region,
-            aws_access_key_id=aws_key,
-            aws_secret_access_key=aws_secret,
-            calling_format=OrdinaryCallingFormat()
-        )
-    else:
-        conn = S3Connection(aws_key, aws_secret)
-
-    bucket = conn.get_bucket(bucket_name)
-    k = Key(bucket)
-    # generate key
-    filename = secure_filename(file.filename)
-    key_dir = key + '/' + generate_hash(key) + '/'
-    k.key = key_dir + filename
-    # delete old data
-    for item in bucket.list(prefix='/' + key_dir):
-        item.delete()
-    # set object settings
-
-    file_data = file.read()
-    file_mime = magic.from_buffer(file_data, mime=True)
-    size = len(file_data)
-    sent = k.set_contents_from_string(
-        file_data,
-        headers={
-            'Content-Disposition': 'attachment; filename=%s' % filename,
-            'Content-Type': '%s' % file_mime
-        }
-    )
-    k.set_acl(acl)
-    s3_url = 'https://%s.s3.amazonaws.com/' % bucket_name
-    if sent == size:
-        return s3_url + k.key
-    return False
+    return S3Storage(bucket_name, aws_region, aws_key, aws_secret).upload(file, key, acl=acl)
 
 
 def upload_to_gs(bucket_name, client_id, client_secret, file, key, acl='public-read'):
-    conn = GSConnection(client_id, client_secret, calling_format=OrdinaryCallingFormat())
-    bucket = conn.get_bucket(bucket_name)
-    k = Key(bucket)
-    # generate key
-    filename = secure_filename(file.filename)
-    key_dir = key + '/' + generate_hash(key) + '/'
-    k.key = key_dir + filename
-    # delete old data
-    for item in bucket.list(prefix='/' + key_dir):
-        item.delete()
-    # set object settings
-
-    file_data = file.read()
-    file_mime = magic.from_buffer(file_data, mime=True)
-    size = len(file_data)
-    sent = k.set_contents_from_string(
-        file_data,
-        headers={
-            'Content-Disposition': 'attachment; filename=%s' % filename,
-            'Content-Type': '%s' % file_mime
-        }
-    )
-    k.set_acl(acl)
-    gs_url = 'https://storage.googleapis.com/%s/' % bucket_name
-    if sent == size:
-        return gs_url + k.key
-    return False
+    return GSStorage(bucket_name, client_id, client_secret).upload(file, key, acl=acl)
+
 
 def is_external_file(filename):
     return ('http://' in filename) or ('https://' in filename)
@@ -234,9 +478,38 @@ def is_external_file(filename):
 # ########
 
 
+def _to_bytes(value):
+    return value.encode('utf-8') if isinstance(value, unicode) else str(value)
+
+
 def generate_hash(key):
     """
-    Generate hash for key
+    Generate hash for key. HMAC-SHA256 of the key with the secret, url safe
+    """
+    digest = hmac.new(_to_bytes(get_settings()['secret']), _to_bytes(key), hashlib.sha256).digest()
+    return urlsafe_b64encode(digest)[:HASH_LENGTH]
+
+
+def generate_legacy_hash(key):
+    """
+    Hash for key used before `generate_hash`. scrypt is slow by design, so
+    it is only computed to find files stored the old way.
     """
     phash = generate_password_hash(key, get_settings()['secret'])
-    return b64encode(phash)[:10]  # limit len to 10, is sufficient
+    return b64encode(phash)[:HASH_LENGTH]
+
+
+def resolve_legacy_hash(key, paths):
+    """
+    Compatibility resolver for files stored under the legacy hash of a key.
+    `paths` are the paths of the files found under the key, relative to it.
+    Returns the legacy hash if some of them are stored under it, else None.
+    It is computed only if some file isn't under the current hash.
+    """
+    current = generate_hash(key) + '/'
+    if all(path.startswith(current) for path in paths):
+        return None
+    legacy = generate_legacy_hash(key)
+    if any(path.startswith(legacy + '/') for path in paths):
+        return legacy
+    return None
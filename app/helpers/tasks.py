@@ -1,16 +1,10 @@
 import requests
-import os
-import errno
-from flask import current_app as app
 from marrow.mailer import Mailer, Message
 from app import celery
 from app.helpers.versioning import strip_tags
-from app.helpers.exporters.pentabarfxml import PentabarfExporter
-from app.helpers.exporters.ical import ICalExporter
-from app.helpers.exporters.xcal import XCalExporter
-from app.helpers.storage import UPLOAD_PATHS, upload, UploadedFile
-from app.helpers.data_getter import DataGetter
-from app.helpers.data import save_to_db
+from app.helpers.exporters.schedule_exports import regenerate_export, regenerate_exports
+from app.helpers.assets.images import update_image_variants
+from app.helpers.pdf import render_pdf
 
 
 @celery.task(name='send.email.post')
@@ -45,52 +39,31 @@ def send_mail_via_smtp_task(config, payload):
     mailer.stop()
 
 
+@celery.task(name='export.schedule')
+def export_schedule_task(event_id):
+    regenerate_exports(event_id)
+
+
 @celery.task(name='export.pentabarf')
 def export_pentabarf_task(event_id):
-    event = DataGetter.get_event(event_id)
-    try:
-        os.mkdir(app.config['TEMP_UPLOADS_FOLDER'])
-    except OSError as exc:
-        if exc.errno != errno.EEXIST:
-            raise exc
-    filename = "pentabarf.xml"
-    file_path = app.config['TEMP_UPLOADS_FOLDER'] + "/" + filename
-    with open(file_path, "w") as temp_file:
-        temp_file.write(PentabarfExporter.export(event_id))
-    pentabarf_file = UploadedFile(file_path=file_path, filename=filename)
-    event.pentabarf_url = upload(pentabarf_file, UPLOAD_PATHS['exports']['pentabarf'].format(event_id=event_id))
-    save_to_db(event)
+    regenerate_export(event_id, 'pentabarf')
 
 
 @celery.task(name='export.ical')
 def export_ical_task(event_id):
-    event = DataGetter.get_event(event_id)
-    try:
-        os.mkdir(app.config['TEMP_UPLOADS_FOLDER'])
-    except OSError as exc:
-        if exc.errno != errno.EEXIST:
-            raise exc
-    filename = "ical.ics"
-    file_path = app.config['TEMP_UPLOADS_FOLDER'] + "/" + filename
-    with open(file_path, "w") as temp_file:
-        temp_file.write(ICalExporter.export(event_id))
-    ical_file = UploadedFile(file_path=file_path, filename=filename)
-    event.ical_url = upload(ical_file, UPLOAD_PATHS['exports']['ical'].format(event_id=event_id))
-    save_to_db(event)
+    regenerate_export(event_id, 'ical')
 
 
 @celery.task(name='export.xcal')
 def export_xcal_task(event_id):
-    event = DataGetter.get_event(event_id)
-    try:
-        os.mkdir(app.config['TEMP_UPLOADS_FOLDER'])
-    except OSError as exc:
-        if exc.errno != errno.EEXIST:
-            raise exc
-    filename = "xcal.xcs"
-    file_path = app.config['TEMP_UPLOADS_FOLDER'] + "/" + filename
-    with open(file_path, "w") as temp_file:
-        temp_file.write(XCalExporter.export(event_id))
-    xcal_file = UploadedFile(file_path=file_path, filename=filename)
-    event.xcal_url = upload(xcal_file, UPLOAD_PATHS['exports']['xcal'].format(event_id=event_id))
-    save_to_db(event)
+    regenerate_export(event_id, 'xcal')
+
+
+@celery.task(name='image.variants')
+def image_variants_task(model_name, obj_id, source_url, variants):
+    update_image_variants(model_name, obj_id, source_url, variants)
+
+
+@celery.task(name='pdf.render')
+def render_pdf_task(html, key, version, filename, private=False):
+    return render_pdf(html, key, version, filename, private)
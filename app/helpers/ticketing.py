@@ -14,6 +14,7 @@ from app.helpers.helpers import string_empty, send_email_for_after_purchase, get
     send_notif_for_after_purchase, send_email_after_cancel_ticket
 from app.helpers.notification_email_triggers import trigger_after_purchase_notifications
 from app.helpers.payment import StripePaymentsManager, represents_int, PayPalPaymentsManager
+from app.helpers.sales_stats import get_tickets_sold, get_tickets_sold_of_events
 from app.models import db
 from app.models.access_code import AccessCode
 from app.models.discount_code import DiscountCode, TICKET
@@ -94,21 +95,31 @@ class TicketingManager(object):
                          .filter(Ticket.type == type))
 
     @staticmethod
-    def get_ticket_stats(event):
+    def get_ticket_stats(event, tickets_sold=None):
+        """
+        :param tickets_sold: dict of ticket id -> tickets sold, read for the
+        event if not given
+        """
+        if tickets_sold is None:
+            tickets_sold = get_tickets_sold(event.id)
         tickets_summary = {}
         for ticket in event.tickets:
             tickets_summary[str(ticket.id)] = {
                 'name': ticket.name,
                 'total': ticket.quantity,
-                'completed': 0
+                'completed': tickets_sold.get(ticket.id, 0)
             }
-        orders = Order.query.filter_by(event_id=event.id).filter(
-            or_(Order.status == 'completed', Order.status == 'placed')).all()
-        for order in orders:
-            for order_ticket in order.tickets:
-                tickets_summary[str(order_ticket.ticket_id)]['completed'] += order_ticket.quantity
         return tickets_summary
 
+    @staticmethod
+    def get_ticket_stats_of_events(events):
+        """
+        :return: dict of event id -> `get_ticket_stats` of the event, with one
+        query for the tickets sold. Load the events `with_tickets`.
+        """
+        tickets_sold = get_tickets_sold_of_events([event.id for event in events])
+        return dict((event.id, TicketingManager.get_ticket_stats(event, tickets_sold)) for event in events)
+
     @staticmethod
     def get_all_orders_count_by_type(type='free'):
         return get_count(Order.query.filter_by(status='completed').filter(Ticket.type == type))
@@ -1,4 +1,20 @@
+from itertools import chain
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SessionBase
+
 from app.models import db
+from app.models.call_for_papers import CallForPaper
+from app.models.event import Event
+from app.models.event_copyright import EventCopyright
+from app.models.microlocation import Microlocation
+from app.models.session import Session
+from app.models.session_type import SessionType
+from app.models.social_link import SocialLink
+from app.models.speaker import Speaker
+from app.models.sponsor import Sponsor
+from app.models.ticket import Ticket
+from app.models.track import Track
 from app.models.version import Version
 
 
@@ -47,3 +63,53 @@ def get_all_columns():
         'event_ver', 'sessions_ver', 'speakers_ver', 'sponsors_ver',
         'tracks_ver', 'microlocations_ver'
     ]
+
+
+# LISTENERS
+# Version columns are also bumped on every flush touching the models below
+# so that changes made outside the API DAOs (wizard, admin views, imports)
+# are reflected in the version based ETags.
+
+VERSIONED_MODELS = {
+    Event: 'event_ver',
+    EventCopyright: 'event_ver',
+    CallForPaper: 'event_ver',
+    SocialLink: 'event_ver',
+    Ticket: 'event_ver',
+    Session: 'sessions_ver',
+    SessionType: 'sessions_ver',
+    Speaker: 'speakers_ver',
+    Track: 'tracks_ver',
+    Sponsor: 'sponsors_ver',
+    Microlocation: 'microlocations_ver',
+}
+
+
+@event.listens_for(SessionBase, 'after_flush')
+def bump_versions(session, flush_context):
+    """session.new/dirty/deleted still hold the pre-flush state here"""
+    # versions of events created in this flush start from 0
+    new_events = set(obj.id for obj in session.new if isinstance(obj, Event))
+    to_bump = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        column = VERSIONED_MODELS.get(type(obj))
+        if column is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, Event):
+            if obj in session.deleted:
+                continue
+            event_id = obj.id
+        else:
+            event_id = obj.event_id
+        if event_id is not None and event_id not in new_events:
+            to_bump.add((event_id, column))
+
+    versions = Version.__table__
+    for event_id, column in to_bump:
+        session.execute(
+            versions.update()
+                .where(versions.c.event_id == event_id)
+                .values({column: versions.c[column] + 1})
+        )
@@ -1,7 +1,5 @@
-import os
 from datetime import datetime
 
-from PIL import Image
 from flask import url_for, abort, current_app
 from flask.ext import login
 
@@ -12,7 +10,7 @@ from app.helpers.helpers import represents_int
 from app.helpers.static import EVENT_LICENCES
 from app.helpers.storage import UPLOAD_PATHS
 from app.helpers.wizard.helpers import get_searchable_location_name, get_event_time_field_format
-from app.helpers.assets.images import save_resized_image, save_event_image, get_path_of_temp_url
+from app.helpers.assets.images import save_event_image, queue_image_variants
 from app.models import db
 from app.models.email_notifications import EmailNotification
 from app.models.event import Event
@@ -273,13 +271,11 @@ def save_event_from_json(json, event_id=None):
     if event.background_url != event_data['background_url']:
         if event_data['background_url'] and event_data['background_url'].strip() != '':
             background_url = event_data['background_url']
-            jpg_image = convert_background_to_jpg(background_url)
             event.background_url = save_untouched_background(background_url, event.id)
-            event.large = save_resized_background(jpg_image, event.id, 'large', image_sizes)
-            event.thumbnail = save_resized_background(jpg_image, event.id, 'thumbnail', image_sizes)
-            event.icon = save_resized_background(jpg_image, event.id, 'icon', image_sizes)
-            os.remove(jpg_image)
             save_to_db(event)
+            # large, thumbnail and icon are kept until resized, unchanged if the image is
+            queue_image_variants('event', event.id, event.background_url,
+                                 get_background_variants(event.id, image_sizes))
         elif event.background_url != '':
             event.background_url = ''
             event.large = ''
@@ -366,21 +362,6 @@ def save_logo(logo_url, event_id):
     return save_event_image(logo_url, upload_path)
 
 
-def convert_background_to_jpg(background_url):
-    """
-    Convert the background image to JPG to reduce the file size
-    :param background_url:
-    :return:
-    """
-    file_path = get_path_of_temp_url(background_url)
-    im = Image.open(file_path)
-    out_im = file_path.replace('png', 'jpg')
-    bg = Image.new("RGB", im.size, (255, 255, 255))
-    bg.paste(im, (0, 0), im)
-    bg.save(out_im, quality=55)
-    return out_im
-
-
 def save_untouched_background(background_url, event_id):
     """
     Save the untouched background image
@@ -394,38 +375,20 @@ def save_untouched_background(background_url, event_id):
     return save_event_image(background_url, upload_path)
 
 
-def save_resized_background(background_image_file, event_id, size, image_sizes):
+def get_background_variants(event_id, image_sizes):
     """
-    Save the resized version of the background image
-    :param background_image_file:
+    Resized versions of the background image
     :param event_id:
-    :param size:
     :param image_sizes:
-    :return:
+    :return: list of (field, width, height, aspect, upload path)
     """
-
-    basewidth = image_sizes.full_width
-    aspect = image_sizes.full_aspect
-    height_size = image_sizes.full_height
-
-    if size == 'large':
-        aspect = image_sizes.full_aspect
-        basewidth = image_sizes.full_width
-        height_size = image_sizes.full_height
-    elif size == 'thumbnail':
-        aspect = image_sizes.full_aspect
-        basewidth = image_sizes.thumbnail_width
-        height_size = image_sizes.thumbnail_height
-    elif size == 'icon':
-        aspect = image_sizes.icon_aspect
-        basewidth = image_sizes.icon_width
-        height_size = image_sizes.icon_height
-
-    upload_path = UPLOAD_PATHS['event'][size].format(
-        event_id=int(event_id)
-    )
-
-    return save_resized_image(background_image_file, basewidth, aspect, height_size, upload_path)
+    sizes = [
+        ('large', image_sizes.full_width, image_sizes.full_height, image_sizes.full_aspect),
+        ('thumbnail', image_sizes.thumbnail_width, image_sizes.thumbnail_height, image_sizes.full_aspect),
+        ('icon', image_sizes.icon_width, image_sizes.icon_height, image_sizes.icon_aspect),
+    ]
+    return [(size, width, height, aspect, UPLOAD_PATHS['event'][size].format(event_id=int(event_id)))
+            for size, width, height, aspect in sizes]
 
 
 def save_social_links(social_links, event):
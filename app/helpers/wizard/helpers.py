@@ -1,10 +1,9 @@
 from datetime import datetime
 
-import requests
 from geoip import geolite2
-from requests import ConnectionError
 
 from app.helpers.flask_ext.helpers import get_real_ip
+from app.helpers.geocoding import get_locality
 
 
 def get_current_timezone():
@@ -23,20 +22,6 @@ def get_event_time_field_format(form, field):
 
 
 def get_searchable_location_name(event):
-    searchable_location_name = None
     if event.latitude and event.longitude:
-        url = 'https://maps.googleapis.com/maps/api/geocode/json'
-        latlng = '{},{}'.format(event.latitude, event.longitude)
-        params = {'latlng': latlng}
-        response = dict()
-
-        try:
-            response = requests.get(url, params).json()
-        except ConnectionError:
-            response['status'] = u'Error'
-
-        if response['status'] == u'OK':
-            for addr in response['results'][0]['address_components']:
-                if addr['types'] == ['locality', 'political']:
-                    searchable_location_name = addr['long_name']
-    return searchable_location_name
+        return get_locality(event.latitude, event.longitude)
+    return None
@@ -269,6 +269,10 @@ class Event(db.Model):
         }
 
 
+# proximity searches filter on a bounding box of latitude and longitude
+db.Index('ix_events_latitude_longitude', Event.latitude, Event.longitude)
+
+
 # LISTENERS
 
 @event.listens_for(Event, 'after_insert')
@@ -0,0 +1,35 @@
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.types import TypeDecorator, Text
+
+from app.models import db
+
+
+class SearchVector(TypeDecorator):
+    """tsvector on PostgreSQL, plain text of weighted terms elsewhere"""
+    impl = Text
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(TSVECTOR())
+        return dialect.type_descriptor(Text())
+
+
+class EventSearchDocument(db.Model):
+    """
+    Full text search document of an event.
+    Maintained by `app.helpers.search`.
+    """
+    __tablename__ = 'event_search_documents'
+    __table_args__ = (db.Index('ix_event_search_documents_vector', 'vector', postgresql_using='gin'),)
+
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), primary_key=True)
+    vector = db.Column(SearchVector)
+
+    def __repr__(self):
+        return '<EventSearchDocument %r>' % self.event_id
+
+    def __str__(self):
+        return unicode(self).encode('utf-8')
+
+    def __unicode__(self):
+        return 'Search document of %r' % self.event_id
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from app.models import db
+
+
+class ForexRate(db.Model):
+    """
+    Stored currency conversion rate. An amount in `from_currency` is
+    `rate` times that amount in `to_currency`.
+    """
+    __tablename__ = 'forex_rates'
+    __table_args__ = (db.UniqueConstraint('from_currency', 'to_currency', name='forex_rates_pair'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    from_currency = db.Column(db.String, nullable=False)
+    to_currency = db.Column(db.String, nullable=False)
+    rate = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime)
+
+    def __init__(self, from_currency=None, to_currency=None, rate=None):
+        self.from_currency = from_currency
+        self.to_currency = to_currency
+        self.rate = rate
+        self.updated_at = datetime.now()
+
+    def __repr__(self):
+        return '<ForexRate %r/%r>' % (self.from_currency, self.to_currency)
+
+    def __str__(self):
+        return unicode(self).encode('utf-8')
+
+    def __unicode__(self):
+        return '%s/%s %r' % (self.from_currency, self.to_currency, self.rate)
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from app.models import db
+
+
+class GeocodeCache(db.Model):
+    """
+    Stored response of the geocoding API. `lookup` is an address or a
+    rounded `lat,lng` pair. Lookups without results are stored too so that
+    they are not repeated.
+    """
+    __tablename__ = 'geocode_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    lookup = db.Column(db.String, nullable=False, unique=True)
+    status = db.Column(db.String)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    locality = db.Column(db.String)
+    created_at = db.Column(db.DateTime)
+
+    def __init__(self, lookup=None, status=None, latitude=None, longitude=None, locality=None):
+        self.lookup = lookup
+        self.status = status
+        self.latitude = latitude
+        self.longitude = longitude
+        self.locality = locality
+        self.created_at = datetime.now()
+
+    def __repr__(self):
+        return '<GeocodeCache %r>' % self.lookup
+
+    def __str__(self):
+        return unicode(self).encode('utf-8')
+
+    def __unicode__(self):
+        return self.lookup
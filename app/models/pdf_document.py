@@ -0,0 +1,22 @@
+from app.models import db
+
+
+class PdfDocument(db.Model):
+    """
+    PDF made out of the request by `app.helpers.pdf`: the version of the
+    html it was made from, its url, and the task making the next version.
+    Kept in the database as the web processes and the celery workers don't
+    share a cache.
+    """
+    __tablename__ = 'pdf_documents'
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String, nullable=False, unique=True)
+    version = db.Column(db.String)
+    url = db.Column(db.String)
+    task_id = db.Column(db.String)
+    task_version = db.Column(db.String)
+    queued_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return '<PdfDocument %r>' % self.key
@@ -0,0 +1,51 @@
+from app.models import db
+
+
+class SalesRollup(db.Model):
+    """
+    Daily ticket sales of an event. Rows with a ticket hold tickets count,
+    sales and fee base of the ticket. Rows without a ticket hold orders count
+    and amount of the orders. Maintained by `app.helpers.sales_rollup`.
+    """
+    __tablename__ = 'sales_rollup'
+    __table_args__ = (db.Index('ix_sales_rollup_event_day', 'event_id', 'day'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'))
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id', ondelete='CASCADE'), nullable=True)
+    status = db.Column(db.String)
+    currency = db.Column(db.String)
+    day = db.Column(db.Date, index=True)
+
+    orders_count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Float, nullable=False, default=0)
+    tickets_count = db.Column(db.Integer, nullable=False, default=0)
+    # discounted sales without service fee
+    sales = db.Column(db.Float, nullable=False, default=0)
+    # sum of ticket prices of paid order lines, service fee is charged on it
+    fee_base = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return '<SalesRollup %r %r %r>' % (self.event_id, self.day, self.status)
+
+    def __str__(self):
+        return unicode(self).encode('utf-8')
+
+    def __unicode__(self):
+        return 'Sales of %r on %s' % (self.event_id, self.day)
+
+
+class SalesRollupPending(db.Model):
+    """
+    (event, day) bucket of the rollup whose orders changed since it was last
+    computed. Written by order writers, consumed by
+    `app.helpers.sales_rollup.refresh_pending_rollups`.
+    """
+    __tablename__ = 'sales_rollup_pending'
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'))
+    day = db.Column(db.Date)
+
+    def __repr__(self):
+        return '<SalesRollupPending %r %r>' % (self.event_id, self.day)
@@ -0,0 +1,34 @@
+from app.models import db
+
+
+class ScheduleExport(db.Model):
+    """
+    Digest of the last uploaded iCal, xCal or Pentabarf export of an event,
+    so that an unchanged export is not uploaded again. Maintained by
+    `app.helpers.exporters.schedule_exports`.
+    """
+    __tablename__ = 'schedule_exports'
+    __table_args__ = (db.UniqueConstraint('event_id', 'export_format'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'))
+    export_format = db.Column(db.String, nullable=False)
+    digest = db.Column(db.String)
+
+    def __repr__(self):
+        return '<ScheduleExport %r %r>' % (self.event_id, self.export_format)
+
+
+class ScheduleExportPending(db.Model):
+    """
+    Event whose exports are queued for regeneration. Written by the web
+    processes, cleared by the task when it starts.
+    """
+    __tablename__ = 'schedule_export_pending'
+
+    # not a foreign key, events are marked before their transaction commits
+    event_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    scheduled_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return '<ScheduleExportPending %r>' % self.event_id
@@ -112,6 +112,12 @@ class Setting(db.Model):
     android_app_url = db.Column(db.String)
     web_app_url = db.Column(db.String)
 
+    #
+    # Internal
+    #
+    # Incremented on every change, used to reload cached settings
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
     def __init__(self,
                  app_environment=Environment.PRODUCTION,
                  aws_key=None,
@@ -1,8 +1,4 @@
-import base64
-from StringIO import StringIO
-
-import qrcode
-
+from app.helpers.qr import get_qr
 from app.models import db
 
 
@@ -64,21 +60,12 @@ class TicketHolder(db.Model):
             return ''
 
     @property
-    def qr_code(self):
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=0,
-        )
-        qr.add_data(self.order.identifier + "-" + str(self.id))
-        qr.make(fit=True)
-        img = qr.make_image()
+    def qr_text(self):
+        return self.order.identifier + "-" + str(self.id)
 
-        buffer = StringIO()
-        img.save(buffer, format="JPEG")
-        img_str = base64.b64encode(buffer.getvalue())
-        return img_str
+    @property
+    def qr_code(self):
+        return get_qr(self.qr_text)
 
     @property
     def serialize(self):
@@ -6,17 +6,14 @@ from sqlalchemy import event, desc
 from sqlalchemy.orm.exc import MultipleResultsFound, NoResultFound
 
 from app.helpers.helpers import get_count
+from app.helpers.permission_resolver import get_event_roles, has_permission, OPERATIONS
 from app.models.session import Session
 from app.models.speaker import Speaker
 from user_detail import UserDetail
 from app.models import db
 from app.models.notifications import Notification
-from app.models.permission import Permission
-from app.models.role import Role
-from app.models.service import Service
 from app.models.system_role import UserSystemRole
 from app.models.user_permissions import UserPermission
-from app.models.users_events_roles import UsersEventsRoles as UER
 from app.models.panel_permissions import PanelPermission
 
 # System-wide
@@ -84,25 +81,13 @@ class User(db.Model):
         """Checks if user has any of the Roles at an Event.
         Exclude Attendee Role.
         """
-        attendee_role = Role.query.filter_by(name=ATTENDEE).first()
-        uer = UER.query.filter(UER.user == self, UER.event_id == event_id,
-                               UER.role != attendee_role).first()
-        if uer is None:
-            return False
-        else:
-            return True
+        roles = get_event_roles(self.id, event_id)
+        return bool(roles - {ATTENDEE})
 
     def _is_role(self, role_name, event_id):
         """Checks if a user has a particular Role at an Event.
         """
-        role = Role.query.filter_by(name=role_name).first()
-        uer = UER.query.filter_by(user=self,
-                                  event_id=event_id,
-                                  role=role).first()
-        if not uer:
-            return False
-        else:
-            return True
+        return role_name in get_event_roles(self.id, event_id)
 
     def is_organizer(self, event_id):
         return self._is_role(ORGANIZER, event_id)
@@ -123,14 +108,7 @@ class User(db.Model):
         return self._is_role(ATTENDEE, event_id)
 
     def _has_perm(self, operation, service_class, event_id):
-        # Operation names and their corresponding permission in `Permissions`
-        operations = {
-            'create': 'can_create',
-            'read': 'can_read',
-            'update': 'can_update',
-            'delete': 'can_delete',
-        }
-        if operation not in operations.keys():
+        if operation not in OPERATIONS:
             raise ValueError('No such operation defined')
 
         try:
@@ -142,18 +120,7 @@ class User(db.Model):
         if self.is_super_admin:
             return True
 
-        service = Service.query.filter_by(name=service_name).first()
-
-        uer_querylist = UER.query.filter_by(user=self,
-                                            event_id=event_id)
-        for uer in uer_querylist:
-            role = uer.role
-            perm = Permission.query.filter_by(role=role,
-                                              service=service).first()
-            if getattr(perm, operations[operation]):
-                return True
-
-        return False
+        return has_permission(self.id, operation, service_name, event_id)
 
     def can_create(self, service_class, event_id):
         return self._has_perm('create', service_class, event_id)
@@ -214,8 +181,7 @@ class User(db.Model):
         """Check if a user has a Custom System Role assigned.
         `role_id` is id of a `CustomSysRole` instance.
         """
-        role = UserSystemRole.query.filter_by(user=self, role_id=role_id).first()
-        return bool(role)
+        return any(role.role_id == role_id for role in self.sys_roles)
 
     def first_access_panel(self):
         """Check if the user is assigned a Custom Role or not
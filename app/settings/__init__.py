@@ -1,23 +1,62 @@
 import stripe
-from flask import current_app
+from flask import current_app, g
 from sqlalchemy import desc
 
+from app.models import db
 from app.models.fees import TicketFees
 from app.models.setting import Setting, Environment
 
 
+class SettingsSnapshot(dict):
+    """
+    Read only snapshot of system settings.
+    Copy it with `dict()` to make changes and save them using `set_settings`
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('Settings snapshot is read only')
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
 def get_settings():
     """
-    Use this to get latest system settings
+    Use this to get latest system settings.
+    Settings are cached per process along with their version stamp. The stamp
+    is checked at most once per request (or task) and settings are reloaded
+    only if they were changed, possibly by another process.
     """
-    if 'custom_settings' in current_app.config:
-        return current_app.config['custom_settings']
-    s = Setting.query.order_by(desc(Setting.id)).first()
-    if s is None:
+    snapshot = g.get('settings_snapshot')
+    if snapshot is not None:
+        return snapshot
+    latest = db.session.query(Setting.id, Setting.version) \
+        .order_by(desc(Setting.id)).first()
+    if latest is None:
         set_settings(secret='super secret key', app_name='Open Event')
-    else:
-        current_app.config['custom_settings'] = make_dict(s)
-    return current_app.config['custom_settings']
+        return g.settings_snapshot
+    if current_app.config.get('custom_settings_version') != tuple(latest):
+        _cache_settings(Setting.query.get(latest[0]))
+    g.settings_snapshot = current_app.config['custom_settings']
+    return g.settings_snapshot
+
+
+def use_settings(settings):
+    """
+    Makes `settings`, as returned by `get_settings`, the settings of the
+    current app context. For threads working for a request or task, so
+    that they don't query the settings again.
+    """
+    g.settings_snapshot = settings
+
+
+def _cache_settings(setting):
+    """
+    Caches a snapshot of `setting` for this process and the current request
+    """
+    current_app.config['custom_settings'] = SettingsSnapshot(make_dict(setting))
+    current_app.config['custom_settings_version'] = (setting.id, setting.version)
+    g.settings_snapshot = current_app.config['custom_settings']
 
 
 def get_setts():
@@ -61,6 +100,8 @@ def set_settings(**kwargs):
         else:
             for key, value in kwargs.iteritems():
                 setattr(setting, key, value)
+            # let other processes know that settings changed
+            setting.version = Setting.version + 1
         from app.helpers.data import save_to_db
         save_to_db(setting, 'Setting saved')
         current_app.secret_key = setting.secret
@@ -78,12 +119,12 @@ def set_settings(**kwargs):
         if setting.app_environment == Environment.TESTING and not current_app.config['TESTING']:
             current_app.config.from_object('config.TestingConfig')
 
-        current_app.config['custom_settings'] = make_dict(setting)
+        _cache_settings(setting)
 
 
 def make_dict(s):
     arguments = {}
     for name, column in s.__mapper__.columns.items():
-        if not (column.primary_key or column.unique):
+        if not (column.primary_key or column.unique or name == 'version'):
             arguments[name] = getattr(s, name)
     return arguments
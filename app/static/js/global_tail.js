@@ -48,9 +48,9 @@ function initializeSearchAutoComplete(location_slug) {
     var events = new Bloodhound({
         datumTokenizer: Bloodhound.tokenizers.obj.whitespace('value'),
         queryTokenizer: Bloodhound.tokenizers.whitespace,
-        prefetch: {
-            url: '/explore/autocomplete/events/' + location_slug + '.json',
-            cache: false
+        remote: {
+            url: '/explore/autocomplete/events/' + location_slug + '.json?query=%QUERY',
+            wildcard: '%QUERY'
         }
     });
 
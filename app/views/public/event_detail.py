@@ -53,7 +53,7 @@ def display_event_detail_home(identifier):
         custom_placeholder = DataGetter.get_custom_placeholder_by_name('Other')
 
     call_for_speakers = DataGetter.get_call_for_papers(event.id).first()
-    accepted_sessions = DataGetter.get_sessions(event.id).all()
+    accepted_sessions = DataGetter.with_profiles(DataGetter.get_sessions(event.id), 'with_speakers').all()
     if event.copyright:
         licence_details = DataGetter.get_licence_details(event.copyright.licence)
     else:
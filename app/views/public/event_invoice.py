@@ -1,21 +1,14 @@
-from cStringIO import StringIO
-
 import pycountry
 from flask import Blueprint
-from flask import redirect, url_for, request, jsonify, make_response, flash
+from flask import redirect, url_for, request, jsonify, flash
 from flask import render_template
 from flask.ext.restplus import abort
-from xhtml2pdf import pisa
 
 from app.helpers.data import save_to_db
 from app.helpers.invoicing import InvoicingManager
 from app.helpers.payment import PayPalPaymentsManager, StripePaymentsManager
-
-
-def create_pdf(pdf_data):
-    pdf = StringIO()
-    pisa.CreatePDF(StringIO(pdf_data.encode('utf-8')), pdf)
-    return pdf
+from app.helpers.pdf import pdf_response
+from app.helpers.storage import UPLOAD_PATHS
 
 
 event_invoicing = Blueprint('event_invoicing', __name__, url_prefix='/invoices')
@@ -68,13 +61,10 @@ def view_invoice_after_payment_pdf(invoice_identifier):
     invoice = InvoicingManager.get_invoice_by_identifier(invoice_identifier)
     if not invoice or invoice.status != 'completed':
         abort(404)
-    pdf = create_pdf(render_template('gentelella/guest/invoicing/invoice_pdf.html',
-                                     invoice=invoice, event=invoice.event))
-    response = make_response(pdf.getvalue())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = \
-        'inline; filename=%s.pdf' % invoice.get_invoice_number()
-    return response
+    return pdf_response(render_template('gentelella/guest/invoicing/invoice_pdf.html',
+                                        invoice=invoice, event=invoice.event),
+                        UPLOAD_PATHS['pdf']['event_invoice'].format(identifier=invoice_identifier),
+                        '%s.pdf' % invoice.get_invoice_number())
 
 
 @event_invoicing.route('/initiate/payment/', methods=('POST',))
@@ -1,22 +1,23 @@
 import json
 
-import requests
 from flask import Blueprint
 from flask import render_template
 from flask import request, redirect, url_for, jsonify
 from flask.ext.restplus import abort
 from flask_restplus import marshal
-from requests import ConnectionError
 
 from app.api.events import EVENT, EVENT_PAGINATED
 from app.api.helpers.helpers import get_paginated_list, get_object_list
 from app.helpers.data import DataGetter
 from app.helpers.flask_ext.helpers import deslugify
+from app.helpers.geocoding import geocode
 from app.helpers.helpers import get_date_range
 from app.helpers.static import EVENT_TOPICS
 from app.models.event import Event
 
 RESULTS_PER_PAGE = 10
+# seconds for which total count of search results is cached
+RESULTS_COUNT_TIMEOUT = 60
 
 
 def get_paginated(**kwargs):
@@ -32,7 +33,7 @@ def get_paginated(**kwargs):
         return get_paginated_list(Event, url=request.path, args={
             'start': (current_page * RESULTS_PER_PAGE) + 1,
             'limit': RESULTS_PER_PAGE,
-        }, **kwargs)
+        }, count_timeout=RESULTS_COUNT_TIMEOUT, **kwargs)
     except:
         return {
             'start': 0,
@@ -54,24 +55,12 @@ def clean_dict(d):
 
 
 def get_coordinates(location_name):
-
-    location = {
-        'lat': 0.0,
-        'lng': 0.0
-    }
-
-    url = 'https://maps.googleapis.com/maps/api/geocode/json'
-    params = {'address': location_name}
-    response = dict()
-
-    try:
-        response = requests.get(url, params).json()
-    except ConnectionError:
-        response['status'] = u'Error'
-
-    if response['status'] == u'OK':
-        location = response['results'][0]['geometry']['location']
-
+    location = geocode(location_name)
+    if not location:
+        location = {
+            'lat': 0.0,
+            'lng': 0.0
+        }
     return location
 
 
@@ -98,7 +87,11 @@ def categories_autocomplete():
 @explore.route('/autocomplete/events/<location_slug>.json', methods=('GET', 'POST'))
 def events_autocomplete(location_slug):
     location = deslugify(location_slug)
-    results = get_object_list(Event, __event_search_location=location)
+    filtering = {'__event_search_location': location}
+    query = request.args.get('query')
+    if query:
+        filtering['__event_search_prefix'] = query
+    results = get_object_list(Event, **filtering)
     results = marshal(results, EVENT)
     return jsonify([{'value': result['name'], 'type': 'event_name'} for result in results])
 
@@ -123,7 +116,7 @@ def explore_view(location):
     if location and location != 'world':
         filtering['__event_search_location'] = location
     if word:
-        filtering['__event_contains'] = word
+        filtering['__event_search'] = word
     if category:
         filtering['topic'] = category
     if sub_category:
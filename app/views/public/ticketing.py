@@ -1,27 +1,23 @@
-from cStringIO import StringIO
+import hashlib
 
 import pycountry
 import requests
 import stripe
 from flask import Blueprint
-from flask import redirect, url_for, request, jsonify, make_response, flash
+from flask import redirect, url_for, request, jsonify, flash
 from flask import render_template
 from flask.ext.restplus import abort
-from xhtml2pdf import pisa
 
 from app import get_settings
 from app.helpers.data import save_to_db
 from app.helpers.payment import PayPalPaymentsManager
+from app.helpers.pdf import pdf_response
+from app.helpers.qr import get_order_qrs
+from app.helpers.storage import UPLOAD_PATHS
 from app.helpers.ticketing import TicketingManager
 from app.helpers.data_getter import DataGetter
 
 
-def create_pdf(pdf_data):
-    pdf = StringIO()
-    pisa.CreatePDF(StringIO(pdf_data.encode('utf-8')), pdf)
-    return pdf
-
-
 ticketing = Blueprint('ticketing', __name__, url_prefix='/orders')
 
 
@@ -109,13 +105,10 @@ def view_order_after_payment_pdf(order_identifier):
     order = TicketingManager.get_and_set_expiry(order_identifier)
     if not order or (order.status != 'completed' and order.status != 'placed'):
         abort(404)
-    pdf = create_pdf(render_template('gentelella/guest/ticketing/invoice_pdf.html',
-                                     order=order, event=order.event))
-    response = make_response(pdf.getvalue())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = \
-        'inline; filename=%s.pdf' % order.get_invoice_number()
-    return response
+    return pdf_response(render_template('gentelella/guest/ticketing/invoice_pdf.html',
+                                        order=order, event=order.event),
+                        UPLOAD_PATHS['pdf']['order_invoice'].format(identifier=order_identifier),
+                        '%s.pdf' % order.get_invoice_number())
 
 
 @ticketing.route('/<order_identifier>/view/tickets/pdf/')
@@ -124,12 +117,12 @@ def view_order_tickets_after_payment_pdf(order_identifier):
     email = request.args.get('email', '')
     if not order or (order.status != 'completed' and order.status != 'placed'):
         abort(404)
-    pdf = create_pdf(render_template('gentelella/guest/ticketing/pdf/ticket.html', order=order, email=email))
-    response = make_response(pdf.getvalue())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = \
-        'inline; filename=%s-Ticket.pdf' % order.event.name
-    return response
+    return pdf_response(render_template('gentelella/guest/ticketing/pdf/ticket.html', order=order, email=email,
+                                        qrs=get_order_qrs(order)),
+                        # the tickets listed depend on the email
+                        UPLOAD_PATHS['pdf']['order_tickets'].format(
+                            identifier=order_identifier, email=hashlib.sha1(email.encode('utf-8')).hexdigest()),
+                        '%s-Ticket.pdf' % order.event.name)
 
 
 @ticketing.route('/initiate/payment/', methods=('POST',))
@@ -12,6 +12,7 @@ from flask import redirect, request, url_for, jsonify, render_template
 from flask import send_from_directory
 from flask import flash
 
+from app.helpers.cached_getter import CachedGetter
 from app.helpers.data import DataManager, delete_from_db, save_to_db
 from app.helpers.data_getter import DataGetter
 from app.helpers.helpers import uploaded_file
@@ -37,7 +38,7 @@ def index_view():
     pages = DataGetter.get_all_pages()
     custom_placeholder = DataGetter.get_custom_placeholders()
     subtopics = DataGetter.get_event_subtopics()
-    settings = get_settings()
+    settings = dict(get_settings())
     languages_copy = copy.deepcopy(LANGUAGES)
     try:
         languages_copy.pop("en")
@@ -48,6 +49,7 @@ def index_view():
         for key, value in dic.items():
             settings[key] = value[0]
             set_settings(**settings)
+        CachedGetter.clear_template_context()
         flash("Changes have been saved.")
     return render_template(
         'gentelella/super_admin/content/content.html', pages=pages, settings=settings,
@@ -100,6 +102,7 @@ def placeholder_upload():
                                                    url=placeholder,
                                                    thumbnail=background_thumbnail_url)
             save_to_db(placeholder_db, 'Custom Placeholder saved')
+            CachedGetter.clear_template_context()
 
             return jsonify({'status': 'ok', 'placeholder': placeholder, 'id': placeholder_db.id})
         else:
@@ -116,6 +119,7 @@ def placeholder_upload_details():
         placeholder_db.copyright = copyright_info
         placeholder_db.origin = origin_info
         save_to_db(placeholder_db, 'Custom Placeholder updated')
+        CachedGetter.clear_template_context()
         return jsonify({'status': 'ok'})
     return jsonify({'status': 'error'})
 
@@ -123,6 +127,7 @@ def placeholder_upload_details():
 @sadmin_content.route('/pages/create/', methods=['POST'])
 def create_view():
     DataManager.create_page(request.form)
+    CachedGetter.clear_template_context()
     return redirect(url_for('sadmin_content.index_view'))
 
 
@@ -131,6 +136,7 @@ def details_view(page_id):
     page = DataGetter.get_page_by_id(page_id)
     if request.method == 'POST':
         DataManager().update_page(page, request.form)
+        CachedGetter.clear_template_context()
         return redirect(url_for('sadmin_content.details_view', page_id=page_id))
     pages = DataGetter.get_all_pages()
     return render_template('gentelella/super_admin/content/content.html',
@@ -142,6 +148,7 @@ def details_view(page_id):
 def trash_view(page_id):
     page = DataGetter.get_page_by_id(page_id)
     delete_from_db(page, "Page has already deleted")
+    CachedGetter.clear_template_context()
     return redirect(url_for('sadmin_content.index_view'))
 
 
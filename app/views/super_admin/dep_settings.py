@@ -4,6 +4,7 @@ from flask import render_template
 from flask import request, current_app
 from werkzeug.datastructures import ImmutableMultiDict
 
+from app.helpers.cached_getter import CachedGetter
 from app.helpers.data import save_to_db, delete_from_db
 from app.helpers.data_getter import DataGetter
 from app.models.image_sizes import ImageSizes
@@ -110,8 +111,9 @@ def index_view():
                 else:
                     dic[i] = v
         set_settings(**dic)
+        CachedGetter.clear_template_context()
 
-    settings = get_settings()
+    settings = dict(get_settings())
     fees = DataGetter.get_fee_settings()
     image_config = DataGetter.get_image_configs()
     event_image_sizes = DataGetter.get_image_sizes_by_type(type='event')
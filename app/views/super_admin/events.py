@@ -18,12 +18,10 @@ def index_view():
     live_events = DataGetter.get_all_live_events()
     draft_events = DataGetter.get_all_draft_events()
     past_events = DataGetter.get_all_past_events()
-    all_events = DataGetter.get_all_events()
+    all_events = DataGetter.get_all_events('with_tickets')
     trash_events = DataGetter.get_trash_events()
-    all_events_include_trash = all_events + trash_events.all()
-    all_ticket_stats = {}
-    for event in all_events_include_trash:
-        all_ticket_stats[event.id] = TicketingManager.get_ticket_stats(event)
+    all_events_include_trash = all_events + DataGetter.with_profiles(trash_events, 'with_tickets').all()
+    all_ticket_stats = TicketingManager.get_ticket_stats_of_events(all_events_include_trash)
     return render_template('gentelella/super_admin/events/events.html',
                            live_events=live_events,
                            draft_events=draft_events,
@@ -1,16 +1,24 @@
+import hmac
+
 from flask import Blueprint
-from flask import render_template
+from flask import current_app as app
+from flask import render_template, request, make_response
 
 from app.helpers.data_getter import DataGetter
 from app.views.super_admin import REPORTS, check_accessible, list_navbar
 from app.helpers.deployment.heroku import HerokuApi
 from app.helpers.deployment.kubernetes import KubernetesApi
+from app.helpers.instrumentation import get_endpoint_stats, get_query_budget, render_prometheus
 
 sadmin_reports = Blueprint('sadmin_reports', __name__, url_prefix='/admin/reports')
 
 
 @sadmin_reports.before_request
 def verify_accessible():
+    token = app.config['METRICS_TOKEN']
+    if request.endpoint == 'sadmin_reports.metrics_view' and token and \
+            hmac.compare_digest(str(request.headers.get('Authorization', '')), 'Bearer ' + token):
+        return
     return check_accessible(REPORTS)
 
 
@@ -32,6 +40,8 @@ def index_view():
         heroku_api = HerokuApi()
         logplex_url = heroku_api.get_logplex_url()
 
+    endpoint_stats = [(endpoint, stats, get_query_budget(endpoint)) for endpoint, stats in get_endpoint_stats()]
+
     return render_template(
         'gentelella/super_admin/reports/reports.html',
         mails=mails,
@@ -41,6 +51,7 @@ def index_view():
         on_kubernetes=on_kubernetes,
         pods_info=pods_info,
         activities=activities,
+        endpoint_stats=endpoint_stats,
         navigation_bar=list_navbar()
     )
 
@@ -49,3 +60,10 @@ def index_view():
 def kubernetes_log_view(pod_name):
     kubernetes_api = KubernetesApi()
     return kubernetes_api.get_logs(pod=pod_name), 200
+
+
+@sadmin_reports.route('/metrics')
+def metrics_view():
+    response = make_response(render_prometheus())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4'
+    return response
@@ -1,28 +1,28 @@
 # encoding=utf8
 
 import copy
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 from flask import Blueprint
 from flask import render_template
 from flask import request
 from flask import url_for
-from flask.ext import login
 from werkzeug.exceptions import abort
 from werkzeug.utils import redirect
 
-from app import forex
 from app.helpers.cached_getter import CachedGetter
 from app.helpers.data_getter import DataGetter
 from app.helpers.invoicing import InvoicingManager
-from app.helpers.payment import get_fee
-from app.helpers.ticketing import TicketingManager
+from app.helpers.payment import get_fee, convert_currency, REPORTS_CURRENCY
+from app.helpers.sales_rollup import get_rollup_sales, get_rollup_daily_sales
+from app.helpers.sales_stats import empty_orders_summary
 from app.models.system_role import CustomSysRole, UserSystemRole
 from app.models.user import User
 from app.views.super_admin import SALES
 from app.views.super_admin import check_accessible, list_navbar
 
-display_currency = 'USD'
+display_currency = REPORTS_CURRENCY
 
 sadmin_sales = Blueprint('sadmin_sales', __name__, url_prefix='/admin/sales')
 
@@ -47,18 +47,10 @@ def fees_by_events_view():
         ('to_date' in request.args and 'from_date' not in request.args):
         return redirect(url_for('.fees_by_events_view'))
 
-    marketer_role = CustomSysRole.query.filter_by(name='Marketer').first()
-    marketer_id = login.current_user.id if login.current_user.is_sys_role(marketer_role.id) else None
-
+    filters = {'status': 'completed'}
     if from_date and to_date:
-        orders = TicketingManager.get_orders(
-            from_date=datetime.strptime(from_date, '%d/%m/%Y'),
-            to_date=datetime.strptime(to_date, '%d/%m/%Y'),
-            status='completed',
-            marketer_id=marketer_id
-        )
-    else:
-        orders = TicketingManager.get_orders(status='completed', marketer_id=marketer_id)
+        filters['from_date'] = datetime.strptime(from_date, '%d/%m/%Y')
+        filters['to_date'] = datetime.strptime(to_date, '%d/%m/%Y')
 
     events = DataGetter.get_all_events()
 
@@ -75,17 +67,15 @@ def fees_by_events_view():
     fee_total = 0
     tickets_total = 0
 
-    for order in orders:
-        if order.event:
-            for order_ticket in order.tickets:
-                fee_summary[str(order.event.id)]['tickets_count'] += order_ticket.quantity
-                tickets_total += order_ticket.quantity
-                ticket = CachedGetter.get_ticket(order_ticket.ticket_id)
-                if order.paid_via != 'free' and order.amount > 0 and ticket.price > 0:
-                    fee = ticket.price * (get_fee(order.event.payment_currency) / 100)
-                    fee = forex(order.event.payment_currency, display_currency, fee)
-                    fee_summary[str(order.event.id)]['fee_amount'] += fee
-                    fee_total += fee
+    for event_id, _, currency, _, _, tickets_count, _, fee_base in get_rollup_sales(**filters):
+        event_summary = fee_summary.get(str(event_id))
+        if not event_summary:
+            continue
+        fee = convert_currency(currency, display_currency, (fee_base or 0) * (get_fee(currency) / 100))
+        event_summary['tickets_count'] += tickets_count or 0
+        event_summary['fee_amount'] += fee
+        tickets_total += tickets_count or 0
+        fee_total += fee
 
     return render_template('gentelella/super_admin/sales/fees.html',
                            fee_summary=fee_summary,
@@ -155,6 +145,7 @@ def sales_by_marketer_view(by_discount_code=False):
             tickets_summary[str(marketer.id)] = {
                 'email': marketer.email,
                 'name': marketer.user_detail.firstname,
+                'payment_currency': display_currency,
                 'tickets_count': 0,
                 'sales': 0,
                 'discounts': 0
@@ -165,17 +156,21 @@ def sales_by_marketer_view(by_discount_code=False):
             tickets_summary[str(discount_code.id)] = {
                 'email': discount_code.code,
                 'name': str(discount_code.value) + '% off for ' + str(discount_code.max_quantity) + ' months',
+                'payment_currency': display_currency,
                 'tickets_count': 0,
                 'sales': 0,
                 'discounts': 0,
                 'marketer': discount_code.marketer.email
             }
 
+    filters = {'status': 'completed'}
+    if from_date and to_date:
+        filters['from_date'] = datetime.strptime(from_date, '%d/%m/%Y')
+        filters['to_date'] = datetime.strptime(to_date, '%d/%m/%Y')
+
     events = DataGetter.get_all_events_with_discounts()
 
     for event in events:
-        temp_month_summary = {}
-        print event
         discount_coupon = CachedGetter.get_discount_code(event.discount_code_id)
 
         if not by_discount_code:
@@ -183,34 +178,27 @@ def sales_by_marketer_view(by_discount_code=False):
         else:
             key = str(discount_coupon.id)
 
-        if from_date and to_date:
-            orders = TicketingManager.get_orders(
-                from_date=datetime.strptime(from_date, '%d/%m/%Y'),
-                to_date=datetime.strptime(to_date, '%d/%m/%Y'),
-                status='completed',
-                event_id=event.id
-            )
-        else:
-            orders = TicketingManager.get_orders(status='completed', event_id=event.id)
-
-        for order in orders:
-            if order.status == 'completed' and order.paid_via != 'free':
-                orders_summary['orders_count'] += 1
-                key = '{month:02d}{year:d}'.format(month=order.completed_at.month, year=order.completed_at.year)
-                temp_month_summary[key] = order.amount
-                orders_summary['sales'] += order.amount
-                for order_ticket in order.tickets:
-                    tickets_summary[key]['tickets_count'] += order_ticket.quantity
-                    orders_summary['tickets_count'] += order_ticket.quantity
+        if key not in tickets_summary:
+            continue
+
+        month_summary = OrderedDict()
+        for day, currency, orders_count, amount, tickets_count, _ in \
+                get_rollup_daily_sales(event_id=event.id, **filters):
+            amount = convert_currency(currency, display_currency, amount or 0)
+            orders_summary['orders_count'] += orders_count or 0
+            orders_summary['tickets_count'] += tickets_count or 0
+            orders_summary['total_sales'] += amount
+            tickets_summary[key]['tickets_count'] += tickets_count or 0
+            tickets_summary[key]['sales'] += amount
+            month = (day.year, day.month)
+            month_summary[month] = month_summary.get(month, 0) + amount
 
         # Calculate discount on a monthly basis
-        month_count = 1
-        for amount in temp_month_summary:
-            if discount_coupon.max_quantity <= month_count:
-                tickets_summary[key]['discounts'] \
-                    += amount * (discount_coupon.value / 100)
-                orders_summary['total_discounts'] += amount * (discount_coupon.value / 100)
-            month_count += 1
+        for month_count, amount in enumerate(month_summary.values(), 1):
+            if month_count <= (discount_coupon.max_quantity or 0):
+                discount = amount * (discount_coupon.value / 100.0)
+                tickets_summary[key]['discounts'] += discount
+                orders_summary['total_discounts'] += discount
 
     return render_template('gentelella/super_admin/sales/by_marketer.html',
                            tickets_summary=tickets_summary,
@@ -234,62 +222,23 @@ def sales_by_events_view(path):
 
     promoted_events = path == 'discounted-events'
 
+    filters = {'promoted_event': promoted_events}
     if from_date and to_date:
-        orders = TicketingManager.get_orders(
-            from_date=datetime.strptime(from_date, '%d/%m/%Y'),
-            to_date=datetime.strptime(to_date, '%d/%m/%Y'),
-            promoted_event=promoted_events
-        )
-    else:
-        orders = TicketingManager.get_orders(promoted_event=promoted_events)
+        filters['from_date'] = datetime.strptime(from_date, '%d/%m/%Y')
+        filters['to_date'] = datetime.strptime(to_date, '%d/%m/%Y')
 
     if promoted_events:
         events = DataGetter.get_all_events_with_discounts()
     else:
         events = DataGetter.get_all_events()
 
-    orders_summary = {
-        'completed': {
-            'class': 'success',
-            'tickets_count': 0,
-            'orders_count': 0,
-            'total_sales': 0
-        },
-        'placed': {
-            'class': 'info',
-            'tickets_count': 0,
-            'orders_count': 0,
-            'total_sales': 0
-        },
-        'pending': {
-            'class': 'warning',
-            'tickets_count': 0,
-            'orders_count': 0,
-            'total_sales': 0
-        },
-        'expired': {
-            'class': 'danger',
-            'tickets_count': 0,
-            'orders_count': 0,
-            'total_sales': 0
-        },
-        'deleted': {
-            'class': 'primary',
-            'tickets_count': 0,
-            'orders_count': 0,
-            'total_sales': 0
-        },
-        'cancelled': {
-            'class': 'default',
-            'tickets_count': 0,
-            'orders_count': 0,
-            'total_sales': 0
-        }
-    }
+    orders_summary = empty_orders_summary()
 
     tickets_summary_event_wise = {}
     tickets_summary_organizer_wise = {}
     tickets_summary_location_wise = {}
+    organizer_keys = {}
+    location_keys = {}
 
     for event in events:
         tickets_summary_event_wise[str(event.id)] = {
@@ -337,63 +286,33 @@ def sales_by_events_view(path):
                 str(event.discount_code.value) + '% off for ' + str(event.discount_code.max_quantity) + ' months'
 
         if organizer:
+            organizer_keys[event.id] = str(organizer.user.id)
             tickets_summary_organizer_wise[str(organizer.user.id)] = \
                 copy.deepcopy(tickets_summary_event_wise[str(event.id)])
             tickets_summary_organizer_wise[str(organizer.user.id)]['name'] = organizer.user.email
 
+        location_keys[event.id] = unicode(event.searchable_location_name)
         tickets_summary_location_wise[unicode(event.searchable_location_name)] = \
             copy.deepcopy(tickets_summary_event_wise[str(event.id)])
         tickets_summary_location_wise[unicode(event.searchable_location_name)]['name'] = \
             event.searchable_location_name
 
-    for order in orders:
-        if order.event:
-            if order.status == 'initialized':
-                order.status = 'pending'
-            orders_summary[str(order.status)]['orders_count'] += 1
-            orders_summary[str(order.status)]['total_sales'] += forex(order.event.payment_currency,
-                                                                      display_currency, order.amount)
-            for order_ticket in order.tickets:
-                discount = TicketingManager.get_discount_code(order.event_id, order.discount_code_id)
-                orders_summary[str(order.status)]['tickets_count'] += order_ticket.quantity
-                ticket = CachedGetter.get_ticket(order_ticket.ticket_id)
-                tickets_summary_event_wise[str(order.event_id)][str(order.status)]['tickets_count'] \
-                    += order_ticket.quantity
-                tickets_summary_organizer_wise[str(organizer.user.id)][str(order.status)]['tickets_count'] \
-                    += order_ticket.quantity
-                tickets_summary_location_wise[unicode(order.event.searchable_location_name)][str(order.status)][
-                    'tickets_count'] \
-                    += order_ticket.quantity
-
-                if order.paid_via != 'free' and order.amount > 0:
-                    if discount and str(ticket.id) in discount.tickets.split(","):
-                        if discount.type == "amount":
-                            tickets_summary_event_wise[str(order.event_id)][str(order.status)][
-                                'sales'] += forex(order.event.payment_currency, display_currency, \
-                                            order_ticket.quantity * (ticket.price - discount.value))
-                            tickets_summary_organizer_wise[str(organizer.user.id)][str(order.status)][
-                                'sales'] += forex(order.event.payment_currency, display_currency, \
-                                            order_ticket.quantity * (ticket.price - discount.value))
-                            tickets_summary_location_wise[str(order.event.searchable_location_name)][str(order.status)][
-                                'sales'] += forex(order.event.payment_currency, display_currency, \
-                                            order_ticket.quantity * (ticket.price - discount.value))
-                        else:
-                            tickets_summary_event_wise[str(order.event_id)][str(order.status)]['sales'] += \
-                                forex(order.event.payment_currency, display_currency, \
-                                    order_ticket.quantity * (ticket.price - discount.value * ticket.price / 100.0))
-                            tickets_summary_organizer_wise[str(organizer.user.id)][str(order.status)]['sales'] += \
-                                forex(order.event.payment_currency, display_currency, \
-                                    order_ticket.quantity * (ticket.price - discount.value * ticket.price / 100.0))
-                            tickets_summary_location_wise[str(order.event.searchable_location_name)][str(order.status)]['sales'] += \
-                                forex(order.event.payment_currency, display_currency, \
-                                    order_ticket.quantity * (ticket.price - discount.value * ticket.price / 100.0))
-                    else:
-                        tickets_summary_event_wise[str(order.event_id)][str(order.status)][
-                            'sales'] += forex(order.event.payment_currency, display_currency, order_ticket.quantity * ticket.price)
-                        tickets_summary_organizer_wise[str(organizer.user.id)][str(order.status)][
-                            'sales'] += forex(order.event.payment_currency, display_currency, order_ticket.quantity * ticket.price)
-                        tickets_summary_location_wise[str(order.event.searchable_location_name)][str(order.status)][
-                            'sales'] += forex(order.event.payment_currency, display_currency, order_ticket.quantity * ticket.price)
+    for event_id, status, currency, orders_count, amount, tickets_count, sales, _ in get_rollup_sales(**filters):
+        event_summary = tickets_summary_event_wise.get(str(event_id))
+        if not event_summary:
+            continue
+        summaries = [event_summary, tickets_summary_location_wise[location_keys[event_id]]]
+        if event_id in organizer_keys:
+            summaries.append(tickets_summary_organizer_wise[organizer_keys[event_id]])
+
+        orders_summary[status]['orders_count'] += orders_count or 0
+        orders_summary[status]['tickets_count'] += tickets_count or 0
+        orders_summary[status]['total_sales'] += convert_currency(currency, display_currency, amount or 0)
+        sales = convert_currency(currency, display_currency, sales or 0)
+        for summary in summaries:
+            summary[status]['tickets_count'] += tickets_count or 0
+            summary[status]['sales'] += sales
+
     if path == 'events' or path == 'discounted-events':
         return render_template(
             'gentelella/super_admin/sales/by_events.html',
@@ -41,31 +41,12 @@ def verify_accessible():
 
 @sadmin_users.route('/')
 def index_view():
-    active_user_list = []
-    trash_user_list = []
-    all_user_list = []
-    active_users = DataGetter.get_active_users()
-    trash_users = DataGetter.get_trash_users()
-    all_users = DataGetter.get_all_users()
+    all_users = DataGetter.get_all_users('with_roles')
+    event_roles = DataGetter.get_event_roles_by_user()
     custom_sys_roles = DataGetter.get_custom_sys_roles()
-    for user in all_users:
-        event_roles = DataGetter.get_event_roles_for_user(user.id)
-        all_user_list.append({
-            'user': user,
-            'event_roles': event_roles}
-        )
-    for user in active_users:
-        event_roles = DataGetter.get_event_roles_for_user(user.id)
-        active_user_list.append({
-            'user': user,
-            'event_roles': event_roles, }
-        )
-    for user in trash_users:
-        event_roles = DataGetter.get_event_roles_for_user(user.id)
-        trash_user_list.append({
-            'user': user,
-            'event_roles': event_roles, }
-        )
+    all_user_list = [{'user': user, 'event_roles': event_roles.get(user.id, [])} for user in all_users]
+    active_user_list = [item for item in all_user_list if item['user'].deleted_at is None]
+    trash_user_list = [item for item in all_user_list if item['user'].deleted_at is not None]
     return render_template('gentelella/super_admin/users/users.html',
                            active_user_list=active_user_list,
                            trash_user_list=trash_user_list,
@@ -79,11 +60,9 @@ def user_events(user_id):
     live_events = DataGetter.get_live_events_of_user(user_id)
     draft_events = DataGetter.get_draft_events_of_user(user_id)
     past_events = DataGetter.get_past_events_of_user(user_id)
-    all_events = DataGetter.get_all_events_of_user(user_id)
+    all_events = DataGetter.get_all_events_of_user(user_id, 'with_tickets')
     imported_events = DataGetter.get_imports_by_user(user_id)
-    all_ticket_stats = {}
-    for event in all_events:
-        all_ticket_stats[event.id] = TicketingManager.get_ticket_stats(event)
+    all_ticket_stats = TicketingManager.get_ticket_stats_of_events(all_events)
 
     return render_template('gentelella/users/events/index.html',
                            live_events=live_events,
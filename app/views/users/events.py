@@ -45,11 +45,9 @@ def index_view():
     live_events = DataGetter.get_live_events_of_user()
     draft_events = DataGetter.get_draft_events_of_user()
     past_events = DataGetter.get_past_events_of_user()
-    all_events = DataGetter.get_all_events_of_user()
+    all_events = DataGetter.get_all_events_of_user(None, 'with_tickets')
     imported_events = DataGetter.get_imports_by_user()
-    all_ticket_stats = {}
-    for event in all_events:
-        all_ticket_stats[event.id] = TicketingManager.get_ticket_stats(event)
+    all_ticket_stats = TicketingManager.get_ticket_stats_of_events(all_events)
     if not AuthManager.is_verified_user():
         flash(Markup('Your account is unverified. '
                      'Please verify by clicking on the confirmation link that has been emailed to you.'
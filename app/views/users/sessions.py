@@ -2,18 +2,16 @@ import json
 import re
 
 from flask import Blueprint
-from flask import make_response
 from flask import url_for, redirect, flash, render_template
 from flask.ext import login
 from app import db
 from app.helpers.data import DataManager, delete_from_db, trash_session as _trash_session, \
     restore_session as _restore_session
 from app.helpers.data_getter import DataGetter
+from app.helpers.exporters.csv_exports import csv_response, get_speaker_rows, get_session_rows, \
+    SPEAKER_HEADER, SESSION_HEADER
 from app.helpers.notification_email_triggers import trigger_session_state_change_notifications
 from app.helpers.permission_decorators import *
-from app.helpers.versioning import strip_tags
-from StringIO import StringIO
-from csv import writer
 
 event_sessions = Blueprint('event_sessions', __name__, url_prefix='/events/<int:event_id>/sessions')
 
@@ -28,7 +26,7 @@ def get_session_or_throw(session_id):
 @event_sessions.route('/')
 @can_access
 def index_view(event_id):
-    sessions = DataGetter.get_sessions_by_event_id(event_id)
+    sessions = DataGetter.get_sessions_by_event_id(event_id, 'with_speakers')
     event = DataGetter.get_event(event_id)
     if not event.has_session_speakers:
         return render_template('gentelella/users/events/info/enable_module.html', active_page='sessions',
@@ -150,65 +148,18 @@ def add_speaker_view(event_id, session_id):
 @belongs_to_event
 @can_access
 def download_speakers_as_csv(event_id):
-    speakers = DataGetter.get_speakers(event_id)
     event = DataGetter.get_event(event_id)
-    main = [["Speaker Name", "Speaker Email", "Speaker Session(s)", \
-             "Speaker Mobile", "Speaker Organisation", "Speaker Position"]]
-    for speaker in speakers:
-        data = [speaker.name if speaker.name else '', speaker.email if speaker.email else '']
-        if speaker.sessions:
-            session_details = ''
-            for session in speaker.sessions:
-                if not session.deleted_at:
-                    session_details += session.title + ' (' + session.state + '), '
-            data.append(session_details[:-2])
-        data.append(speaker.mobile if speaker.mobile else '')
-        data.append(speaker.organisation if speaker.organisation else '')
-        data.append(speaker.position if speaker.position else '')
-        main.append(data)
-
-    final = StringIO()
-    csvWriter = writer(final)
-    csvWriter.writerows(main)
-    response = make_response(final.getvalue())
-    final.close()
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = \
-        'inline; filename=%s-Speakers.csv' % (re.sub(r"[^\w\s]", '', event.name).replace(" ", "_"))
-
-    return response
+    return csv_response(SPEAKER_HEADER, get_speaker_rows(event_id),
+                        '%s-Speakers.csv' % (re.sub(r"[^\w\s]", '', event.name).replace(" ", "_")))
 
 
 @event_sessions.route('/download_sessions_as_csv/')
 @belongs_to_event
 @can_access
 def download_sessions_as_csv(event_id):
-    sessions = DataGetter.get_sessions_by_event_id(event_id)
     event = DataGetter.get_event(event_id)
-    main = [["Session Title", "Session Speakers", \
-             "Session Track", "Session Abstract", "Email Sent"]]
-    for session in sessions:
-        if not session.deleted_at:
-            data = [session.title + " (" + session.state + ")" if session.title else '']
-            if session.speakers:
-                inSession = ''
-                for speaker in session.speakers:
-                    if speaker.name:
-                        inSession += (speaker.name + ', ')
-                data.append(inSession[:-2])
-            data.append(session.track.name if session.track.name else '')
-            data.append(strip_tags(session.short_abstract) if session.short_abstract else '')
-            data.append('Yes' if session.state_email_sent else 'No')
-            main.append(data)
-    final = StringIO()
-    csvWriter = writer(final)
-    csvWriter.writerows(main)
-    response = make_response(final.getvalue())
-    final.close()
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = \
-        'inline; filename=%s-Sessions.csv' % (re.sub(r"[^\w\s]", '', event.name).replace(" ", "_"))
-    return response
+    return csv_response(SESSION_HEADER, get_session_rows(event_id),
+                        '%s-Sessions.csv' % (re.sub(r"[^\w\s]", '', event.name).replace(" ", "_")))
 
 
 @event_sessions.route('/<int:session_id>/accept/', methods=('POST', 'GET'))
@@ -1,6 +1,3 @@
-from StringIO import StringIO
-from flask import make_response
-
 import pycountry
 import re
 from datetime import datetime
@@ -10,13 +7,16 @@ from flask import redirect, flash
 from flask import request, render_template
 from flask import url_for
 
-from xhtml2pdf import pisa
-
 from app import get_settings
 from app.helpers.cache import cache
 from app.helpers.data import delete_from_db
 from app.helpers.data import save_to_db
 from app.helpers.data_getter import DataGetter
+from app.helpers.exporters.csv_exports import csv_response, get_attendee_rows, get_order_rows, \
+    ATTENDEE_HEADER, ORDER_HEADER
+from app.helpers.pdf import pdf_response
+from app.helpers.sales_stats import get_event_sales
+from app.helpers.storage import UPLOAD_PATHS
 from app.helpers.ticketing import TicketingManager
 from app.models.ticket import Ticket
 from app.helpers.permission_decorators import can_access
@@ -24,12 +24,6 @@ from app.helpers.permission_decorators import can_access
 event_ticket_sales = Blueprint('event_ticket_sales', __name__, url_prefix='/events/<int:event_id>/tickets')
 
 
-def create_pdf(pdf_data):
-    pdf = StringIO()
-    pisa.CreatePDF(StringIO(pdf_data.encode('utf-8')), pdf)
-    return pdf
-
-
 @cache.memoize(50)
 def get_ticket(ticket_id):
     return Ticket.query.get(ticket_id)
@@ -39,110 +33,7 @@ def get_ticket(ticket_id):
 @can_access
 def display_ticket_stats(event_id):
     event = DataGetter.get_event(event_id)
-    orders = TicketingManager.get_orders(event_id)
-
-    orders_summary = {
-        'completed': {
-            'class': 'success',
-            'tickets_count': 0,
-            'orders_count': 0,
-            'total_sales': 0
-        },
-        'placed': {
-            'class': 'info',
-            'tickets_count': 0,
-            'orders_count': 0,
-            'total_sales': 0
-        },
-        'pending': {
-            'class': 'warning',
-            'tickets_count': 0,
-            'orders_count': 0,
-            'total_sales': 0
-        },
-        'expired': {
-            'class': 'danger',
-            'tickets_count': 0,
-            'orders_count': 0,
-            'total_sales': 0
-        },
-        'deleted': {
-            'class': 'primary',
-            'tickets_count': 0,
-            'orders_count': 0,
-            'total_sales': 0
-        },
-        'cancelled': {
-            'class': 'default',
-            'tickets_count': 0,
-            'orders_count': 0,
-            'total_sales': 0
-        }
-    }
-
-    tickets_summary = {}
-
-    for ticket in event.tickets:
-        tickets_summary[str(ticket.id)] = {
-            'name': ticket.name,
-            'quantity': ticket.quantity,
-            'completed': {
-                'tickets_count': 0,
-                'sales': 0
-            },
-            'placed': {
-                'tickets_count': 0,
-                'sales': 0
-            },
-            'pending': {
-                'tickets_count': 0,
-                'sales': 0
-            },
-            'expired': {
-                'class': 'danger',
-                'tickets_count': 0,
-                'sales': 0
-            },
-            'deleted': {
-                'tickets_count': 0,
-                'sales': 0
-            },
-            'cancelled': {
-                'tickets_count': 0,
-                'sales': 0
-            },
-        }
-
-    for order in orders:
-        if order.status == 'initialized':
-            order.status = 'pending'
-        fees = DataGetter.get_fee_settings_by_currency(DataGetter.get_event(order.event_id).payment_currency)
-        orders_summary[str(order.status)]['orders_count'] += 1
-        orders_summary[str(order.status)]['total_sales'] += order.amount
-
-        for order_ticket in order.tickets:
-            discount = TicketingManager.get_discount_code(event_id, order.discount_code_id)
-            orders_summary[str(order.status)]['tickets_count'] += order_ticket.quantity
-            ticket = get_ticket(order_ticket.ticket_id)
-            tickets_summary[str(ticket.id)][str(order.status)]['tickets_count'] += order_ticket.quantity
-            ticket_price = ticket.price
-            if fees and not ticket.absorb_fees:
-                order_fee = fees.service_fee * (ticket.price * order_ticket.quantity) / 100.0
-                if order_fee > fees.maximum_fee:
-                    ticket_price = ticket.price + fees.maximum_fee / order_ticket.quantity
-                else:
-                    ticket_price = ticket.price + fees.service_fee * ticket.price / 100.0
-
-            if order.paid_via != 'free' and order.amount > 0:
-                if discount and str(ticket.id) in discount.tickets.split(","):
-                    if discount.type == "amount":
-                        tickets_summary[str(ticket.id)][str(order.status)]['sales'] += order_ticket.quantity * (
-                            ticket_price - discount.value)
-                    else:
-                        tickets_summary[str(ticket.id)][str(order.status)]['sales'] += order_ticket.quantity * (
-                            ticket_price - discount.value * ticket_price / 100.0)
-                else:
-                    tickets_summary[str(ticket.id)][str(order.status)]['sales'] += order_ticket.quantity * ticket_price
+    orders_summary, tickets_summary = get_event_sales(event)
     return render_template('gentelella/users/events/tickets/tickets.html', event=event, event_id=event_id,
                            orders_summary=orders_summary, tickets_summary=tickets_summary)
 
@@ -277,139 +168,50 @@ def display_attendees(event_id, pdf=None):
 @can_access
 def download_as_pdf(event_id):
     (event, event_id, holders, orders, ticket_names, selected_ticket) = display_attendees(event_id=event_id, pdf='print_pdf')
-    pdf = create_pdf(render_template('gentelella/users/events/tickets/download_attendees.html', event=event,
-                                     event_id=event_id, holders=holders, ticket_names=ticket_names,
-                                     selected_ticket=selected_ticket))
-    response = make_response(pdf.getvalue())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = \
-        'inline; filename=%s.csv' % (re.sub(r"[^\w\s]", '', event.name).replace(" ", "_"))
-    return response
+    return pdf_response(render_template('gentelella/users/events/tickets/download_attendees.html', event=event,
+                                        event_id=event_id, holders=holders, ticket_names=ticket_names,
+                                        selected_ticket=selected_ticket),
+                        UPLOAD_PATHS['pdf']['attendees'].format(event_id=event_id),
+                        '%s.pdf' % (re.sub(r"[^\w\s]", '', event.name).replace(" ", "_")),
+                        private=True)
+
+
+def get_date_filters():
+    """from and to dates of the orders to show, if both are set"""
+    from_date = request.args.get('from_date')
+    to_date = request.args.get('to_date')
+    if from_date and to_date:
+        return datetime.strptime(from_date, '%d/%m/%Y'), datetime.strptime(to_date, '%d/%m/%Y')
+    return None, None
 
 
 @event_ticket_sales.route('/attendees/csv')
 @can_access
 def download_as_csv(event_id):
-    (event, event_id, holders, orders, ticket_names, selected_ticket) = display_attendees(event_id=event_id, pdf='print_csv')
-    value = 'Order#,Order Date, Status, First Name, Last Name, Email, Country,' \
-            'Payment Type, Ticket Name, Ticket Price, Ticket Type \n'
-
-    for holder in holders:
-        if holder['status'] != "deleted":
-            if 'order_invoice' in holder:
-                value += holder['order_invoice']
-            value += ','
-            if 'created_at' in holder:
-                value += str(holder['created_at'])
-            value += ','
-            if 'status' in holder:
-                value += holder['status']
-            value += ','
-            if 'firstname' in holder:
-                value += holder['firstname']
-            value += ','
-            if 'lastname' in holder:
-                value += holder['lastname']
-            value += ','
-            if 'email' in holder:
-                value += holder['email']
-            value += ','
-            if 'country' in holder:
-                value += str(holder['country'])
-            value += ','
-            if 'paid_via' in holder and holder['paid_via']:
-                value += holder['paid_via']
-            value += ','
-            if 'ticket_name' in holder:
-                value += str(holder['ticket_name'])
-            value += ','
-            if 'ticket_price' in holder:
-                value += str(holder['ticket_price'])
-            value += ','
-            if 'ticket_type' in holder:
-                value += str(holder['ticket_type'])
-            value += ','
-            value += '\n'
-
-    response = make_response(value)
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = \
-        'inline; filename=%s.csv' % (re.sub(r"[^\w\s]", '', event.name).replace(" ", "_"))
-
-    return response
+    event = DataGetter.get_event(event_id)
+    from_date, to_date = get_date_filters()
+    rows = get_attendee_rows(event_id, from_date, to_date, request.args.get('ticket_name'))
+    return csv_response(ATTENDEE_HEADER, rows, '%s.csv' % (re.sub(r"[^\w\s]", '', event.name).replace(" ", "_")))
 
 
 @event_ticket_sales.route('/orders/pdf')
 @can_access
 def download_orders_as_pdf(event_id):
     (event, event_id, orders, discount_code) = display_orders(event_id=event_id, pdf='print_pdf')
-    pdf = create_pdf(render_template('gentelella/users/events/tickets/download_orders.html', event=event, event_id=event_id,
-                                     orders=orders, discount_code=discount_code))
-    response = make_response(pdf.getvalue())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = \
-        'inline; filename=%s.csv' % (re.sub(r"[^\w\s]", '', event.name).replace(" ", "_"))
-    return response
+    return pdf_response(render_template('gentelella/users/events/tickets/download_orders.html', event=event,
+                                        event_id=event_id, orders=orders, discount_code=discount_code),
+                        UPLOAD_PATHS['pdf']['orders'].format(event_id=event_id),
+                        '%s.pdf' % (re.sub(r"[^\w\s]", '', event.name).replace(" ", "_")),
+                        private=True)
 
 
 @event_ticket_sales.route('/orders/csv')
 @can_access
 def download_orders_as_csv(event_id):
-    (event, event_id, holders, orders, ticket_names, selected_ticket) = display_attendees(event_id=event_id, pdf='print_csv')
-    value = 'Order#,Order Date, Status, Payment Type, Quantity,Total Amount,Discount Code,' \
-            'First Name, Last Name, Email \n'
-
-    for order in orders:
-        if order.status != "deleted":
-            # To avoid KeyError exception
-            try:
-                value += str(order.get_invoice_number()) + ','
-            except:
-                value += ','
-            try:
-                value += str(order.created_at) + ','
-            except:
-                value += ','
-            try:
-                value += order.status + ','
-            except:
-                value += ','
-            try:
-                value += order.paid_via + ','
-            except:
-                value += ','
-            try:
-                value += str(order.get_tickets_count()) + ','
-            except:
-                value += ','
-            try:
-                value += str(order.amount) + ','
-            except:
-                value += ','
-            try:
-                value += order.discount_code.code + ','
-            except:
-                value += ','
-            try:
-                value += order.user.user_detail.firstname + ','
-            except:
-                value += ','
-            try:
-                value += order.user.user_detail.lastname + ','
-            except:
-                value += ','
-            try:
-                value += order.user.email + ','
-            except:
-                value += ','
-            value += '\n'
-
-    response = make_response(value)
-    response.headers['Content-Type'] = 'text/csv'
-    response.headers['Content-Disposition'] = \
-        'inline; filename=%s.csv' % (re.sub(r"[^\w\s]", '', event.name).replace(" ", "_"))
-
-    return response
+    event = DataGetter.get_event(event_id)
+    from_date, to_date = get_date_filters()
+    return csv_response(ORDER_HEADER, get_order_rows(event_id, from_date, to_date),
+                        '%s.csv' % (re.sub(r"[^\w\s]", '', event.name).replace(" ", "_")))
 
 
 @event_ticket_sales.route('/add-order/', methods=('GET', 'POST'))
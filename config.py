@@ -50,6 +50,21 @@ class Config(object):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', None)
     DATABASE_QUERY_TIMEOUT = 0.1
 
+    # share of the requests recording metrics (app/helpers/instrumentation.py)
+    INSTRUMENTATION_SAMPLE_RATE = float(os.getenv('INSTRUMENTATION_SAMPLE_RATE', '0.1'))
+    # queries a request may run before it is logged, by endpoint. None for no budget.
+    DEFAULT_QUERY_BUDGET = 100
+    QUERY_BUDGETS = {
+        'sadmin_users.index_view': 10,
+        'sadmin_users.user_events': 15,
+        'sadmin_events.index_view': 15,
+        'events.index_view': 15,
+        'event_sessions.index_view': 15,
+        'api.schedule_schedule': 10,
+    }
+    # token of the scrapers of /admin/reports/metrics, sent as a Bearer token
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
     if not SQLALCHEMY_DATABASE_URI:
         print '`DATABASE_URL` either not exported or empty'
         exit()
@@ -119,5 +134,6 @@ class TestingConfig(Config):
     CELERY_ALWAYS_EAGER = True
     CELERY_EAGER_PROPAGATES_EXCEPTIONS = True
     SQLALCHEMY_RECORD_QUERIES = True
+    INSTRUMENTATION_SAMPLE_RATE = 1
     DEBUG_TB_ENABLED = False
     BROKER_BACKEND = 'memory'
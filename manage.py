@@ -50,10 +50,61 @@ def fix_session_owners():
     db.session.commit()
 
 
+@manager.command
+def rebuild_sales_rollup():
+    from app.helpers.sales_rollup import rebuild_sales_rollup as rebuild
+    rebuild()
+    print "Sales rollup rebuilt"
+
+
+@manager.command
+def rebuild_search_index():
+    from app.helpers.search import rebuild_search_documents
+    rebuild_search_documents()
+    print "Search index rebuilt"
+
+
+@manager.option('-n', '--count', type=int, default=100, help='Number of uploads. Default 100')
+@manager.option('-s', '--size', type=int, default=256, help='Size of a file in KB. Default 256')
+def benchmark_storage(count, size):
+    """Times uploads to the local storage and to an in-memory S3 bucket"""
+    import shutil
+    import tempfile
+    import time
+    from app.helpers.storage import LocalStorage, S3Storage, MemoryBucket, UploadedMemory
+    data = os.urandom(size * 1024)
+    base_dir = tempfile.mkdtemp()
+    backends = [('local', LocalStorage(base_dir)),
+                ('memory bucket', S3Storage('benchmark', None, None, None, bucket=MemoryBucket()))]
+    try:
+        for name, storage in backends:
+            start, start_cpu = time.time(), time.clock()
+            for i in xrange(count):
+                storage.upload(UploadedMemory(data, 'benchmark.bin'), 'benchmark/%d' % i)
+            print "%-14s %8.2f ms/upload %8.2f ms CPU/upload" % (
+                name, (time.time() - start) * 1000 / count, (time.clock() - start_cpu) * 1000 / count)
+    finally:
+        shutil.rmtree(base_dir)
+
+
+@manager.option('-n', '--count', type=int, default=50, help='Number of keys. Default 50')
+def benchmark_key_hash(count):
+    """Compares the CPU time of the current and the legacy storage key hashes"""
+    import time
+    from app.helpers.storage import UPLOAD_PATHS, generate_hash, generate_legacy_hash
+    keys = [UPLOAD_PATHS['speakers']['photo'].format(event_id=1, id=i) for i in xrange(count)]
+    for name, func in (('legacy (scrypt)', generate_legacy_hash), ('hmac-sha256', generate_hash)):
+        start_cpu = time.clock()
+        for key in keys:
+            func(key)
+        print "%-16s %10.4f ms CPU/key" % (name, (time.clock() - start_cpu) * 1000 / count)
+
+
 @manager.option('-e', '--event', help='Event ID. Eg. 1')
 def fix_speaker_images(event):
     from app.helpers.sessions_speakers.speakers import speaker_image_sizes
-    from app.helpers.sessions_speakers.speakers import save_resized_photo
+    from app.helpers.sessions_speakers.speakers import get_photo_variants
+    from app.helpers.assets.images import save_image_variants
     import urllib
     from app.helpers.storage import generate_hash
     event_id = int(event)
@@ -64,9 +115,9 @@ def fix_speaker_images(event):
             file_relative_path = 'static/media/temp/' + generate_hash(str(speaker.id)) + '.jpg'
             file_path = app.config['BASE_DIR'] + '/' + file_relative_path
             urllib.urlretrieve(speaker.photo, file_path)
-            speaker.small = save_resized_photo(file_path, event_id, speaker.id, 'small', image_sizes)
-            speaker.thumbnail = save_resized_photo(file_path, event_id, speaker.id, 'thumbnail', image_sizes)
-            speaker.icon = save_resized_photo(file_path, event_id, speaker.id, 'icon', image_sizes)
+            urls = save_image_variants(file_path, get_photo_variants(event_id, speaker.id, image_sizes), {
+                'small': speaker.small, 'thumbnail': speaker.thumbnail, 'icon': speaker.icon})
+            speaker.small, speaker.thumbnail, speaker.icon = urls['small'], urls['thumbnail'], urls['icon']
             db.session.add(speaker)
             os.remove(file_path)
             print "Downloaded " + speaker.photo + " into " + file_relative_path
@@ -12,6 +12,10 @@ import zipfile
 from StringIO import StringIO
 
 from app import current_app as app
+from app.api.helpers import export_helpers
+from app.helpers.data import update_or_create
+from app.models.custom_forms import CustomForms
+from app.models.session import Session
 from tests.unittests.api.utils import create_event, get_path, create_services, \
     create_session, save_to_db, Speaker
 from tests.unittests.auth_helper import register
@@ -161,6 +165,23 @@ class TestEventExport(ImportExportBase):
         if os.path.isdir(dr + '/images'):
             self.assertFalse(1, 'Image Dir Exists')
 
+    def test_export_chunks(self):
+        """
+        test that services exported over several chunks form one json list
+        """
+        with app.test_request_context():
+            create_services(1, '2')
+            create_services(1, '3')
+        chunk = export_helpers.EXPORT_CHUNK
+        export_helpers.EXPORT_CHUNK = 2
+        try:
+            self._create_set()
+        finally:
+            export_helpers.EXPORT_CHUNK = chunk
+        dr = 'static/uploads/test_event_import'
+        sessions = json.loads(open(dr + '/sessions', 'r').read())
+        self.assertEqual([obj['id'] for obj in sessions], [1, 2, 3])
+
     def test_export_order(self):
         """
         Tests order of export of fields in export files
@@ -263,6 +284,30 @@ class TestEventImport(ImportExportBase):
                 1, '5', track=2, speakers=[1]
             )
         self._test_import_success()
+        # relations are mapped to the imported services
+        with app.test_request_context():
+            old = Session.query.filter_by(event_id=1).order_by(Session.id).all()
+            new = Session.query.filter_by(event_id=2).order_by(Session.id).all()
+            self.assertEqual(len(old), len(new))
+            for old_session, new_session in zip(old, new):
+                self.assertEqual(old_session.title, new_session.title)
+                self.assertEqual(sorted(_.name for _ in old_session.speakers),
+                                 sorted(_.name for _ in new_session.speakers))
+                # versioned through the ORM, the session pages read them
+                self.assertEqual(new_session.versions.count(), 1)
+                if old_session.track:
+                    self.assertEqual(new_session.track.event_id, 2)
+                    self.assertEqual(old_session.track.name, new_session.track.name)
+
+    def test_import_custom_forms(self):
+        speaker_form = json.dumps({'name': {'include': 1, 'require': 1}})
+        with app.test_request_context():
+            update_or_create(CustomForms, event_id=1, speaker_form=speaker_form)
+        self._test_import_success()
+        with app.test_request_context():
+            forms = CustomForms.query.filter_by(event_id=2).all()
+            self.assertEqual(len(forms), 1)
+            self.assertEqual(forms[0].speaker_form, speaker_form)
 
     def test_import_validation_error(self):
         """
@@ -280,6 +325,9 @@ class TestEventImport(ImportExportBase):
         self._test_import_error(
             checks=['Invalid', 'email', '400']
         )
+        # nothing of the failed import is left
+        with app.test_request_context():
+            self.assertEqual(Speaker.query.filter_by(event_id=2).count(), 0)
 
 
 class TestImportOTS(ImportExportBase):
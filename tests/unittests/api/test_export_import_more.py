@@ -3,16 +3,78 @@ Import/Export to other formats tests
 - pentabarf, ical, xcal
 """
 import json
+import os
+import tempfile
 import unittest
+from datetime import date, datetime
 
 from app import current_app as app
 from tests.unittests.api.utils import create_event, create_services, create_session
 from tests.unittests.auth_helper import register
 from tests.unittests.setup_database import Setup
 from test_export_import import ImportExportBase
+from app.helpers.exporters.helpers import group_schedule, load_schedule
+from app.helpers.importers.pentabarfxml import PentabarfImporter
+from app.helpers.importers.xcal import XCalImporter
 from app.helpers.tasks import export_ical_task, export_pentabarf_task, export_xcal_task
 
 
+XCAL_RFC6321 = """<?xml version="1.0" encoding="utf-8"?>
+<icalendar xmlns="urn:ietf:params:xml:ns:icalendar-2.0">
+  <vcalendar>
+    <components>
+      <vevent>
+        <properties>
+          <summary><text>Keynote</text></summary>
+          <dtstart><date-time>2017-03-18T10:00:00</date-time></dtstart>
+          <dtend><date-time>2017-03-18T11:00:00</date-time></dtend>
+          <attendee>
+            <parameters><cn><text>Jane Doe</text></cn></parameters>
+            <cal-address>mailto:jane@example.com</cal-address>
+          </attendee>
+        </properties>
+      </vevent>
+    </components>
+  </vcalendar>
+</icalendar>
+"""
+
+PENTABARF_FRAB = """<?xml version="1.0" encoding="utf-8"?>
+<schedule>
+  <conference>
+    <title>FrabConf</title>
+    <start>2017-03-18</start>
+    <end>2017-03-19</end>
+  </conference>
+  <day date="2017-03-18" index="1">
+    <room name="Main Hall">
+      <event id="1">
+        <start>10:00</start>
+        <duration>01:00</duration>
+        <room>Main Hall</room>
+        <title>Opening</title>
+        <type>talk</type>
+      </event>
+      <event id="2">
+        <start>11:00</start>
+        <duration>00:30</duration>
+        <room>Main Hall</room>
+        <title>Lightning talks</title>
+        <type>talk</type>
+      </event>
+    </room>
+  </day>
+</schedule>
+"""
+
+
+def _write_temp(data):
+    fd, path = tempfile.mkstemp()
+    with os.fdopen(fd, 'w') as fp:
+        fp.write(data)
+    return path
+
+
 class ImportExportOtherBase(ImportExportBase):
     """
     Base class
@@ -63,6 +125,32 @@ class TestPentabarf(ImportExportOtherBase):
         self.assertEqual(data['id'], 2)
 
 
+    def test_import_without_conference(self):
+        path = _write_temp('<schedule><day date="2017-03-18"></day></schedule>')
+        try:
+            with app.test_request_context():
+                with self.assertRaises(ValueError):
+                    PentabarfImporter.import_data(file_path=path, creator_id=1, task_handle=None)
+        finally:
+            os.remove(path)
+
+    def test_import_nested_room(self):
+        """
+        test that the <room> inside each frab <event> keeps the room of the day
+        """
+        path = _write_temp(PENTABARF_FRAB)
+        try:
+            with app.test_request_context():
+                event = PentabarfImporter.import_data(file_path=path, creator_id=1, task_handle=None)
+                sessions = sorted(event.session, key=lambda session: session.start_time)
+                self.assertEqual([_.title for _ in sessions], ['Opening', 'Lightning talks'])
+                for session in sessions:
+                    self.assertIsNotNone(session.microlocation)
+                    self.assertEqual(session.microlocation.name, 'Main Hall')
+        finally:
+            os.remove(path)
+
+
 class TestIcal(ImportExportOtherBase):
     """
     Test ical import/exports
@@ -105,7 +193,48 @@ class TestXcal(ImportExportOtherBase):
         self.assertIn('TestSpeaker', resp.data)
         self.assertIn('TestSession', resp.data)
         print resp.data
-        # import not made yet
+        # import back
+        resp = self._upload(resp.data, '/api/v1/events/import/xcal', 'cal.xcs')  # celery task response
+        self.assertEqual(resp.status_code, 200)
+        data = self.app.get('/api/v1/events/2').data
+        self.assertIn('TestEvent', data)
+        data = self.app.get('/api/v1/events/2/sessions').data
+        self.assertIn('TestSession', data)
+        data = self.app.get('/api/v1/events/2/speakers').data
+        self.assertIn('TestSpeaker', data)
+
+
+    def test_import_attendee_name(self):
+        """
+        test that the name of a speaker is read from the cn parameter
+        """
+        path = _write_temp(XCAL_RFC6321)
+        try:
+            with app.test_request_context():
+                event = XCalImporter.import_data(file_path=path, creator_id=1, task_handle=None)
+                speakers = event.speaker
+                self.assertEqual([(_.name, _.email) for _ in speakers], [(u'Jane Doe', u'jane@example.com')])
+        finally:
+            os.remove(path)
+
+
+class TestScheduleLoader(ImportExportOtherBase):
+    """
+    Test the schedule shared by the exporters
+    """
+    def test_group_schedule(self):
+        with app.test_request_context():
+            create_session(1, '3', state='accepted', track=1, microlocation=1, speakers=[1],
+                           start_time=datetime(2014, 8, 5, 10, 0, 0))
+            sessions = load_schedule(1)
+            # only accepted sessions
+            self.assertEqual([session.title for session in sessions], ['TestSession1_2', 'TestSession1_3'])
+            days = group_schedule(sessions)
+            self.assertEqual(days.keys(), [date(2014, 8, 4), date(2014, 8, 5)])
+            microlocation, room_sessions = days[date(2014, 8, 4)][0]
+            self.assertEqual(microlocation.id, 1)
+            self.assertEqual([session.title for session in room_sessions], ['TestSession1_2'])
+            self.assertEqual(room_sessions[0].speakers[0].id, 1)
 
 
 if __name__ == '__main__':
@@ -1,6 +1,8 @@
 import unittest
 
 from app import current_app as app
+from app.helpers.data import save_to_db
+from app.models.track import Track
 from tests.unittests.api.utils import get_path, create_event, create_services
 from tests.unittests.auth_helper import register, login
 from tests.unittests.setup_database import Setup
@@ -75,6 +77,43 @@ class TestEtagGetApi(OpenEventTestCase):
         path = get_path(1, 'sponsors', 1)
         self._test_path(path, 'TestSponsor_1')
 
+    def test_etag_changes_on_update(self):
+        """Version based ETag must change when the resource is modified
+        outside of the API
+        """
+        path = get_path(1, 'tracks', 1)
+        response = self.app.get(path, follow_redirects=True)
+        etag = response.headers.get('etag')
+        with app.test_request_context():
+            track = Track.query.get(1)
+            track.name = 'TestTrack_1_Updated'
+            save_to_db(track, 'Track updated')
+        response = self.app.get(path, headers={'If-None-Match': etag},
+                                follow_redirects=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('TestTrack_1_Updated', response.data)
+        self.assertNotEqual(response.headers.get('etag'), etag)
+
+    def test_schedule_api(self):
+        path = get_path(1, 'schedule.json')
+        self._test_path(path, 'TestEvent', 'TestTrack_1')
+        response = self.app.get(path, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers.get('Content-Encoding'), 'gzip')
+        self.assertEqual(response.headers.get('Vary'), 'Accept-Encoding')
+
+    def test_schedule_etag_changes_on_update(self):
+        path = get_path(1, 'schedule.json')
+        etag = self.app.get(path).headers.get('etag')
+        with app.test_request_context():
+            track = Track.query.get(1)
+            track.name = 'TestTrack_1_Updated'
+            save_to_db(track, 'Track updated')
+        response = self.app.get(path, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('TestTrack_1_Updated', response.data)
+        self.assertNotEqual(response.headers.get('etag'), etag)
+
 
 if __name__ == '__main__':
     unittest.main()
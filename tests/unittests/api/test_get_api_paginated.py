@@ -122,6 +122,37 @@ class TestGetApiPaginatedUrls(OpenEventTestCase, PaginatedApiTestCase):
         self._test_model('event')
 
 
+class TestGetApiPaginatedKeyset(TestGetApiPaginatedUrls):
+    """
+    Test keyset pagination using the `after` query parameter
+    """
+
+    def _test_model(self, name):
+        """
+        Tests -
+        1. `after` returns items with greater ids and no previous url
+        2. next url carries the id of the last item returned
+        3. last page has empty next url
+        """
+        login(self.app, u'test@example.com', u'test')
+        if name == 'event':
+            path = get_path('page')
+        else:
+            path = get_path(1, name + 's', 'page')
+        with app.test_request_context():
+            create_event(name='TestEvent2')
+            create_services(1)
+        data = self._json_from_url(path + '?limit=1&after=0')
+        self.assertEqual(len(data['results']), 1)
+        self.assertEqual(data['results'][0]['id'], 1)
+        self.assertIn('after=1', data['next'])
+        self.assertEqual(data['previous'], '')
+        data = self._json_from_url(data['next'])
+        self.assertEqual(len(data['results']), 1)
+        self.assertEqual(data['results'][0]['id'], 2)
+        self.assertEqual(data['next'], '')
+
+
 class TestGetApiPaginatedEvents(OpenEventTestCase):
     """
     Test Paginated GET API for Events
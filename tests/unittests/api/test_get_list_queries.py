@@ -87,6 +87,27 @@ class TestGetListQueries(OpenEventTestCase):
             self.assertIn('SomeBuilding', resp.data)
             self.assertIn('Berlin', resp.data)
 
+    def test_event_search_queries(self):
+        with app.test_request_context():
+            login(self.app, u'test@example.com', u'test')
+            path = get_path()
+            self._post(path, POST_EVENT_DATA)
+            data = POST_EVENT_DATA.copy()
+            data['name'] = 'Berlin Meetup'
+            data['location_name'] = 'SomeBuilding'
+            data['searchable_location_name'] = 'SomeBuilding'
+            self._post(path, data)
+            # match in name ranks above match in location
+            resp = self.app.get(path + '?search=berlin')
+            self.assertEqual(resp.status_code, 200)
+            results = json.loads(resp.data)
+            self.assertEqual([event['name'] for event in results], ['Berlin Meetup', 'TestEvent'])
+            # all words have to match
+            resp = self.app.get(path + '?search=berlin%20meetup')
+            self.assertEqual(len(json.loads(resp.data)), 1)
+            resp = self.app.get(path + '?search=r@nd0m')
+            self.assertEqual(len(resp.data), 3)
+
     def test_session_time_queries(self):
         with app.test_request_context():
             path = get_path(1, 'sessions')
@@ -1,12 +1,15 @@
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from flask import url_for
 
 from app import current_app as app
 from app.helpers.data import DataManager, trash_user, trash_session
 from app.helpers.data import save_to_db
+from app.helpers.scheduled_jobs import empty_trash
 from app.models.event import Event
+from app.models.order import Order
+from app.models.sales_rollup import SalesRollup
 from app.models.session import Session
 from app.models.user import User
 from tests.unittests.object_mother import ObjectMother
@@ -61,6 +64,34 @@ class TestAdminTrash(OpenEventTestCase):
             self.assertFalse('Session 1' in rv.data)
             self.assertTrue(session.deleted_at is not None)
 
+    def test_empty_trash(self):
+        with app.test_request_context():
+            for name, days in (('old', 40), ('recent', 1)):
+                event = ObjectMother.get_event()
+                event.name = name
+                event.deleted_at = datetime.now() - timedelta(days=days)
+                save_to_db(event, "Event saved")
+            session = ObjectMother.get_session(event_id=2)
+            session.deleted_at = datetime.now() - timedelta(days=40)
+            save_to_db(session, "Session saved")
+            user = ObjectMother.get_user()
+            save_to_db(user, "User saved")
+            for days in (5, 0):
+                order = Order(event_id=2, user_id=user.id)
+                order.status = 'pending'
+                order.created_at = datetime.now() - timedelta(days=days)
+                save_to_db(order, "Order saved")
+
+            empty_trash()
+            self.assertEqual([event.name for event in Event.query.all()], ['recent'])
+            self.assertEqual(Session.query.count(), 0)
+            self.assertEqual([order.status for order in Order.query.order_by(Order.id)],
+                             ['expired', 'pending'])
+            # the expired order moved in the sales rollup too
+            rollup = SalesRollup.query.filter_by(event_id=2, ticket_id=None).order_by(SalesRollup.day).all()
+            self.assertEqual([(row.status, row.orders_count) for row in rollup],
+                             [('expired', 1), ('pending', 1)])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from app import current_app as app
+from app.helpers.data import save_to_db
+from app.helpers.exporters import csv_exports
+from app.helpers.exporters.csv_exports import stream_csv, get_speaker_rows, get_session_rows
+from tests.unittests.object_mother import ObjectMother
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestCSVExports(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_stream_csv(self):
+        rows = [[u'Ren\xe9', None, 2], ['a,b', 'c', 3.5]] * 150
+        chunks = list(stream_csv(['Name', 'Note', 'Count'], rows))
+        self.assertEqual(len(chunks), 4)
+        lines = ''.join(chunks).split('\r\n')
+        self.assertEqual(lines[0], 'Name,Note,Count')
+        self.assertEqual(lines[1], 'Ren\xc3\xa9,,2')
+        self.assertEqual(lines[2], '"a,b",c,3.5')
+        self.assertEqual(len(lines), 302)
+
+    def test_speaker_and_session_rows(self):
+        with app.test_request_context():
+            event = ObjectMother.get_event()
+            save_to_db(event, "Event saved")
+            batch = csv_exports.CSV_BATCH
+            csv_exports.CSV_BATCH = 2
+            try:
+                for count in range(3):
+                    session = ObjectMother.get_session(event.id)
+                    session.title = 'Session %d' % count
+                    speaker = ObjectMother.get_speaker()
+                    speaker.event_id = event.id
+                    speaker.name = 'Speaker %d' % count
+                    session.speakers.append(speaker)
+                    save_to_db(session, "Session saved")
+                speaker_rows = list(get_speaker_rows(event.id))
+                session_rows = list(get_session_rows(event.id))
+            finally:
+                csv_exports.CSV_BATCH = batch
+            self.assertEqual([row[0] for row in speaker_rows], ['Speaker 0', 'Speaker 1', 'Speaker 2'])
+            self.assertEqual(speaker_rows[1][2], 'Session 1 (pending)')
+            self.assertEqual([row[0] for row in session_rows],
+                             ['Session 0 (pending)', 'Session 1 (pending)', 'Session 2 (pending)'])
+            self.assertEqual(session_rows[2][1], 'Speaker 2')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ import unittest
 from app import current_app as app
 from app.helpers.data import save_to_db
 from app.helpers.data_getter import DataGetter
+from app.models.users_events_roles import UsersEventsRoles
 from tests.unittests.object_mother import ObjectMother
 from tests.unittests.utils import OpenEventTestCase
 
@@ -40,6 +41,24 @@ class TestDataGetter(OpenEventTestCase):
             save_to_db(user)
             self.assertTrue(DataGetter.get_event_roles_for_user(user.id))
 
+    def test_get_event_roles_by_user(self):
+        with app.test_request_context():
+            user = ObjectMother.get_user()
+            save_to_db(user)
+            event = ObjectMother.get_event()
+            save_to_db(event)
+            role = DataGetter.get_role_by_name('organizer')
+            save_to_db(UsersEventsRoles(user=user, event=event, role=role))
+            roles = DataGetter.get_event_roles_by_user()
+            self.assertEqual([(_.event_id, _.role_id) for _ in roles[user.id]], [(event.id, role.id)])
+
+    def test_users_with_roles(self):
+        with app.test_request_context():
+            save_to_db(ObjectMother.get_user())
+            users = DataGetter.get_all_users('with_roles')
+            self.assertIn('sys_roles', users[0].__dict__)
+            self.assertIn('user_detail', users[0].__dict__)
+
     def test_get_roles(self):
         with app.test_request_context():
             self.assertTrue(DataGetter.get_roles())
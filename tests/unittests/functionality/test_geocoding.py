@@ -0,0 +1,67 @@
+import unittest
+
+from app import current_app as app
+from app.api.helpers.query_filters import event_search_location
+from app.helpers.data import save_to_db
+from app.helpers import geocoding
+from app.helpers.geocoding import geocode, get_locality
+from app.models import db
+from app.models.event import Event
+from app.models.geocode import GeocodeCache
+from tests.unittests.object_mother import ObjectMother
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestGeocoding(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+        with app.test_request_context():
+            save_to_db(GeocodeCache(lookup=u'address:berlin', status=u'OK',
+                                    latitude=52.52, longitude=13.405, locality=u'Berlin'))
+            save_to_db(GeocodeCache(lookup=u'latlng:52.52,13.405', status=u'OK',
+                                    latitude=52.52, longitude=13.405, locality=u'Berlin'))
+            for name, latitude, longitude in (('Far', 48.8566, 2.3522),
+                                              ('Near', 52.55, 13.45),
+                                              ('Nearest', 52.521, 13.406)):
+                event = ObjectMother.get_event()
+                event.name = name
+                event.latitude = latitude
+                event.longitude = longitude
+                save_to_db(event, "Event saved")
+
+    def test_cached_lookups(self):
+        with app.test_request_context():
+            self.assertEqual(geocode(u'Berlin '), {'lat': 52.52, 'lng': 13.405})
+            self.assertEqual(get_locality(52.52001, 13.40502), u'Berlin')
+
+    def test_lookup_stored_apart_from_session(self):
+        with app.test_request_context():
+            request = geocoding._request
+            geocoding._request = lambda params: {
+                'status': u'OK',
+                'results': [{'geometry': {'location': {'lat': 48.8566, 'lng': 2.3522}},
+                             'address_components': [{'types': ['locality', 'political'],
+                                                     'long_name': u'Paris'}]}]}
+            try:
+                event = ObjectMother.get_event()
+                event.name = 'Unsaved'
+                db.session.add(event)
+                self.assertEqual(geocode(u'Paris'), {'lat': 48.8566, 'lng': 2.3522})
+                # a concurrent lookup finding the entry stored is not an error
+                geocoding._store(GeocodeCache(lookup=u'address:paris', status=u'OK'))
+            finally:
+                geocoding._request = request
+            db.session.rollback()
+            self.assertIsNone(Event.query.filter_by(name='Unsaved').first())
+            entry = GeocodeCache.query.filter_by(lookup=u'address:paris').one()
+            self.assertEqual(entry.locality, u'Paris')
+
+    def test_proximity_search(self):
+        with app.test_request_context():
+            events = event_search_location(u'Berlin', Event.query).all()
+            self.assertEqual([event.name for event in events], ['Nearest', 'Near'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from app import current_app as app
+from app.helpers.assets import images
+from app.helpers.assets.images import save_image_variants, update_image_variants
+from app.helpers.data import save_to_db
+from app.helpers.storage import upload, UploadedFile
+from app.models.speaker import Speaker
+from tests.unittests.object_mother import ObjectMother
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+def get_local_path(url):
+    return app.config['BASE_DIR'] + '/' + url[len('/serve_'):]
+
+
+class TestImageVariants(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+        fd, self.source_path = tempfile.mkstemp(suffix='.jpg')
+        os.close(fd)
+        Image.new('RGB', (1000, 400), (200, 20, 20)).save(self.source_path, 'JPEG')
+        self.variants = [
+            ('large', 500, 500, 'on', 'events/1/large'),
+            ('icon', 50, 50, 'off', 'events/1/icon'),
+        ]
+
+    def tearDown(self):
+        os.remove(self.source_path)
+        super(TestImageVariants, self).tearDown()
+
+    def test_variants(self):
+        with app.test_request_context():
+            urls = save_image_variants(open(self.source_path, 'rb'), self.variants)
+            self.assertEqual(Image.open(get_local_path(urls['large'])).size, (500, 200))
+            self.assertEqual(Image.open(get_local_path(urls['icon'])).size, (50, 50))
+
+    def test_unchanged_image_not_saved_again(self):
+        with app.test_request_context():
+            urls = save_image_variants(open(self.source_path, 'rb'), self.variants)
+            os.remove(get_local_path(urls['icon']))
+            self.assertEqual(save_image_variants(open(self.source_path, 'rb'), self.variants, urls), urls)
+            self.assertFalse(os.path.exists(get_local_path(urls['icon'])))
+
+            Image.new('RGB', (1000, 400), (20, 20, 200)).save(self.source_path, 'JPEG')
+            new_urls = save_image_variants(open(self.source_path, 'rb'), self.variants, urls)
+            self.assertNotEqual(new_urls['icon'], urls['icon'])
+            self.assertTrue(os.path.exists(get_local_path(new_urls['icon'])))
+
+    def test_variants_of_uploaded_image(self):
+        with app.test_request_context():
+            save_to_db(ObjectMother.get_event(), "Event saved")
+            speaker = ObjectMother.get_speaker()
+            speaker.event_id = 1
+            speaker.photo = upload(UploadedFile(self.source_path, 'photo.jpg'), 'events/1/speakers/1/photo')
+            save_to_db(speaker, "Speaker saved")
+            variants = [('icon', 50, 50, 'off', 'events/1/speakers/1/icon')]
+            update_image_variants('speaker', speaker.id, speaker.photo, variants)
+            speaker = Speaker.query.get(speaker.id)
+            self.assertEqual(Image.open(get_local_path(speaker.icon)).size, (50, 50))
+
+            # the variants of a replaced image are not saved
+            icon = speaker.icon
+            update_image_variants('speaker', speaker.id, '/serve_static/media/old.jpg',
+                                  [('icon', 20, 20, 'off', 'events/1/speakers/1/icon')])
+            self.assertEqual(Speaker.query.get(speaker.id).icon, icon)
+
+    def test_same_image_saved_again(self):
+        with app.test_request_context():
+            save_to_db(ObjectMother.get_event(), "Event saved")
+            speaker = ObjectMother.get_speaker()
+            speaker.event_id = 1
+            speaker.photo = upload(UploadedFile(self.source_path, 'photo.jpg'), 'events/1/speakers/1/photo')
+            save_to_db(speaker, "Speaker saved")
+            variants = [('icon', 50, 50, 'off', 'events/1/speakers/1/icon')]
+            update_image_variants('speaker', speaker.id, speaker.photo, variants)
+            icon = Speaker.query.get(speaker.id).icon
+
+            # the same image uploaded again keeps its variants
+            speaker = Speaker.query.get(speaker.id)
+            speaker.photo = upload(UploadedFile(self.source_path, 'photo2.jpg'), 'events/1/speakers/1/photo')
+            save_to_db(speaker, "Speaker saved")
+            uploads = []
+            original_upload = images.upload
+            images.upload = lambda *args, **kwargs: uploads.append(args)
+            try:
+                update_image_variants('speaker', speaker.id, speaker.photo, variants)
+            finally:
+                images.upload = original_upload
+            self.assertEqual(uploads, [])
+            self.assertEqual(Speaker.query.get(speaker.id).icon, icon)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import hashlib
+import unittest
+from datetime import datetime
+
+from app import current_app as app
+from app.helpers import tasks
+from app.helpers.pdf import get_pdf, _save_document
+from app.models.pdf_document import PdfDocument
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class FailedResult(object):
+    def __init__(self, task_id):
+        self.id = task_id
+
+    def failed(self):
+        return True
+
+    def ready(self):
+        return True
+
+
+class FailingTasks(object):
+    """render_pdf_task whose stored tasks have failed"""
+    def __init__(self, task):
+        self.task = task
+
+    def AsyncResult(self, task_id):
+        return FailedResult(task_id)
+
+    def delay(self, *args):
+        return self.task.delay(*args)
+
+
+class TestPdf(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_pdf_made_once(self):
+        with app.test_request_context():
+            html = u'<html><body>Attendees</body></html>'
+            url, task = get_pdf(html, 'events/1/attendees', 'attendees.pdf', private=True)
+            self.assertIsNone(url)
+            url = task.get()
+            document = PdfDocument.query.filter_by(key='events/1/attendees').one()
+            self.assertEqual(document.url, url)
+
+            # made again only once the html changes
+            self.assertEqual(get_pdf(html, 'events/1/attendees', 'attendees.pdf', private=True), (url, None))
+            url, task = get_pdf(html + u' ', 'events/1/attendees', 'attendees.pdf', private=True)
+            self.assertIsNone(url)
+
+    def test_failed_task_queued_again(self):
+        with app.test_request_context():
+            html = u'<html><body>Orders</body></html>'
+            version = hashlib.sha1(html.encode('utf-8')).hexdigest()
+            _save_document('events/1/orders', task_id='failed-task', task_version=version,
+                           queued_at=datetime.now())
+            render_pdf_task = tasks.render_pdf_task
+            tasks.render_pdf_task = FailingTasks(render_pdf_task)
+            try:
+                url, task = get_pdf(html, 'events/1/orders', 'orders.pdf', private=True)
+            finally:
+                tasks.render_pdf_task = render_pdf_task
+            self.assertIsNone(url)
+            self.assertNotEqual(task.id, 'failed-task')
+            self.assertEqual(task.get(), PdfDocument.query.filter_by(key='events/1/orders').one().url)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from app import current_app as app
+from app.helpers.data import DataManager
+from app.models.session import Session
+from app.models.track import Track
+from app.models.user import User, COORGANIZER, ORGANIZER
+from tests.unittests.api.utils import create_event
+from tests.unittests.auth_helper import register
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestPermissionResolver(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+        with app.test_request_context():
+            register(self.app, u'test@example.com', u'test')
+            register(self.app, u'other@example.com', u'test')
+            create_event(creator_email=u'test@example.com')
+
+    def test_event_roles(self):
+        with app.test_request_context():
+            user = User.query.filter_by(email=u'test@example.com').first()
+            self.assertTrue(user.has_role(1))
+            self.assertTrue(user.is_organizer(1))
+            self.assertFalse(user.is_coorganizer(1))
+            self.assertFalse(user.has_role(2))
+            self.assertTrue(user.can_create(Session, 1))
+            self.assertTrue(user.can_update(Track, 1))
+
+    def test_role_assignment_in_same_request(self):
+        """Roles memoized in a request are reloaded after assignment"""
+        with app.test_request_context():
+            user = User.query.filter_by(email=u'other@example.com').first()
+            self.assertFalse(user.has_role(1))
+            self.assertFalse(user.can_read(Session, 1))
+            DataManager.add_role_to_event({
+                'user_email': u'other@example.com',
+                'user_role': COORGANIZER
+            }, 1, record=False)
+            self.assertTrue(user.has_role(1))
+            self.assertTrue(user.is_coorganizer(1))
+            self.assertFalse(user._is_role(ORGANIZER, 1))
+            self.assertTrue(user.can_read(Session, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import base64
+import os
+import time
+import unittest
+
+from app import current_app as app
+from app.helpers import qr
+from app.helpers.qr import get_qr, get_qrs, prune_qr_files, LRUCache
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestQR(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_qr(self):
+        with app.test_request_context():
+            png = base64.b64decode(get_qr('ORDER-1'))
+            self.assertTrue(png.startswith('\x89PNG'))
+            self.assertNotEqual(get_qr('ORDER-1'), get_qr('ORDER-2'))
+
+    def test_qr_rendered_once(self):
+        with app.test_request_context():
+            text = u'ORDER-\xe9-3'
+            code = get_qr(text)
+            self.assertTrue(os.path.isfile(qr._get_qr_path(text)))
+
+            # served from the disk once out of memory
+            qr._qr_cache = LRUCache(qr.QR_CACHE_SIZE)
+            self.assertEqual(get_qr(text), code)
+
+    def test_qrs(self):
+        with app.test_request_context():
+            texts = ['ORDER-1', 'ORDER-2', 'ORDER-1']
+            qrs = get_qrs(texts)
+            self.assertEqual(set(qrs.keys()), {'ORDER-1', 'ORDER-2'})
+            self.assertEqual(qrs['ORDER-2'], get_qr('ORDER-2'))
+
+    def test_prune_qr_files(self):
+        with app.test_request_context():
+            get_qr('ORDER-4')
+            get_qr('ORDER-5')
+            old_path = qr._get_qr_path('ORDER-4')
+            old_time = time.time() - (qr.QR_DISK_DAYS + 1) * 24 * 3600
+            os.utime(old_path, (old_time, old_time))
+
+            self.assertGreaterEqual(prune_qr_files(), 1)
+            self.assertFalse(os.path.exists(old_path))
+            self.assertTrue(os.path.isfile(qr._get_qr_path('ORDER-5')))
+
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
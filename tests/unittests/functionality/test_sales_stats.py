@@ -0,0 +1,97 @@
+import unittest
+
+from app import current_app as app
+from app.helpers.data import save_to_db
+from app.helpers.data_getter import DataGetter
+from app.helpers.payment import convert_currency
+from app.helpers.sales_rollup import get_rollup_sales, mark_rollup_pending, refresh_pending_rollups
+from app.helpers.sales_stats import get_event_sales, get_tickets_sold
+from app.helpers.ticketing import TicketingManager
+from app.models import db
+from app.models.fees import TicketFees
+from app.models.forex_rate import ForexRate
+from app.models.order import Order, OrderTicket
+from app.models.ticket import Ticket
+from tests.unittests.object_mother import ObjectMother
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestSalesStats(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+        with app.test_request_context():
+            user = ObjectMother.get_user()
+            save_to_db(user, "User saved")
+            event = ObjectMother.get_event()
+            event.payment_currency = 'USD'
+            save_to_db(event, "Event saved")
+            ticket = Ticket(name='Test Ticket', type='paid', event=event, price=50)
+            save_to_db(ticket, "Ticket saved")
+            save_to_db(TicketFees(currency='USD', service_fee=10.0, maximum_fee=15.0), "Fees saved")
+            # two orders of 2 tickets, one order of 5 tickets (fee capped), one initialized
+            for quantity, status in ((2, 'completed'), (2, 'completed'), (5, 'completed'), (1, 'initialized')):
+                order = Order(amount=50 * quantity, paid_via='stripe', user_id=user.id, event_id=event.id)
+                order.status = status
+                save_to_db(order, "Order saved")
+                save_to_db(OrderTicket(order_id=order.id, ticket_id=ticket.id, quantity=quantity))
+            self.event_id = event.id
+            self.ticket_id = ticket.id
+
+    def test_event_sales(self):
+        with app.test_request_context():
+            event = DataGetter.get_event(self.event_id)
+            orders_summary, tickets_summary = get_event_sales(event)
+            self.assertEqual(orders_summary['completed']['orders_count'], 3)
+            self.assertEqual(orders_summary['completed']['tickets_count'], 9)
+            self.assertEqual(orders_summary['completed']['total_sales'], 450)
+            self.assertEqual(orders_summary['pending']['orders_count'], 1)
+            completed = tickets_summary[str(self.ticket_id)]['completed']
+            self.assertEqual(completed['tickets_count'], 9)
+            # 4 tickets at 55 and 5 tickets at 250 + maximum fee of 15
+            self.assertEqual(completed['sales'], 4 * 55 + 250 + 15)
+
+    def test_sales_rollup(self):
+        with app.test_request_context():
+            self.assertEqual(get_rollup_sales(event_id=self.event_id), [])
+            self.assertEqual(refresh_pending_rollups(), 1)
+            # refreshing again doesn't count orders twice
+            mark_rollup_pending([(self.event_id, Order.query.first().created_at.date())])
+            db.session.commit()
+            refresh_pending_rollups()
+            rows = dict((row[1], row) for row in get_rollup_sales(event_id=self.event_id))
+            # orders count, amount, tickets count, sales and fee base of completed orders
+            self.assertEqual(tuple(rows['completed'][3:]), (3, 450, 9, 450, 150))
+            self.assertEqual(rows['pending'][3], 1)
+
+    def test_sales_rollup_on_status_change(self):
+        with app.test_request_context():
+            order = Order.query.filter_by(status='initialized').first()
+            order.status = 'completed'
+            save_to_db(order, "Order completed")
+            refresh_pending_rollups()
+            rows = dict((row[1], row) for row in get_rollup_sales(event_id=self.event_id))
+            self.assertEqual(tuple(rows['completed'][3:]), (4, 500, 10, 500, 200))
+            self.assertNotIn('pending', rows)
+
+    def test_stored_forex_rate(self):
+        with app.test_request_context():
+            save_to_db(ForexRate(from_currency='EUR', to_currency='USD', rate=1.5), "Rate saved")
+            self.assertEqual(convert_currency('EUR', 'USD', 10), 15)
+            self.assertEqual(convert_currency('USD', 'USD', 10), 10)
+
+    def test_tickets_sold(self):
+        with app.test_request_context():
+            self.assertEqual(get_tickets_sold(self.event_id), {self.ticket_id: 9})
+
+    def test_ticket_stats_of_events(self):
+        with app.test_request_context():
+            events = DataGetter.get_all_events('with_tickets')
+            self.assertIn('tickets', events[0].__dict__)
+            stats = TicketingManager.get_ticket_stats_of_events(events)
+            self.assertEqual(stats, {self.event_id: TicketingManager.get_ticket_stats(events[0])})
+            self.assertEqual(stats[self.event_id][str(self.ticket_id)]['completed'], 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+from app import current_app as app
+from app.helpers import tasks
+from app.helpers.cache import cache
+from app.helpers.data import save_to_db
+from app.helpers.exporters.helpers import render_fragments
+from app.helpers.exporters.schedule_exports import schedule_exports, regenerate_export, \
+    regenerate_exports
+from app.models.schedule_export import ScheduleExport, ScheduleExportPending
+from tests.unittests.object_mother import ObjectMother
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestScheduleExports(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+        with app.test_request_context():
+            event = ObjectMother.get_event()
+            save_to_db(event, "Event saved")
+            self.event_id = event.id
+
+    def test_changes_coalesced(self):
+        queued = []
+        apply_async = tasks.export_schedule_task.apply_async
+        tasks.export_schedule_task.apply_async = lambda args, **kwargs: queued.append(args)
+        try:
+            with app.test_request_context():
+                schedule_exports(self.event_id)
+                schedule_exports(self.event_id)
+                self.assertEqual(queued, [(self.event_id,)])
+                self.assertEqual(ScheduleExportPending.query.filter_by(event_id=self.event_id).count(), 1)
+
+                # changes made once the task started queue another run
+                regenerate_exports(self.event_id)
+                self.assertEqual(ScheduleExportPending.query.filter_by(event_id=self.event_id).count(), 0)
+                schedule_exports(self.event_id)
+                self.assertEqual(len(queued), 2)
+        finally:
+            tasks.export_schedule_task.apply_async = apply_async
+
+    def test_unchanged_export_not_uploaded(self):
+        with app.test_request_context():
+            self.assertTrue(regenerate_export(self.event_id, 'ical'))
+            export = ScheduleExport.query.filter_by(event_id=self.event_id, export_format='ical').one()
+            self.assertIsNotNone(export.digest)
+            self.assertFalse(regenerate_export(self.event_id, 'ical'))
+
+            export.digest = 'changed'
+            save_to_db(export)
+            self.assertTrue(regenerate_export(self.event_id, 'ical'))
+
+
+class TestRenderFragments(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+        cache.init_app(app, config={'CACHE_TYPE': 'simple'})
+
+    def tearDown(self):
+        cache.init_app(app, config={'CACHE_TYPE': 'simple' if app.config['CACHING'] else 'null'})
+        super(TestRenderFragments, self).tearDown()
+
+    def test_fragments_reused(self):
+        rendered = []
+
+        def render(title, speaker):
+            rendered.append(title)
+            return '%s by %s' % (title, speaker)
+
+        with app.test_request_context():
+            items = [('Keynote', 'Jane'), ('Workshop', 'John')]
+            self.assertEqual(render_fragments('test', items, render), ['Keynote by Jane', 'Workshop by John'])
+            # only the changed session is rendered again
+            items[1] = ('Workshop', 'Joan')
+            self.assertEqual(render_fragments('test', items, render), ['Keynote by Jane', 'Workshop by Joan'])
+            self.assertEqual(rendered, ['Keynote', 'Workshop', 'Workshop'])
+
+
+if __name__ == '__main__':
+    unittest.main()
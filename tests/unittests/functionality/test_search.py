@@ -0,0 +1,60 @@
+import unittest
+
+from app import current_app as app
+from app.helpers import search
+from app.helpers.data import save_to_db
+from app.helpers.search import build_search_index, clear_search_index, get_vector, search_events, \
+    set_search_index
+from app.models.event import Event
+from tests.unittests.object_mother import ObjectMother
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestSearchFallback(OpenEventTestCase):
+    """
+    Search on databases other than PostgreSQL. The documents of the
+    fallback can't be stored in the tsvector column of the test database,
+    so its index is built from them directly.
+    """
+
+    def setUp(self):
+        self.app = Setup.create_app()
+        with app.test_request_context():
+            for name, location in (('TestEvent', 'Berlin'), ('Berlin Meetup', 'SomeBuilding'),
+                                   ('Workshop', 'Singapore')):
+                event = ObjectMother.get_event()
+                event.name = name
+                event.location_name = location
+                event.searchable_location_name = location
+                save_to_db(event, "Event saved")
+        # forced once saved, so that the stored documents stay tsvectors
+        self.is_postgres = search.is_postgres
+        search.is_postgres = lambda: False
+        with app.test_request_context():
+            set_search_index(build_search_index((event.id, get_vector(event)) for event in Event.query))
+
+    def tearDown(self):
+        search.is_postgres = self.is_postgres
+        clear_search_index()
+        super(TestSearchFallback, self).tearDown()
+
+    def _search(self, value, prefix=False):
+        return [event.name for event in search_events(value, Event.query, prefix=prefix)]
+
+    def test_search(self):
+        with app.test_request_context():
+            # match in name ranks above match in location
+            self.assertEqual(self._search(u'berlin'), ['Berlin Meetup', 'TestEvent'])
+            # all words have to match
+            self.assertEqual(self._search(u'berlin meetup'), ['Berlin Meetup'])
+            self.assertEqual(self._search(u'r@nd0m'), [])
+
+    def test_prefix_search(self):
+        with app.test_request_context():
+            self.assertEqual(self._search(u'work', prefix=True), ['Workshop'])
+            self.assertEqual(self._search(u'work'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from app import current_app as app
+from app.models import db
+from app.models.setting import Setting
+from app.settings import get_settings, set_settings
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestSettingsCache(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_snapshot_is_read_only(self):
+        with app.test_request_context():
+            settings = get_settings()
+            self.assertEqual(settings['app_name'], 'Open Event')
+            with self.assertRaises(TypeError):
+                settings['app_name'] = 'Changed'
+            self.assertNotIn('version', settings)
+
+    def test_snapshot_per_request(self):
+        with app.test_request_context():
+            settings = get_settings()
+            self.assertIs(get_settings(), settings)
+            set_settings(app_name='Renamed')
+            self.assertEqual(get_settings()['app_name'], 'Renamed')
+
+    def test_reload_on_change_from_other_process(self):
+        with app.test_request_context():
+            self.assertEqual(get_settings()['tagline'], None)
+        with app.test_request_context():
+            # update the row directly, as another worker would
+            Setting.query.update({'tagline': 'Changed elsewhere',
+                                  'version': Setting.version + 1},
+                                 synchronize_session=False)
+            db.session.commit()
+        with app.test_request_context():
+            self.assertEqual(get_settings()['tagline'], 'Changed elsewhere')
+
+
+if __name__ == '__main__':
+    unittest.main()
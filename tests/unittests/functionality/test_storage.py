@@ -0,0 +1,87 @@
+import unittest
+
+from app import current_app as app
+from app.helpers import storage
+from app.helpers.storage import S3Storage, MemoryBucket, UploadedMemory, generate_hash, \
+    generate_legacy_hash
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestBucketStorage(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+        self.bucket = MemoryBucket()
+        self.storage = S3Storage('test', None, None, None, bucket=self.bucket)
+
+    def test_upload(self):
+        with app.test_request_context():
+            url = self.storage.upload(UploadedMemory('%PDF-1.4\n', 'slides.pdf'), 'sessions/1')
+            key_name = 'sessions/1/' + generate_hash('sessions/1') + '/slides.pdf'
+            self.assertEqual(url, 'https://test.s3.amazonaws.com/' + key_name)
+            key = self.bucket.get_key(key_name)
+            self.assertEqual(key.data, '%PDF-1.4\n')
+            self.assertEqual(key.headers['Content-Type'], 'application/pdf')
+            self.assertEqual(key.policy, 'public-read')
+
+            # the previous file of the key is replaced
+            self.storage.upload(UploadedMemory('%PDF-1.4\n', 'new.pdf'), 'sessions/1')
+            self.assertIsNone(self.bucket.get_key(key_name))
+            self.assertEqual(len(self.bucket.list(prefix='sessions/1/')), 1)
+
+    def test_copy(self):
+        with app.test_request_context():
+            url = self.storage.upload(UploadedMemory('%PDF-1.4\n', 'slides.pdf'), 'sessions/4')
+            copy_url = self.storage.copy(url, 'sessions/5')
+            key_name = 'sessions/5/' + generate_hash('sessions/5') + '/slides.pdf'
+            self.assertEqual(copy_url, 'https://test.s3.amazonaws.com/' + key_name)
+            key = self.bucket.get_key(key_name)
+            self.assertEqual(key.data, '%PDF-1.4\n')
+            self.assertEqual(key.policy, 'public-read')
+
+            # replacing the copy keeps the original
+            self.storage.upload(UploadedMemory('%PDF-1.4\n', 'new.pdf'), 'sessions/5')
+            self.assertIsNone(self.bucket.get_key(key_name))
+            self.assertEqual(len(self.bucket.list(prefix='sessions/4/')), 1)
+
+    def test_private_upload(self):
+        with app.test_request_context():
+            url = self.storage.upload(UploadedMemory('%PDF-1.4\n', 'attendees.pdf'), 'events/1/attendees',
+                                      acl='private')
+            key_name = url.replace('https://test.s3.amazonaws.com/', '')
+            self.assertEqual(self.bucket.get_key(key_name).policy, 'private')
+            self.assertEqual(self.storage.get_private_url(url, 60),
+                             'memory://memory/%s?expires_in=60' % key_name)
+
+    def test_multipart_upload(self):
+        threshold, chunk_size = storage.MULTIPART_THRESHOLD, storage.MULTIPART_CHUNK_SIZE
+        storage.MULTIPART_THRESHOLD, storage.MULTIPART_CHUNK_SIZE = 100, 30
+        try:
+            with app.test_request_context():
+                data = ''.join(chr(_ % 256) for _ in xrange(1000))
+                url = self.storage.upload(UploadedMemory(data, 'video.bin'), 'sessions/2')
+        finally:
+            storage.MULTIPART_THRESHOLD, storage.MULTIPART_CHUNK_SIZE = threshold, chunk_size
+        self.assertEqual(self.bucket.multipart_uploads, 1)
+        key_name = url.replace('https://test.s3.amazonaws.com/', '')
+        self.assertEqual(self.bucket.get_key(key_name).data, data)
+
+    def test_key_hash(self):
+        with app.test_request_context():
+            key_hash = generate_hash('sessions/1')
+            self.assertEqual(key_hash, generate_hash(u'sessions/1'))
+            self.assertNotEqual(key_hash, generate_hash('sessions/2'))
+            self.assertEqual(len(key_hash), 10)
+            self.assertNotIn('/', key_hash)
+
+    def test_legacy_files_replaced(self):
+        with app.test_request_context():
+            legacy_name = 'sessions/3/' + generate_legacy_hash('sessions/3') + '/old.pdf'
+            self.bucket.new_key(legacy_name).set_contents_from_file(UploadedMemory('old', '').stream)
+            self.storage.upload(UploadedMemory('%PDF-1.4\n', 'new.pdf'), 'sessions/3')
+            self.assertIsNone(self.bucket.get_key(legacy_name))
+            self.assertEqual(len(self.bucket.list(prefix='sessions/3/')), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,9 +2,11 @@ import unittest
 from datetime import datetime
 
 from flask import url_for
+from sqlalchemy import event as sqlalchemy_event
 
 from app import current_app as app
 from app.helpers.data import save_to_db
+from app.models import db
 from app.models.call_for_papers import CallForPaper
 from tests.unittests.object_mother import ObjectMother
 from tests.unittests.utils import OpenEventTestCase
@@ -20,6 +22,43 @@ class TestGuestEventPage(OpenEventTestCase):
                               follow_redirects=True)
             self.assertTrue("Open Event" in rv.data, msg=rv.data)
 
+    def _count_queries(self, url):
+        # nothing is left loaded from the last request
+        db.session.commit()
+        statements = []
+
+        def count(*args):
+            statements.append(args[2])
+        sqlalchemy_event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            rv = self.app.get(url, follow_redirects=True)
+        finally:
+            sqlalchemy_event.remove(db.engine, 'before_cursor_execute', count)
+        self.assertEqual(rv.status_code, 200)
+        return len(statements)
+
+    def _add_session(self, event):
+        session = ObjectMother.get_session(event.id)
+        session.state = 'accepted'
+        speaker = ObjectMother.get_speaker()
+        speaker.event_id = event.id
+        session.speakers = [speaker]
+        save_to_db(session, "Session Saved")
+
+    def test_published_event_view_queries(self):
+        with app.test_request_context():
+            event = ObjectMother.get_event()
+            event.state = 'Published'
+            save_to_db(event, "Event Saved")
+            url = url_for('event_detail.display_event_detail_home', identifier=event.identifier)
+            self._add_session(event)
+            self._count_queries(url)
+            queries = self._count_queries(url)
+            # the speakers are read with the sessions
+            self._add_session(event)
+            self._add_session(event)
+            self.assertEqual(self._count_queries(url), queries)
+
     def test_published_event_view_coc(self):
         with app.test_request_context():
             event = ObjectMother.get_event()
@@ -5,6 +5,7 @@ from flask import url_for
 from app import current_app as app
 from app.helpers.data import save_to_db
 from app.helpers.data_getter import DataGetter
+from app.helpers.instrumentation import get_endpoint_stats, reset_endpoint_stats
 from tests.unittests.object_mother import ObjectMother
 from tests.unittests.views.view_test_case import OpenEventViewTestCase
 
@@ -56,6 +57,27 @@ class TestSuperAdminViews(OpenEventViewTestCase):
             rv = self.app.get(url_for('sadmin_settings.index_view'), follow_redirects=True)
             self.assertTrue("Settings" in rv.data, msg=rv.data)
 
+    def test_admin_metrics(self):
+        with app.test_request_context():
+            reset_endpoint_stats()
+            self.app.get(url_for('sadmin_events.index_view'), follow_redirects=True)
+            rv = self.app.get(url_for('sadmin_reports.metrics_view'))
+            self.assertIn('openevent_requests_total{endpoint="sadmin_events.index_view"} 1', rv.data, msg=rv.data)
+            stats = dict(get_endpoint_stats())['sadmin_events.index_view']
+            self.assertGreater(stats['queries'], 0)
+            self.assertEqual(stats['budget_violations'], 0)
+
+    def test_query_budget(self):
+        with app.test_request_context():
+            reset_endpoint_stats()
+            budgets = app.config['QUERY_BUDGETS']
+            app.config['QUERY_BUDGETS'] = {'sadmin_events.index_view': 0}
+            try:
+                self.app.get(url_for('sadmin_events.index_view'), follow_redirects=True)
+            finally:
+                app.config['QUERY_BUDGETS'] = budgets
+            self.assertEqual(dict(get_endpoint_stats())['sadmin_events.index_view']['budget_violations'], 1)
+
 
 if __name__ == '__main__':
     unittest.main()